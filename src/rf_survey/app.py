@@ -1,22 +1,50 @@
 import asyncio
 import logging
-from typing import Any, Dict, Optional
-from pydantic import ValidationError
+import time
+from uuid import uuid4
+from typing import Any, Callable, Dict, Optional, Set, Tuple, Union
 from copy import deepcopy
+from pathlib import Path
+from concurrent.futures import Executor
 
 from rf_shared.nats_client import NatsProducer
-from rf_shared.checksum import get_checksum
 from rf_shared.models import MetadataRecord, Envelope
 from zmsclient.zmc.v1.models import MonitorStatus
 
-from rf_survey.models import ReceiverConfig, SweepConfig, ApplicationInfo, ProcessingJob
+from rf_survey.buffer_pool import BufferPoolExhaustedError
+from rf_survey.capture_file import SpooledCaptureFile, remove_partial_files
+from rf_survey.capture_queue import ByteBudgetQueue, OverflowPolicy
+from rf_survey.executors import InstrumentedThreadPoolExecutor
+from rf_survey.hashing import ChecksumMethod
+from rf_survey.models import (
+    SweepConfig,
+    ApplicationInfo,
+    ProcessingJob,
+    SweepPosition,
+    CaptureResult,
+    CaptureAbortedError,
+)
+from rf_survey.capture_index import CaptureIndex
+from rf_survey.noise_floor import NoiseFloorTracker
+from rf_survey.occupancy import OccupancyAccumulator
+from rf_survey.ordering import ReorderBuffer
+from rf_survey.outbox import OutboxPublisher
+from rf_survey.processing import CaptureProcessor, ProcessedCapture
+from rf_survey.products import CaptureProduct, SweepProduct
 from rf_survey.receiver import Receiver
-from rf_survey.validators import ZmsReconfigurationParams
+from rf_survey.reconfiguration import ReconfigurationPlan, plan_reconfiguration
+from rf_survey.spool import CaptureSpool
+from rf_survey.sweep_spectrum import CompletedSweep, SweepStitcher
 from rf_survey.watchdog import ApplicationWatchdog
 from rf_survey.interfaces import IZmsMonitor, IMetrics
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_QUEUE_MAX_BYTES = 2 * 1024**3
+
+# A degraded capture shorter than this fraction of its length is dropped instead
+MIN_DEGRADED_FRACTION = 0.1
+
 
 class SurveyApp:
     """
@@ -32,6 +60,26 @@ class SurveyApp:
         watchdog: ApplicationWatchdog,
         zms_monitor: IZmsMonitor,
         metrics: IMetrics,
+        io_executor: Optional[Executor] = None,
+        processing_executor: Optional[Executor] = None,
+        processing_workers: int = 1,
+        checksum_method: Optional[ChecksumMethod] = None,
+        queue_max_bytes: int = DEFAULT_QUEUE_MAX_BYTES,
+        overflow_policy: OverflowPolicy = OverflowPolicy.SPILL,
+        spool: Optional[CaptureSpool] = None,
+        outbox_publisher: Optional[OutboxPublisher] = None,
+        publish_max_in_flight: int = 8,
+        processor: Optional[CaptureProcessor] = None,
+        products_producer: Optional[NatsProducer] = None,
+        products_publisher: Optional[OutboxPublisher] = None,
+        sweep_stitcher: Optional[SweepStitcher] = None,
+        noise_floor: Optional[NoiseFloorTracker] = None,
+        noise_floor_snapshot_sec: float = 300.0,
+        occupancy: Optional[OccupancyAccumulator] = None,
+        occupancy_dump_dir: Optional[Path] = None,
+        occupancy_dump_sec: float = 60.0,
+        capture_index: Optional[CaptureIndex] = None,
+        index_flush_sec: float = 5.0,
     ):
         self.app_info = app_info
 
@@ -45,9 +93,68 @@ class SurveyApp:
         self._reconfigure_event = asyncio.Event()
         self._active_sweep_task: Optional[asyncio.Task] = None
 
+        # Changes handed to the running sweep, applied between captures
+        self._pending_changes: Optional[ReconfigurationPlan] = None
+        self._pending_changes_applied: Optional[asyncio.Future] = None
+
         self.metrics = metrics
 
-        self._processing_queue = asyncio.Queue(maxsize=8)
+        # Spills, serialization and state saves, kept off the receiver's hardware thread
+        self.io_executor = io_executor
+        # Capture processing runs on its own threads, so a spill never
+        # waits behind the workers it is relieving
+        self.processing_executor = processing_executor
+        self.checksum_method = checksum_method or ChecksumMethod()
+
+        if overflow_policy is OverflowPolicy.SPILL and spool is None:
+            raise ValueError("The spill overflow policy requires a spool")
+
+        # Buffers the next capture leases, one per record of a continuous dwell
+        self._buffers_per_capture = sweep_config.records_per_capture
+        # Bounded by the IQ bytes held in memory and by the buffers the next
+        # capture needs, spooled captures take no room
+        self._processing_queue: ByteBudgetQueue[ProcessingJob] = ByteBudgetQueue(
+            max_bytes=queue_max_bytes,
+            size_of=lambda job: job.raw_capture.resident_bytes,
+            buffers_available=self._buffers_for_next_capture,
+        )
+        self.overflow_policy = overflow_policy
+        # Also holds unprocessed captures across restarts
+        self.spool = spool
+
+        # Records go through a durable outbox when set, else straight to NATS
+        self.outbox_publisher = outbox_publisher
+        # Direct publishes outstanding at once, the outbox has its own window
+        self._publish_slots = asyncio.Semaphore(publish_max_in_flight)
+        self._publishes_in_flight: Set[asyncio.Task] = set()
+
+        self.processor = processor or CaptureProcessor(
+            app_info, metrics, self.checksum_method
+        )
+
+        # Derived products have their own subject and outbox
+        self.products_producer = products_producer
+        self.products_publisher = products_publisher
+        # Fed in capture order by the publish stage
+        self.sweep_stitcher = sweep_stitcher
+        # Updated by the processor, snapshotted here
+        self.noise_floor = noise_floor
+        self.noise_floor_snapshot_sec = noise_floor_snapshot_sec
+        self.occupancy = occupancy
+        # Where the dashboard arrays are written
+        self.occupancy_dump_dir = occupancy_dump_dir
+        self.occupancy_dump_sec = occupancy_dump_sec
+        # Filled by the processor in batches, flushed here when they stay partial
+        self.capture_index = capture_index
+        self.index_flush_sec = index_flush_sec
+        self.processing_workers = processing_workers
+
+        # Workers finish out of order, the publish stage restores capture order
+        self._next_sequence = 0
+        self._publish_order: ReorderBuffer[ProcessedCapture] = ReorderBuffer()
+        self._publish_queue: asyncio.Queue[Tuple[int, Optional[ProcessedCapture]]] = (
+            asyncio.Queue()
+        )
 
     async def start_survey(self):
         """Signals the survey runner to start and resumes the watchdog."""
@@ -69,15 +176,44 @@ class SurveyApp:
             self.receiver.initialize()
             # Store for metadata creation
             self.serial = self.receiver.serial
+            self.processor.serial = self.serial
             await self.producer.connect()
+            if self.products_producer is not None:
+                await self.products_producer.connect()
+            await self._remove_partial_files()
+            await self._recover_spooled_jobs()
 
             async with asyncio.TaskGroup() as tg:
                 tg.create_task(self._survey_runner())
-                tg.create_task(self._processing_worker())
+                for worker_id in range(self.processing_workers):
+                    tg.create_task(self._processing_worker(worker_id))
+                tg.create_task(self._publish_stage())
                 tg.create_task(self.zms_monitor.run())
                 tg.create_task(self.watchdog.run())
                 tg.create_task(self._health_monitor())
                 tg.create_task(self.metrics.run())
+                if self.outbox_publisher is not None:
+                    tg.create_task(self.outbox_publisher.run())
+                if self.products_publisher is not None:
+                    tg.create_task(self.products_publisher.run())
+                if self.noise_floor is not None:
+                    tg.create_task(
+                        self._periodic_snapshots(
+                            self.noise_floor.save, self.noise_floor_snapshot_sec
+                        )
+                    )
+                if self.occupancy is not None:
+                    tg.create_task(
+                        self._periodic_snapshots(
+                            self._save_occupancy, self.occupancy_dump_sec
+                        )
+                    )
+                if self.capture_index is not None:
+                    tg.create_task(
+                        self._periodic_snapshots(
+                            self.capture_index.flush, self.index_flush_sec
+                        )
+                    )
 
         except asyncio.CancelledError:
             logger.info("Main application task cancelled. Shutting down gracefully.")
@@ -87,7 +223,23 @@ class SurveyApp:
 
         finally:
             logger.info("Cleaning up resources...")
+            await self._persist_unprocessed_jobs()
+            await self._save_tuning_cache()
+            if self.noise_floor is not None:
+                await self._save_snapshot(self.noise_floor.save)
+            if self.occupancy is not None:
+                await self._save_snapshot(self._save_occupancy)
+            if self.processor.container is not None:
+                await self._save_snapshot(self.processor.container.close)
+            if self.capture_index is not None:
+                await self._save_snapshot(self.capture_index.close)
             await self.producer.close()
+            if self.products_producer is not None:
+                await self.products_producer.close()
+            if self.outbox_publisher is not None:
+                self.outbox_publisher.outbox.close()
+            if self.products_publisher is not None:
+                self.products_publisher.outbox.close()
             logger.info("Shutdown complete.")
 
     async def _survey_runner(self):
@@ -95,11 +247,12 @@ class SurveyApp:
         A supervisor loop that manages the lifecycle of the sweep task.
 
         It waits for the application to be in a "running" state, then starts
-        a sweep as a cancellable sub-task. If a pause or reconfiguration
-        command is received, the `apply_zms_reconfiguration` method will cancel
-        the active sweep task, and this loop will gracefully handle the
-        cancellation and then re-evaluate the application's state (e.g.,
-        it will pause if the running event has been cleared).
+        a sweep as a cancellable sub-task. If a pause command is received, the
+        `apply_zms_reconfiguration` method will stop the active sweep task, and
+        this loop will gracefully handle it and then re-evaluate the
+        application's state (e.g., it will pause if the running event has been
+        cleared). A sweep that exits early to pick up a new sweep configuration
+        is restarted without counting as a cycle.
         """
 
         logger.info("Survey runner supervisor started.")
@@ -118,6 +271,7 @@ class SurveyApp:
                 await self._running_event.wait()
                 # Reset reconfigure event
                 self._reconfigure_event.clear()
+                self.receiver.clear_abort()
 
                 logger.debug("Starting a new sweep task.")
                 sweep_config_snapshot = deepcopy(self.sweep_config)
@@ -136,7 +290,11 @@ class SurveyApp:
                     )
 
                     try:
-                        await self.receiver.reconfigure(self.receiver.config)
+                        reset_start = time.monotonic()
+                        await self.receiver.reset()
+                        self.metrics.observe_receiver_reconfiguration(
+                            time.monotonic() - reset_start, full_reset=True
+                        )
                         logger.info("Receiver re-initialized successfully.")
                         logger.info("Cooling down for 3 seconds...")
                         await asyncio.sleep(3.0)
@@ -148,8 +306,11 @@ class SurveyApp:
                         raise
 
                 else:
-                    cycles_run += 1
-                    logger.debug("Sweep task completed successfully.")
+                    if self._active_sweep_task.result():
+                        cycles_run += 1
+                        logger.debug("Sweep task completed successfully.")
+
+                await self._save_tuning_cache()
 
         except asyncio.CancelledError:
             logger.info("Survey runner supervisor task was cancelled. Shutting down.")
@@ -162,65 +323,289 @@ class SurveyApp:
         finally:
             if self._active_sweep_task and not self._active_sweep_task.done():
                 self._active_sweep_task.cancel()
+            if (
+                self._pending_changes_applied
+                and not self._pending_changes_applied.done()
+            ):
+                self._pending_changes_applied.set_exception(
+                    RuntimeError("Survey stopped before the configuration was applied")
+                )
             logger.info("Survey runner supervisor has shut down.")
 
-    async def _perform_sweep(self, sweep_config: SweepConfig):
+    async def _perform_sweep(self, sweep_config: SweepConfig) -> bool:
         """
         Performs a single sweep across the specified frequency range.
+        Returns True if every step was captured, False if the sweep exited early.
         """
         center_hz = sweep_config.start_hz
         end_hz = sweep_config.end_hz
         step_hz = sweep_config.step_hz
+        sweep_id = uuid4().hex
+        step_index = 0
+
+        # In a continuous dwell all records of a step come from one stream,
+        # so there is a single scheduled capture per step
+        records_per_capture = sweep_config.records_per_capture
+        continuous_dwell = records_per_capture > 1
+        self._buffers_per_capture = records_per_capture
+        captures_per_step = 1 if continuous_dwell else sweep_config.records_per_step
 
         while center_hz <= end_hz:
-            for _ in range(sweep_config.records_per_step):
+            for capture_index in range(captures_per_step):
+                if await self._apply_pending_changes():
+                    logger.info(
+                        "Sweep configuration changed. Restarting sweep with the new configuration."
+                    )
+                    return False
+
                 if self._reconfigure_event.is_set():
                     logger.info(
                         "Reconfigure detected pre-capture. Gracefully exiting sweep."
                     )
-                    return
+                    return False
 
                 wait_duration = sweep_config.next_collection_wait_duration()
-                await self._wait_until_next_collection(wait_duration)
+                scheduled_start = time.time() + wait_duration
+
+                # Tune while waiting so the LO is locked when the interval fires
+                await asyncio.gather(
+                    self._wait_until_next_collection(wait_duration),
+                    self.receiver.prepare_frequency(center_hz),
+                )
 
                 if self._reconfigure_event.is_set():
                     logger.info(
                         "Reconfigure detected post-wait. Gracefully exiting sweep."
                     )
-                    return
+                    return False
 
                 # Get the samples from receiver
                 # The config is guaranteed to be what ever the capture was configured with
                 # due to internal locking
-                capture_result = await self.receiver.receive_samples(center_hz)
+                try:
+                    if continuous_dwell:
+                        capture_results = await self.receiver.receive_records(
+                            center_hz, sweep_config.records_per_step
+                        )
+                    else:
+                        capture_results = [
+                            await self.receiver.receive_samples(center_hz)
+                        ]
+                except CaptureAbortedError:
+                    logger.info(
+                        "Capture aborted for reconfiguration. Gracefully exiting sweep."
+                    )
+                    return False
+                except BufferPoolExhaustedError as e:
+                    # Nothing was captured, so there is nothing to spill
+                    logger.error(f"{e} The system is backlogged. Dropping capture.")
+                    for _ in range(records_per_capture):
+                        self.metrics.increment_captures_dropped("buffer_pool")
+                    await self.watchdog.pet("sdr_data_loop")
+                    continue
+                finally:
+                    self._update_buffer_pool_metrics()
+
+                await self.watchdog.pet("sdr_data_loop")
 
-                # Create a processing job
-                job = ProcessingJob(
-                    raw_capture=capture_result.raw_capture,
-                    receiver_config_snapshot=capture_result.receiver_config,
-                    sweep_config_snapshot=sweep_config,
+                # The pool ran out partway through a continuous dwell
+                for _ in range(records_per_capture - len(capture_results)):
+                    self.metrics.increment_captures_dropped("buffer_pool")
+
+                first_capture = capture_results[0].raw_capture
+                self.metrics.observe_capture_start_lateness(
+                    first_capture.capture_timestamp.timestamp() - scheduled_start
                 )
 
-                await self.watchdog.pet("sdr_data_loop")
+                for record_offset, capture_result in enumerate(capture_results):
+                    position = SweepPosition(
+                        sweep_id=sweep_id,
+                        step_index=step_index,
+                        step_count=sweep_config.num_steps,
+                        record_index=capture_index + record_offset,
+                        records_per_step=sweep_config.records_per_step,
+                    )
+                    await self._queue_capture(capture_result, sweep_config, position)
+
+            center_hz += step_hz
+            step_index += 1
 
+        return True
+
+    async def _queue_capture(
+        self,
+        capture_result: CaptureResult,
+        sweep_config: SweepConfig,
+        position: Optional[SweepPosition] = None,
+    ) -> None:
+        """
+        Hands a finished capture to the processing workers, applying the
+        overflow policy if they are too far behind.
+        """
+        # Create a processing job
+        job = ProcessingJob(
+            raw_capture=capture_result.raw_capture,
+            receiver_config_snapshot=capture_result.receiver_config,
+            sweep_config_snapshot=sweep_config,
+            sequence=self._next_sequence,
+            sweep_position=position,
+        )
+        self._next_sequence += 1
+
+        queue = self._processing_queue
+        size = job.raw_capture.resident_bytes
+
+        if queue.has_room(size):
+            queue.put_nowait(job)
+            logger.debug("Successfully queued capture job for processing.")
+            return
+
+        policy = self.overflow_policy
+        pool = self.receiver.buffer_pool
+        logger.warning(
+            f"Processing queue is full ({queue.nbytes} bytes, {pool.in_use} of "
+            f"{pool.capacity} buffers in use), applying the {policy.value} policy."
+        )
+
+        if policy is OverflowPolicy.BLOCK:
+            while True:
                 try:
-                    # Send job to processing task
-                    await asyncio.wait_for(self._processing_queue.put(job), timeout=1.0)
-                    logger.debug("Successfully queued capture job for processing.")
+                    await asyncio.wait_for(queue.put(job), timeout=1.0)
+                    return
                 except asyncio.TimeoutError:
-                    logger.error(
-                        "Processing queue is full! The system is backlogged. Dropping capture."
-                    )
-                    continue
+                    # Waiting on processing is intended here, not a stalled sweep
+                    await self.watchdog.pet("sdr_data_loop")
 
-            center_hz += step_hz
+        elif policy is OverflowPolicy.DROP_OLDEST:
+            while not queue.has_room(size):
+                oldest = queue.pop_oldest_sized()
+                if oldest is None:
+                    break
+                await self._drop_job(oldest, policy.value)
+            queue.put_nowait(job)
+
+        elif policy is OverflowPolicy.DROP_NEWEST:
+            await self._drop_job(job, policy.value)
+
+        elif policy is OverflowPolicy.DEGRADE:
+            # Truncating a capture does not return its buffer to the pool
+            if queue.has_buffer_room(size) and self._degrade_job(job, queue.free_bytes):
+                self.metrics.increment_captures_degraded()
+                queue.put_nowait(job)
+            else:
+                await self._drop_job(job, policy.value)
+
+        elif policy is OverflowPolicy.SPILL:
+            loop = asyncio.get_running_loop()
+            try:
+                spilled_job = await loop.run_in_executor(
+                    self.io_executor, self.spool.spill, job
+                )
+            except Exception as e:
+                logger.error(f"Failed to spill capture: {e}", exc_info=True)
+                await self._drop_job(job, "spill_failed")
+                return
+
+            self.metrics.increment_captures_spilled()
+            self._update_buffer_pool_metrics()
+            queue.put_nowait(spilled_job)
+
+    async def _drop_job(self, job: ProcessingJob, reason: str) -> None:
+        logger.error(
+            f"Dropping capture at {job.raw_capture.center_freq_hz} Hz ({reason})."
+        )
+        job.raw_capture.discard()
+        self.metrics.increment_captures_dropped(reason)
+        self._update_buffer_pool_metrics()
+        self._queue_for_publish(job.sequence, None)
+
+    def _degrade_job(self, job: ProcessingJob, free_bytes: int) -> bool:
+        """
+        Truncates the capture to the free space in the queue. Returns False if
+        too little of it would be left to be worth keeping.
+        """
+        raw_capture = job.raw_capture
+        total_samples = raw_capture.iq_data.size
+        keep_samples = min(total_samples, free_bytes // raw_capture.iq_data.itemsize)
+        if keep_samples < total_samples * MIN_DEGRADED_FRACTION:
+            return False
+
+        raw_capture.iq_data = raw_capture.iq_data[:keep_samples]
+        # Keep the metadata truthful about what was recorded
+        receiver_config = job.receiver_config_snapshot
+        job.receiver_config_snapshot = receiver_config.model_copy(
+            update={"duration_sec": keep_samples / receiver_config.bandwidth_hz}
+        )
+        logger.warning(
+            f"Capture at {raw_capture.center_freq_hz} Hz truncated to {keep_samples} of {total_samples} samples."
+        )
+        return True
+
+    async def _remove_partial_files(self) -> None:
+        """Deletes the captures a previous run was streaming when it stopped."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self.io_executor, remove_partial_files, self.app_info.output_path
+        )
+
+    async def _recover_spooled_jobs(self) -> None:
+        """Queues the captures a previous run left unprocessed in the spool."""
+        if self.spool is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        jobs = await loop.run_in_executor(
+            self.io_executor, self.spool.recover, self._next_sequence
+        )
+        self._next_sequence += len(jobs)
+        for job in jobs:
+            self._processing_queue.put_nowait(job)
+
+        if jobs:
+            logger.info(
+                f"Recovered {len(jobs)} unprocessed captures from {self.spool.directory}."
+            )
 
-    async def _processing_worker(self):
+    async def _persist_unprocessed_jobs(self) -> None:
+        """
+        Moves the captures still in the queue to the spool so the next run
+        processes them. Without a spool they are processed before exiting.
+        """
+        queue = self._processing_queue
+        if queue.empty():
+            return
+
+        if self.spool is None:
+            logger.info(f"Draining {queue.qsize()} remaining jobs...")
+            while not queue.empty():
+                await self._process_single_job(queue.get_nowait())
+            # The publish stage has already stopped
+            await self._flush_publish_queue()
+            return
+
+        logger.info(
+            f"Persisting {queue.qsize()} unprocessed jobs to {self.spool.directory}..."
+        )
+        loop = asyncio.get_running_loop()
+        while not queue.empty():
+            job = queue.get_nowait()
+            if isinstance(job.raw_capture.capture_file, SpooledCaptureFile):
+                # Already in the spool
+                job.raw_capture.release()
+                continue
+
+            try:
+                await loop.run_in_executor(self.io_executor, self.spool.spill, job)
+            except Exception as e:
+                logger.error(f"Failed to persist capture job: {e}", exc_info=True)
+
+    async def _processing_worker(self, worker_id: int):
         """
         A consumer task that pulls capture jobs from a queue and
-        processes them.
+        processes them. Several workers share the queue.
         """
-        logger.info("Processing worker started.")
+        watchdog_source = f"app_worker_loop_{worker_id}"
+        logger.info(f"Processing worker {worker_id} started.")
 
         try:
             while True:
@@ -229,107 +614,223 @@ class SurveyApp:
                     job = await asyncio.wait_for(
                         self._processing_queue.get(), timeout=1.0
                     )
+                    self.metrics.observe_stage_latency(
+                        "queue", time.monotonic() - job.created_at
+                    )
                     # Process the job
                     await self._process_single_job(job)
-                    await self.watchdog.pet("app_worker_loop")
+                    await self.watchdog.pet(watchdog_source)
 
                 except asyncio.TimeoutError:
-                    await self.watchdog.pet("app_worker_loop")
+                    await self.watchdog.pet(watchdog_source)
                     continue
 
         except asyncio.CancelledError:
-            logger.info("Processing worker task cancelled.")
+            logger.info(f"Processing worker {worker_id} task cancelled.")
 
         finally:
-            logger.info(
-                f"Processing worker shutting down. Draining {self._processing_queue.qsize()} remaining jobs..."
-            )
-            # Drain the remaining jobs... Might be overkill
-            while not self._processing_queue.empty():
-                job = self._processing_queue.get_nowait()
-                logger.info("Processing one final job before exit...")
-                await self._process_single_job(job)
-
-            logger.info("Processing queue is empty. Worker finished.")
+            # Jobs left in the queue are persisted by run() on the way out
+            logger.info(f"Processing worker {worker_id} finished.")
 
     async def _process_single_job(self, job: ProcessingJob):
         """
         Helper function to process one job.
         """
+        processed = None
         try:
             logger.debug(
                 f"Processing job for capture at {job.raw_capture.center_freq_hz} Hz..."
             )
 
-            metadata_record = await self._process_capture_job(job)
-            await self.publish_metadata(metadata_record)
+            process_start = time.monotonic()
+            processed = await self._process_capture_job(job)
+            self.metrics.observe_stage_latency(
+                "process", time.monotonic() - process_start
+            )
 
             logger.debug("Processing job finished successfully.")
 
         except Exception as e:
             logger.error(f"Failed to process capture job: {e}", exc_info=True)
 
-    async def _process_capture_job(self, job: ProcessingJob) -> MetadataRecord:
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._process_capture_job_blocking, job)
-
-    def _process_capture_job_blocking(self, job: ProcessingJob) -> MetadataRecord:
+        finally:
+            # Failed jobs still release their sequence number so later
+            # records are not held back
+            self._queue_for_publish(job.sequence, processed)
+            # The capture's buffer is back in the pool
+            self._processing_queue.capacity_changed()
+
+    def _queue_for_publish(
+        self, sequence: int, processed: Optional[ProcessedCapture]
+    ) -> None:
         """
-        This function takes a complete ProcessingJob,
-        performs blocking I/O (saving the file), checksumming
-        and returns a final MetadataRecord.
+        Hands the outcome of a capture to the publish stage. None marks a
+        capture without records, e.g. one that failed or was dropped.
         """
+        self._publish_queue.put_nowait((sequence, processed))
 
-        raw_capture = job.raw_capture
-        receiver_config = job.receiver_config_snapshot
-        sweep_config = job.sweep_config_snapshot
+    async def _publish_stage(self):
+        """
+        Publishes records in capture order as the workers finish them, so
+        network latency never holds up a worker.
+        """
+        logger.info("Publish stage started.")
+        try:
+            while True:
+                sequence, processed = await self._publish_queue.get()
+                for ready in self._publish_order.complete(sequence, processed):
+                    await self._publish_record(ready)
 
-        timestamp_str = raw_capture.capture_timestamp.strftime("D%Y%m%dT%H%M%SM%f")
+        except asyncio.CancelledError:
+            logger.info("Publish stage task cancelled.")
 
-        filename = f"{self.serial}-{self.app_info.hostname}-{timestamp_str}.sc16"
-        file_path = self.app_info.output_path / filename
+        finally:
+            await self._flush_publish_queue()
+            logger.info("Publish stage finished.")
 
+    async def _flush_publish_queue(self) -> None:
+        """
+        Publishes everything handed to the publish stage. Every record refers
+        to a file on disk, so they are published even if an earlier capture
+        never finished.
+        """
+        while not self._publish_queue.empty():
+            sequence, processed = self._publish_queue.get_nowait()
+            for ready in self._publish_order.complete(sequence, processed):
+                await self._publish_record(ready)
+        for ready in self._publish_order.drain():
+            await self._publish_record(ready)
+
+        if self.sweep_stitcher is not None:
+            # The sweep in progress is published as incomplete
+            unfinished = self.sweep_stitcher.flush()
+            if unfinished is not None:
+                await self._publish_sweep(unfinished)
+
+        if self._publishes_in_flight:
+            await asyncio.gather(*self._publishes_in_flight)
+
+    async def _publish_record(self, processed: ProcessedCapture) -> None:
         try:
-            with open(file_path, "wb") as f:
-                f.write(raw_capture.iq_data_bytes)
-            logger.debug(f"File stored as {file_path}")
-        except IOError as e:
-            logger.error(f"Failed to write capture file to disk: {e}", exc_info=True)
-            raise
+            if processed.metadata is not None:
+                await self.publish_metadata(processed.metadata)
+            if processed.product is not None:
+                await self.publish_product(processed.product)
+        except Exception as e:
+            logger.error(f"Failed to publish metadata: {e}", exc_info=True)
 
-        file_checksum = get_checksum(raw_capture.iq_data_bytes)
-        logger.debug(f"Calculated checksum: {file_checksum}")
-
-        metadata_record = MetadataRecord(
-            # Static application info
-            hostname=self.app_info.hostname,
-            organization=self.app_info.organization,
-            gcs=self.app_info.coordinates,
-            group=self.app_info.group,
-            # this is pulled after initial initalize
-            serial=self.serial,
-            bit_depth=16,
-            # Configuration context from the snapshots
-            interval=sweep_config.interval_sec,
-            length=receiver_config.duration_sec,
-            gain=receiver_config.gain_db,
-            sampling_rate=receiver_config.bandwidth_hz,
-            # Direct data from the capture itself
-            frequency=raw_capture.center_freq_hz,
-            timestamp=raw_capture.capture_timestamp,
-            # Data generated during this processing step
-            source_path=file_path,
-            checksum=file_checksum,
-        )
+        if self.sweep_stitcher is not None and processed.sweep_step is not None:
+            try:
+                finished = self.sweep_stitcher.add(processed.sweep_step)
+            except ValueError as e:
+                logger.error(f"Failed to stitch sweep spectrum: {e}")
+                return
+            for sweep in finished:
+                await self._publish_sweep(sweep)
+
+    async def _publish_sweep(self, sweep: CompletedSweep) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            product = await loop.run_in_executor(
+                self.processing_executor, self.processor.process_sweep, sweep
+            )
+            await self.publish_product(product)
+        except Exception as e:
+            logger.error(f"Failed to publish sweep spectrum: {e}", exc_info=True)
 
-        return metadata_record
+    async def _process_capture_job(self, job: ProcessingJob) -> ProcessedCapture:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self.processing_executor, self.processor.process, job
+            )
+        finally:
+            self._update_buffer_pool_metrics()
 
     async def publish_metadata(self, record: MetadataRecord) -> None:
         logger.info(f"Publishing metadata: {record}")
-        envelope = Envelope.from_metadata(record)
-        payload = envelope.model_dump_json().encode()
+        loop = asyncio.get_running_loop()
+
+        serialize_start = time.monotonic()
+        payload = await loop.run_in_executor(
+            self.io_executor, self._serialize_record, record
+        )
+        self.metrics.observe_stage_latency(
+            "serialize", time.monotonic() - serialize_start
+        )
+
+        if self.outbox_publisher is not None:
+            # Durable once appended, the publisher task delivers it
+            append_start = time.monotonic()
+            await self.outbox_publisher.append(payload)
+            self.metrics.observe_stage_latency(
+                "outbox_append", time.monotonic() - append_start
+            )
+            return
+
+        # Started in capture order, up to publish_max_in_flight outstanding
+        await self._publish_slots.acquire()
+        task = asyncio.create_task(self._publish_direct(payload))
+        self._publishes_in_flight.add(task)
+        task.add_done_callback(self._publishes_in_flight.discard)
+
+    async def _publish_direct(self, payload: bytes) -> None:
+        try:
+            publish_start = time.monotonic()
+            await self.producer.publish(payload)
+            self.metrics.observe_stage_throughput(
+                "publish", len(payload), time.monotonic() - publish_start
+            )
+        except Exception as e:
+            logger.error(f"Failed to publish metadata: {e}", exc_info=True)
+        finally:
+            self._publish_slots.release()
 
-        await self.producer.publish(payload)
+    async def publish_product(
+        self, product: Union[CaptureProduct, SweepProduct]
+    ) -> None:
+        if self.products_publisher is None:
+            return
+
+        logger.debug(f"Publishing {product.kind} product")
+        loop = asyncio.get_running_loop()
+        payload = await loop.run_in_executor(
+            self.io_executor, lambda: product.model_dump_json().encode()
+        )
+        await self.products_publisher.append(payload)
+
+    @staticmethod
+    def _serialize_record(record: MetadataRecord) -> bytes:
+        return Envelope.from_metadata(record).model_dump_json().encode()
+
+    async def _save_tuning_cache(self) -> None:
+        """Persists the measured tuning history so later runs tune faster."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.io_executor, self.receiver.tuning_cache.save)
+
+    def _save_occupancy(self) -> None:
+        self.occupancy.save()
+        if self.occupancy_dump_dir is not None:
+            self.occupancy.dump(self.occupancy_dump_dir)
+
+    async def _save_snapshot(self, save: Callable[[], None]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.io_executor, save)
+        except Exception as e:
+            logger.error(f"Failed to save snapshot: {e}", exc_info=True)
+
+    async def _periodic_snapshots(self, save: Callable[[], None], interval_sec: float):
+        """
+        Periodically persists accumulated state, e.g. the noise floor, so a
+        crash loses little of it.
+        """
+        try:
+            while True:
+                await asyncio.sleep(interval_sec)
+                await self._save_snapshot(save)
+        except asyncio.CancelledError:
+            logger.info("Snapshot task cancelled.")
 
     async def _wait_until_next_collection(self, wait_duration: float) -> None:
         logger.info(
@@ -341,56 +842,96 @@ class SurveyApp:
         self, status: MonitorStatus, params: Optional[Dict[str, Any]]
     ) -> None:
         """
-        Validates the raw ZMS parameters, then dispatches the configs
-        to the sub-components. This is a callback pased to ZMS Monitor task.
+        Validates the raw ZMS parameters and works out which components they
+        change. While the survey keeps running, changes are handed to the sweep
+        and applied between captures; only a transition to or from a paused
+        status stops the survey. This is a callback pased to ZMS Monitor task.
         Raises ValueError on validation failure.
         """
         logger.info(f"Validating and applying ZMS reconfiguration: {params}")
+        received_at = time.monotonic()
 
-        # Pause active surveys until we reconfigure
-        await self.pause_survey()
+        plan = plan_reconfiguration(
+            self.receiver.config,
+            self.sweep_config,
+            params,
+            pause=status == MonitorStatus.PAUSED,
+        )
 
-        logger.warning("Signaling active sweep to stop for reconfiguration.")
-        self._reconfigure_event.set()
+        if self._running_event.is_set() and not plan.pause:
+            if plan.has_changes:
+                await self._hand_over_to_sweep(plan)
+            else:
+                logger.info("Reconfiguration leaves the survey unchanged.")
 
-        if self._active_sweep_task and not self._active_sweep_task.done():
-            await self._active_sweep_task
+        else:
+            # Pause active surveys until we reconfigure
+            await self.pause_survey()
 
-        if params:
-            try:
-                validated_params = ZmsReconfigurationParams(**params)
+            logger.warning("Signaling active sweep to stop for reconfiguration.")
+            self._reconfigure_event.set()
+            # Don't wait for an in-flight capture to run to completion
+            self.receiver.abort_captures()
+
+            if self._active_sweep_task and not self._active_sweep_task.done():
+                await self._active_sweep_task
 
-            except ValidationError as e:
-                error_details = e.errors()
-                logger.error(f"ZMS parameter validation failed: {error_details}")
-                raise ValueError(f"Invalid parameters from ZMS: {error_details}") from e
+            await self._apply_plan(plan)
 
-            new_receiver_config = ReceiverConfig(
-                gain_db=validated_params.gain_db,
-                duration_sec=validated_params.duration_sec,
-                bandwidth_hz=validated_params.bandwidth_hz,
-            )
+            # Restart surveys if we were not told to pause
+            if not plan.pause:
+                await self.start_survey()
 
-            new_sweep_config = SweepConfig(
-                start_hz=validated_params.start_freq_hz,
-                end_hz=validated_params.end_freq_hz,
-                step_hz=validated_params.bandwidth_hz,
-                interval_sec=validated_params.sample_interval,
-                # Carry over values that are not set by ZMS
-                cycles=self.sweep_config.cycles,
-                records_per_step=self.sweep_config.records_per_step,
-                max_jitter_sec=self.sweep_config.max_jitter_sec,
-            )
+        self.metrics.observe_reconfiguration_apply(time.monotonic() - received_at)
 
-            await self.receiver.reconfigure(new_receiver_config)
-            self.sweep_config = new_sweep_config
+    async def _hand_over_to_sweep(self, plan: ReconfigurationPlan) -> None:
+        """
+        Queues changes for the running sweep and waits until it has applied
+        them at its next capture boundary.
+        """
+        if self._active_sweep_task is None or self._active_sweep_task.done():
+            await self._apply_plan(plan)
+            return
 
-            self.metrics.update_receiver_config(new_receiver_config)
-            self.metrics.update_sweep_config(new_sweep_config)
+        logger.info("Handing reconfiguration to the running sweep.")
+        self._pending_changes = plan
+        self._pending_changes_applied = asyncio.get_running_loop().create_future()
+        await self._pending_changes_applied
 
-        # Restart surveys if we were not told to pause
-        if status != MonitorStatus.PAUSED:
-            await self.start_survey()
+    async def _apply_pending_changes(self) -> bool:
+        """
+        Applies changes handed over by apply_zms_reconfiguration, if any.
+        Returns True if the sweep configuration changed.
+        """
+        plan = self._pending_changes
+        applied = self._pending_changes_applied
+        if plan is None or applied is None:
+            return False
+
+        self._pending_changes = None
+        self._pending_changes_applied = None
+
+        try:
+            await self._apply_plan(plan)
+        except Exception as e:
+            applied.set_exception(e)
+            raise
+
+        applied.set_result(None)
+        return plan.sweep_config is not None
+
+    async def _apply_plan(self, plan: ReconfigurationPlan) -> None:
+        if plan.receiver_config is not None:
+            reconfigure_start = time.monotonic()
+            full_reset = await self.receiver.reconfigure(plan.receiver_config)
+            self.metrics.observe_receiver_reconfiguration(
+                time.monotonic() - reconfigure_start, full_reset
+            )
+            self.metrics.update_receiver_config(plan.receiver_config)
+
+        if plan.sweep_config is not None:
+            self.sweep_config = plan.sweep_config
+            self.metrics.update_sweep_config(plan.sweep_config)
 
     async def _health_monitor(self):
         """
@@ -406,10 +947,37 @@ class SurveyApp:
                 if temp is not None:
                     self.metrics.update_temperature(temp)
 
-                queue_size = self._processing_queue.qsize()
-                self.metrics.update_queue_size(queue_size)
+                self.metrics.update_queue_size(
+                    self._processing_queue.qsize(), self._processing_queue.nbytes
+                )
+
+                self._update_buffer_pool_metrics()
+                self._update_executor_metrics()
 
-                logger.debug("Polled metrics updated (temp, queue).")
+                logger.debug(
+                    "Polled metrics updated (temp, queue, buffers, executors)."
+                )
 
         except asyncio.CancelledError:
             logger.info("Health monitor was cancelled.")
+
+    def _buffers_for_next_capture(self) -> bool:
+        """Whether the buffer pool can still serve the next capture."""
+        pool = self.receiver.buffer_pool
+        return pool.capacity - pool.in_use >= self._buffers_per_capture
+
+    def _update_buffer_pool_metrics(self) -> None:
+        pool = self.receiver.buffer_pool
+        self.metrics.update_buffer_pool(pool.in_use, pool.capacity)
+
+    def _update_executor_metrics(self) -> None:
+        for executor in (
+            self.receiver.executor,
+            self.io_executor,
+            self.processing_executor,
+            self.checksum_method.tree_executor,
+        ):
+            if isinstance(executor, InstrumentedThreadPoolExecutor):
+                self.metrics.update_executor(
+                    executor.name, executor.queue_depth, executor.active_threads
+                )
@@ -1,10 +1,27 @@
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Optional
+
 from rf_shared.nats_client import NatsProducer
 
 from rf_survey.app import SurveyApp
+from rf_survey.capture_index import CaptureIndex
 from rf_survey.config import AppSettings
+from rf_survey.compression import CompressionConfig
+from rf_survey.container import ContainerWriter
+from rf_survey.hashing import ChecksumMethod
 from rf_survey.metrics import Metrics, NullMetrics
+from rf_survey.noise_floor import NoiseFloorConfig, NoiseFloorTracker
+from rf_survey.occupancy import OccupancyAccumulator, OccupancyConfig
 from rf_survey.models import SweepConfig, ApplicationInfo
 from rf_survey.receiver import Receiver
+from rf_survey.outbox import OutboxPublisher, SegmentOutbox
+from rf_survey.processing import CaptureProcessor
+from rf_survey.spectrum import WelchConfig
+from rf_survey.spool import CaptureSpool
+from rf_survey.storage_layout import StorageLayout
+from rf_survey.sweep_spectrum import SweepStitcher
+from rf_survey.triage import CaptureTriage, TriageConfig
 from rf_survey.monitor import NullZmsMonitor
 from rf_survey.watchdog import ApplicationWatchdog
 from rf_survey.monitor_factory import initialize_zms_monitor
@@ -19,6 +36,10 @@ class SurveyAppBuilder:
         receiver: Receiver,
         producer: NatsProducer,
         watchdog: ApplicationWatchdog,
+        io_executor: Optional[Executor] = None,
+        processing_executor: Optional[Executor] = None,
+        checksum_method: Optional[ChecksumMethod] = None,
+        products_producer: Optional[NatsProducer] = None,
     ):
         self.app_info = app_info
         self.settings = settings
@@ -26,6 +47,10 @@ class SurveyAppBuilder:
         self.receiver = receiver
         self.producer = producer
         self.watchdog = watchdog
+        self.io_executor = io_executor
+        self.processing_executor = processing_executor
+        self.checksum_method = checksum_method
+        self.products_producer = products_producer
         self.metrics = NullMetrics()
         self.zms_monitor = NullZmsMonitor()
         self._zms_enabled = False
@@ -39,6 +64,134 @@ class SurveyAppBuilder:
         return self
 
     async def build(self) -> SurveyApp:
+        checksum_method = self.checksum_method or ChecksumMethod()
+        spool_dir = (
+            Path(self.settings.SPOOL_PATH)
+            if self.settings.SPOOL_PATH
+            else self.app_info.output_path / ".spool"
+        )
+
+        outbox_dir = (
+            Path(self.settings.OUTBOX_PATH)
+            if self.settings.OUTBOX_PATH
+            else self.app_info.output_path / ".outbox"
+        )
+        outbox_publisher = self._build_outbox_publisher(outbox_dir, self.producer)
+
+        products_publisher = None
+        if self.products_producer is not None:
+            products_publisher = self._build_outbox_publisher(
+                outbox_dir.with_name(outbox_dir.name + "-products"),
+                self.products_producer,
+            )
+
+        spectrum_config = None
+        if self.settings.PSD_ENABLED:
+            spectrum_config = WelchConfig(
+                fft_size=self.settings.PSD_FFT_SIZE,
+                window=self.settings.PSD_WINDOW,
+                overlap=self.settings.PSD_OVERLAP,
+                average=self.settings.PSD_AVERAGE,
+                max_segments=self.settings.PSD_MAX_SEGMENTS,
+            )
+
+        sweep_stitcher = None
+        if self.settings.SWEEP_SPECTRUM_ENABLED:
+            if spectrum_config is None:
+                raise ValueError("The sweep spectrum requires the PSD stage")
+            sweep_stitcher = SweepStitcher(self.settings.SWEEP_USABLE_BANDWIDTH)
+
+        triage = None
+        if self.settings.TRIAGE_ENABLED:
+            triage = CaptureTriage(
+                TriageConfig(
+                    quiet_action=self.settings.TRIAGE_QUIET_ACTION,
+                    excerpt_samples=self.settings.TRIAGE_EXCERPT_SAMPLES,
+                    change_threshold=self.settings.TRIAGE_CHANGE_THRESHOLD,
+                    max_clipped_samples=self.settings.TRIAGE_MAX_CLIPPED_SAMPLES,
+                    warmup_captures=self.settings.TRIAGE_WARMUP_CAPTURES,
+                    baseline_alpha=self.settings.TRIAGE_BASELINE_ALPHA,
+                )
+            )
+
+        noise_floor = None
+        if self.settings.NOISE_FLOOR_ENABLED:
+            noise_floor = self._build_noise_floor_tracker()
+            if (
+                spectrum_config
+                and spectrum_config.fft_size < noise_floor.config.bins_per_step
+            ):
+                raise ValueError("RF_NOISE_FLOOR_BINS cannot exceed RF_PSD_FFT_SIZE")
+
+        occupancy = None
+        if self.settings.OCCUPANCY_ENABLED:
+            occupancy = self._build_occupancy_accumulator()
+
+        capture_index = None
+        if self.settings.INDEX_ENABLED:
+            capture_index = CaptureIndex(
+                self.settings.index_path, batch_size=self.settings.INDEX_BATCH_SIZE
+            )
+            # SQLite queries block, they run on the I/O threads
+            self.metrics.add_json_route(
+                "/captures", capture_index.query_params, self.io_executor
+            )
+
+        container = None
+        if self.settings.CONTAINER_ENABLED:
+            container = ContainerWriter(
+                checksum_method=checksum_method,
+                segment_bytes=self.settings.CONTAINER_SEGMENT_BYTES,
+                segment_sec=self.settings.CONTAINER_SEGMENT_SEC,
+                capacity=self.settings.CONTAINER_SEGMENT_CAPTURES,
+            )
+
+        compression = None
+        if self.settings.COMPRESSION_ENABLED:
+            if container is not None:
+                raise ValueError(
+                    "RF_COMPRESSION_ENABLED cannot be combined with RF_CONTAINER_ENABLED"
+                )
+            compression = CompressionConfig(
+                codec=self.settings.COMPRESSION_CODEC,
+                level=self.settings.COMPRESSION_LEVEL,
+                delta=self.settings.COMPRESSION_DELTA,
+                shuffle=self.settings.COMPRESSION_SHUFFLE,
+                block_samples=self.settings.COMPRESSION_BLOCK_SAMPLES,
+            )
+
+        pack_sc12 = self.settings.SAMPLE_FORMAT == "sc12"
+        if pack_sc12 and (container is not None or compression is not None):
+            raise ValueError(
+                "RF_SAMPLE_FORMAT=sc12 cannot be combined with RF_CONTAINER_ENABLED "
+                "or RF_COMPRESSION_ENABLED"
+            )
+
+        processor = CaptureProcessor(
+            app_info=self.app_info,
+            metrics=self.metrics,
+            checksum_method=checksum_method,
+            spectrum_config=spectrum_config,
+            store_iq=self.settings.STORE_IQ,
+            triage=triage,
+            signal_stats=self.settings.SIGNAL_STATS_ENABLED,
+            stats_band_width_hz=self.settings.STATS_BAND_WIDTH_HZ,
+            noise_floor=noise_floor,
+            occupancy=occupancy,
+            occupancy_config=OccupancyConfig(
+                threshold_db=self.settings.OCCUPANCY_THRESHOLD_DB
+            ),
+            capture_index=capture_index,
+            layout=StorageLayout(
+                self.app_info.output_path,
+                self.settings.STORAGE_LAYOUT,
+                self.settings.STORAGE_BAND_WIDTH_HZ,
+            ),
+            container=container,
+            compression=compression,
+            pack_sc12=pack_sc12,
+        )
+
         app = SurveyApp(
             app_info=self.app_info,
             sweep_config=self.sweep_config,
@@ -47,6 +200,30 @@ class SurveyAppBuilder:
             watchdog=self.watchdog,
             zms_monitor=self.zms_monitor,
             metrics=self.metrics,
+            io_executor=self.io_executor,
+            processing_executor=self.processing_executor,
+            processing_workers=self.settings.PROCESSING_WORKERS,
+            checksum_method=checksum_method,
+            queue_max_bytes=self.settings.QUEUE_MAX_BYTES,
+            overflow_policy=self.settings.QUEUE_OVERFLOW_POLICY,
+            spool=CaptureSpool(spool_dir, checksum_method),
+            outbox_publisher=outbox_publisher,
+            publish_max_in_flight=self.settings.PUBLISH_MAX_IN_FLIGHT,
+            processor=processor,
+            products_producer=self.products_producer,
+            products_publisher=products_publisher,
+            sweep_stitcher=sweep_stitcher,
+            noise_floor=noise_floor,
+            noise_floor_snapshot_sec=self.settings.NOISE_FLOOR_SNAPSHOT_SEC,
+            occupancy=occupancy,
+            occupancy_dump_dir=(
+                Path(self.settings.OCCUPANCY_DUMP_PATH)
+                if self.settings.OCCUPANCY_DUMP_PATH
+                else self.app_info.output_path / "occupancy"
+            ),
+            occupancy_dump_sec=self.settings.OCCUPANCY_DUMP_SEC,
+            capture_index=capture_index,
+            index_flush_sec=self.settings.INDEX_FLUSH_SEC,
         )
 
         if self._zms_enabled:
@@ -62,3 +239,56 @@ class SurveyAppBuilder:
             await app.start_survey()
 
         return app
+
+    def _build_noise_floor_tracker(self) -> NoiseFloorTracker:
+        path = (
+            Path(self.settings.NOISE_FLOOR_PATH)
+            if self.settings.NOISE_FLOOR_PATH
+            else self.app_info.output_path / ".noise_floor.npz"
+        )
+        tracker = NoiseFloorTracker(
+            NoiseFloorConfig(
+                bins_per_step=self.settings.NOISE_FLOOR_BINS,
+                ema_alpha=self.settings.NOISE_FLOOR_EMA_ALPHA,
+                max_frequencies=self.settings.NOISE_FLOOR_MAX_FREQUENCIES,
+            ),
+            path,
+        )
+        tracker.load()
+        self.metrics.add_json_route("/noise_floor", tracker.query)
+        return tracker
+
+    def _build_occupancy_accumulator(self) -> OccupancyAccumulator:
+        # Cover the whole band of the configured sweep unless told otherwise
+        half_bandwidth = self.settings.BANDWIDTH // 2
+        min_freq_hz = self.settings.OCCUPANCY_MIN_FREQ_HZ or (
+            self.sweep_config.start_hz - half_bandwidth
+        )
+        max_freq_hz = self.settings.OCCUPANCY_MAX_FREQ_HZ or (
+            self.sweep_config.end_hz + half_bandwidth
+        )
+        accumulator = OccupancyAccumulator(
+            min_freq_hz=min_freq_hz,
+            max_freq_hz=max_freq_hz,
+            bin_width_hz=self.settings.OCCUPANCY_BIN_WIDTH_HZ,
+            path=(
+                Path(self.settings.OCCUPANCY_PATH)
+                if self.settings.OCCUPANCY_PATH
+                else self.app_info.output_path / ".occupancy.npz"
+            ),
+        )
+        accumulator.load()
+        return accumulator
+
+    def _build_outbox_publisher(
+        self, directory: Path, producer: NatsProducer
+    ) -> OutboxPublisher:
+        return OutboxPublisher(
+            outbox=SegmentOutbox(directory, fsync=self.settings.OUTBOX_FSYNC),
+            publish=producer.publish,
+            metrics=self.metrics,
+            batch_size=self.settings.OUTBOX_BATCH_SIZE,
+            max_rate=self.settings.OUTBOX_MAX_RATE,
+            max_in_flight=self.settings.PUBLISH_MAX_IN_FLIGHT,
+            executor=self.io_executor,
+        )
@@ -0,0 +1,138 @@
+import logging
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BufferPoolExhaustedError(Exception):
+    """Raised when no capture buffer becomes free within the lease timeout."""
+
+    pass
+
+
+def required_pool_size(records_per_capture: int, in_flight: int) -> int:
+    """
+    The buffers a pool needs so a capture never waits on processing: one
+    for each record the capture returns, plus one for each of the `in_flight`
+    captures that processing may hold meanwhile.
+    """
+    return records_per_capture + in_flight
+
+
+class BufferLease:
+    """
+    A capture buffer borrowed from a CaptureBufferPool. The holder must call
+    release() once it no longer needs the data so the buffer can be reused.
+    """
+
+    def __init__(self, pool: "CaptureBufferPool", buffer: np.ndarray, generation: int):
+        self._pool = pool
+        self._generation = generation
+        self._released = False
+        self.buffer = buffer
+
+    @property
+    def released(self) -> bool:
+        return self._released
+
+    def release(self) -> None:
+        """Returns the buffer to its pool. Releasing twice is a no-op."""
+        if self._released:
+            return
+        self._released = True
+        self._pool._return(self.buffer, self._generation)
+
+
+class CaptureBufferPool:
+    """
+    A fixed set of preallocated sample buffers that are leased to captures
+    and returned once processing has finished, so the capture path does not
+    allocate (and the kernel does not have to fault in) gigabytes per capture.
+
+    Buffers hold one int32 per complex sc16 sample, matching the layout the
+    UHD streamer writes. A pool of size 0 holds no buffers at all, for
+    captures that are streamed to disk instead.
+    """
+
+    def __init__(self, num_samples: int, size: int):
+        if size < 0:
+            raise ValueError("Buffer pool size must not be negative")
+
+        self._cond = threading.Condition()
+        self._size = size
+        self._num_samples = num_samples
+        self._generation = 0
+        self._in_use = 0
+        self._free: List[np.ndarray] = [self._allocate() for _ in range(size)]
+
+        if size:
+            logger.info(
+                f"Allocated capture buffer pool: {size} x {num_samples} samples "
+                f"({size * num_samples * 4 / 1e6:.1f} MB)"
+            )
+
+    @property
+    def capacity(self) -> int:
+        return self._size
+
+    @property
+    def in_use(self) -> int:
+        with self._cond:
+            return self._in_use
+
+    @property
+    def num_samples(self) -> int:
+        return self._num_samples
+
+    def acquire(self, timeout: Optional[float] = None) -> BufferLease:
+        """
+        Leases a free buffer, blocking for up to `timeout` seconds.
+        Raises BufferPoolExhaustedError if none becomes available.
+        """
+        with self._cond:
+            if self._size == 0:
+                raise BufferPoolExhaustedError("The capture buffer pool is empty.")
+            if not self._cond.wait_for(lambda: len(self._free) > 0, timeout=timeout):
+                raise BufferPoolExhaustedError(
+                    f"All {self._size} capture buffers are in use."
+                )
+
+            buffer = self._free.pop()
+            self._in_use += 1
+            return BufferLease(self, buffer, self._generation)
+
+    def resize(self, num_samples: int) -> None:
+        """
+        Changes the length of the pooled buffers. Free buffers are replaced
+        immediately; buffers still on lease are replaced when they are returned.
+        """
+        with self._cond:
+            if num_samples == self._num_samples:
+                return
+
+            logger.info(
+                f"Resizing capture buffer pool from {self._num_samples} to {num_samples} samples."
+            )
+            self._num_samples = num_samples
+            self._generation += 1
+
+            free_count = len(self._free)
+            # Drop the old buffers before allocating so both sets are never held at once
+            self._free.clear()
+            self._free = [self._allocate() for _ in range(free_count)]
+
+    def _return(self, buffer: np.ndarray, generation: int) -> None:
+        with self._cond:
+            self._in_use -= 1
+            if generation == self._generation:
+                self._free.append(buffer)
+            else:
+                # Leased before a resize, so it has the wrong length
+                self._free.append(self._allocate())
+            self._cond.notify()
+
+    def _allocate(self) -> np.ndarray:
+        return np.empty(self._num_samples, dtype=np.int32)
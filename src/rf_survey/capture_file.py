@@ -0,0 +1,183 @@
+import logging
+import mmap
+import os
+import uuid
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from rf_survey.hashing import Checksummer
+
+logger = logging.getLogger(__name__)
+
+# One complex sc16 sample is stored as a single int32
+SAMPLE_BYTES = 4
+
+# Streamed captures carry this suffix until they are finalized and moved
+PARTIAL_SUFFIX = ".partial"
+
+
+def remove_partial_files(directory: Path) -> int:
+    """
+    Deletes the streamed capture files a crashed run left unfinished in
+    `directory`, where they are created. Must run before new captures are
+    streamed there. Returns how many were removed.
+    """
+    removed = 0
+    for path in directory.glob(f".*{PARTIAL_SUFFIX}"):
+        try:
+            path.unlink()
+        except OSError as e:
+            logger.error(f"Failed to remove stale partial capture {path}: {e}")
+            continue
+        logger.warning(f"Removed stale partial capture {path}")
+        removed += 1
+    return removed
+
+
+class StreamedCaptureFile:
+    """
+    A capture file preallocated to its final size and memory-mapped so the
+    streamer can write samples straight into the page cache.
+
+    Each committed chunk is fed into the running checksum and then dropped
+    from the process' mapping, so resident memory stays bounded by the chunk
+    size no matter how long the capture is. The kernel writes the dirty pages
+    back in the background.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        num_samples: int,
+        checksummer: Optional[Checksummer] = None,
+    ):
+        self.num_samples = num_samples
+        self.path = directory / f".{uuid.uuid4().hex}.sc16{PARTIAL_SUFFIX}"
+
+        self._checksummer = checksummer or Checksummer()
+        self._committed = 0
+        self._evicted_bytes = 0
+        self._checksum: Optional[str] = None
+
+        size = num_samples * SAMPLE_BYTES
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.posix_fallocate(fd, 0, size)
+            self._mmap = mmap.mmap(fd, size)
+        except BaseException:
+            os.close(fd)
+            self.path.unlink(missing_ok=True)
+            raise
+        # The mapping keeps its own reference to the file
+        os.close(fd)
+
+        self.samples = np.frombuffer(self._mmap, dtype=np.int32)
+
+    @property
+    def checksum(self) -> str:
+        if self._checksum is None:
+            raise RuntimeError("Capture file has not been finalized")
+        return self._checksum
+
+    def chunk(self, start: int, count: int) -> np.ndarray:
+        """Returns a writable view of `count` samples starting at `start`."""
+        return self.samples[start : start + count]
+
+    def commit(self, start: int, count: int) -> None:
+        """
+        Marks `count` samples starting at `start` as received. Chunks must be
+        committed in order.
+        """
+        if start != self._committed:
+            raise ValueError(
+                f"Out of order commit: expected offset {self._committed}, got {start}"
+            )
+
+        self._checksummer.update(self.samples[start : start + count])
+        self._committed += count
+        self._evict(self._committed * SAMPLE_BYTES)
+
+    def finalize(self) -> str:
+        """
+        Flushes the file to storage and returns its checksum. The samples
+        remain readable through `samples` until release() is called.
+        """
+        if self._committed != self.num_samples:
+            raise RuntimeError(
+                f"Capture file incomplete: {self._committed} of {self.num_samples} samples"
+            )
+
+        self._mmap.flush()
+        self._checksum = self._checksummer.hexdigest()
+        return self._checksum
+
+    def move_to(self, destination: Path) -> None:
+        """Atomically renames the finished file to its final location."""
+        os.replace(self.path, destination)
+        self.path = destination
+
+    def discard(self) -> None:
+        """Releases the mapping and deletes the file."""
+        self.release()
+        self.path.unlink(missing_ok=True)
+
+    def release(self) -> None:
+        """Unmaps the file. `samples` must not be used afterwards."""
+        self.samples = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Views handed out to processing are still alive; the mapping
+            # is freed together with the last of them.
+            pass
+
+    def _evict(self, end_byte: int) -> None:
+        # madvise works on whole pages, anything after the last full page
+        # is evicted with the next chunk
+        end_byte -= end_byte % mmap.PAGESIZE
+        if end_byte <= self._evicted_bytes:
+            return
+
+        # For a shared file mapping the dirty data stays in the page cache,
+        # only the process' resident pages are dropped
+        self._mmap.madvise(
+            mmap.MADV_DONTNEED, self._evicted_bytes, end_byte - self._evicted_bytes
+        )
+        self._evicted_bytes = end_byte
+
+
+class SpooledCaptureFile:
+    """
+    A finished, checksummed capture file that is waiting in the spool
+    directory. Like a finalized StreamedCaptureFile, processing only has to
+    move it to its final location.
+    """
+
+    def __init__(self, path: Path, checksum: str, sidecar_path: Path):
+        self.path = path
+        self._checksum = checksum
+        # Describes the spooled capture, removed once the capture leaves the spool
+        self.sidecar_path = sidecar_path
+        self.samples = np.memmap(path, dtype=np.int32, mode="r")
+
+    @property
+    def checksum(self) -> str:
+        return self._checksum
+
+    def move_to(self, destination: Path) -> None:
+        """Atomically renames the file to its final location."""
+        os.replace(self.path, destination)
+        self.path = destination
+        self.sidecar_path.unlink(missing_ok=True)
+
+    def discard(self) -> None:
+        """Releases the mapping and deletes the file and its sidecar."""
+        self.release()
+        self.path.unlink(missing_ok=True)
+        self.sidecar_path.unlink(missing_ok=True)
+
+    def release(self) -> None:
+        """Unmaps the file. `samples` must not be used afterwards."""
+        self.samples = None
@@ -0,0 +1,359 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+from rf_survey.compression import COMPRESSED_SUFFIX
+from rf_survey.container import (
+    MANIFEST_SUFFIX,
+    SEGMENT_SUFFIX,
+    segment_location,
+    split_location,
+)
+from rf_survey.packing import PACKED_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 256
+
+# Rows inserted per transaction while rebuilding
+REBUILD_BATCH_SIZE = 10_000
+
+# Upper bound on the rows one query returns
+DEFAULT_QUERY_LIMIT = 10_000
+
+SIDECAR_SUFFIX = ".json"
+
+# Suffixes of the capture files a sidecar may describe
+DATA_SUFFIXES = (".sc16", COMPRESSED_SUFFIX, PACKED_SUFFIX)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    path TEXT PRIMARY KEY,
+    frequency INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    checksum TEXT NOT NULL,
+    hostname TEXT NOT NULL,
+    serial TEXT,
+    sampling_rate INTEGER NOT NULL,
+    gain REAL NOT NULL,
+    length REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS captures_by_frequency ON captures (frequency, timestamp);
+CREATE INDEX IF NOT EXISTS captures_by_time ON captures (timestamp);
+CREATE INDEX IF NOT EXISTS captures_by_checksum ON captures (checksum);
+"""
+
+_COLUMNS = (
+    "path",
+    "frequency",
+    "timestamp",
+    "checksum",
+    "hostname",
+    "serial",
+    "sampling_rate",
+    "gain",
+    "length",
+)
+
+_INSERT = (
+    f"INSERT OR REPLACE INTO captures ({', '.join(_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _COLUMNS)})"
+)
+
+
+class IndexEntry(BaseModel):
+    """
+    The fields of a capture's MetadataRecord that the index is searched by.
+    Validates from a MetadataRecord's JSON, other fields are ignored.
+    """
+
+    model_config = ConfigDict(extra="ignore")
+
+    source_path: Path
+    frequency: int
+    timestamp: datetime
+    checksum: str
+    hostname: str
+    serial: Optional[str] = None
+    sampling_rate: int
+    gain: float
+    length: float
+
+    def _row(self) -> tuple:
+        return (
+            str(self.source_path),
+            self.frequency,
+            _unix_time(self.timestamp),
+            self.checksum,
+            self.hostname,
+            self.serial,
+            self.sampling_rate,
+            self.gain,
+            self.length,
+        )
+
+    @classmethod
+    def _from_row(cls, row: sqlite3.Row) -> "IndexEntry":
+        values = dict(zip(_COLUMNS, row))
+        values["source_path"] = values.pop("path")
+        values["timestamp"] = datetime.fromtimestamp(values["timestamp"], timezone.utc)
+        return cls(**values)
+
+
+def sidecar_path(data_path: Path) -> Path:
+    """Where the record describing a capture file is kept."""
+    return data_path.with_suffix(SIDECAR_SUFFIX)
+
+
+def write_sidecar(data_path: Path, record_json: str) -> Path:
+    """
+    Atomically writes a capture's record next to its samples, so the index
+    can be rebuilt from the files alone.
+    """
+    path = sidecar_path(data_path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(record_json)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _unix_time(timestamp: datetime) -> float:
+    # Naive timestamps are taken as UTC, the receiver stamps captures in UTC
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+class CaptureIndex:
+    """
+    A local SQLite index of the stored captures, searchable by frequency,
+    time and checksum.
+
+    Entries are buffered and inserted in batches of one transaction each,
+    and the database runs in WAL mode so queries from other processes, e.g.
+    the rf-survey-index CLI, never wait for the survey's writes. The index
+    only holds what is also in the sidecar written next to each capture,
+    so it can always be rebuilt from the storage directory.
+
+    Safe to use from several processing workers at once.
+    """
+
+    def __init__(self, path: Path, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared by the worker threads, every use holds the lock
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # Durable at checkpoints, the sidecars are the source of truth
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def add(self, entry: IndexEntry) -> None:
+        """Queues an entry, inserting the batch once it is full."""
+        with self._lock:
+            self._pending.append(entry._row())
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def flush(self) -> None:
+        """Inserts the queued entries."""
+        with self._lock:
+            self._flush()
+
+    def query(
+        self,
+        min_freq_hz: Optional[int] = None,
+        max_freq_hz: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        checksum: Optional[str] = None,
+        limit: int = DEFAULT_QUERY_LIMIT,
+    ) -> List[IndexEntry]:
+        """
+        Returns the captures with a center frequency in [min_freq_hz,
+        max_freq_hz] taken in [start, end), oldest first. Every bound is
+        optional.
+        """
+        conditions, params = [], []
+        if min_freq_hz is not None:
+            conditions.append("frequency >= ?")
+            params.append(min_freq_hz)
+        if max_freq_hz is not None:
+            conditions.append("frequency <= ?")
+            params.append(max_freq_hz)
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(_unix_time(start))
+        if end is not None:
+            conditions.append("timestamp < ?")
+            params.append(_unix_time(end))
+        if checksum is not None:
+            conditions.append("checksum = ?")
+            params.append(checksum)
+
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM captures"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY timestamp LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            self._flush()
+            rows = self._connection.execute(sql, params).fetchall()
+        return [IndexEntry._from_row(row) for row in rows]
+
+    def query_params(self, params: Mapping[str, str]) -> List[Dict[str, Any]]:
+        """
+        Answers a request to the metrics server. Takes the optional
+        parameters `min_freq`, `max_freq` (Hz), `start`, `end` (ISO 8601),
+        `checksum` and `limit`.
+        """
+        entries = self.query(
+            min_freq_hz=_optional(params, "min_freq", lambda v: int(float(v))),
+            max_freq_hz=_optional(params, "max_freq", lambda v: int(float(v))),
+            start=_optional(params, "start", datetime.fromisoformat),
+            end=_optional(params, "end", datetime.fromisoformat),
+            checksum=params.get("checksum"),
+            limit=int(params.get("limit", DEFAULT_QUERY_LIMIT)),
+        )
+        return [entry.model_dump(mode="json") for entry in entries]
+
+    def count(self) -> int:
+        with self._lock:
+            self._flush()
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM captures"
+            ).fetchone()
+        return count
+
+    def rebuild(self, storage_dir: Path) -> int:
+        """
+        Replaces the index with the captures found under `storage_dir` and
+        returns how many were indexed. Every capture with a readable sidecar
+        or segment manifest is indexed at the path it is found at now.
+        """
+        start = time.monotonic()
+        with self._lock:
+            self._pending.clear()
+            connection = self._connection
+            # One transaction, queries see the old index until it is done
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM captures")
+                indexed = 0
+                batch = []
+                for entry in scan_sidecars(storage_dir):
+                    batch.append(entry._row())
+                    if len(batch) >= REBUILD_BATCH_SIZE:
+                        connection.executemany(_INSERT, batch)
+                        indexed += len(batch)
+                        batch.clear()
+                connection.executemany(_INSERT, batch)
+                indexed += len(batch)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+        logger.info(
+            f"Rebuilt capture index {self.path} with {indexed} captures "
+            f"in {time.monotonic() - start:.1f} s."
+        )
+        return indexed
+
+    def close(self) -> None:
+        """Inserts the queued entries and closes the database."""
+        with self._lock:
+            self._flush()
+            self._connection.close()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        try:
+            with self._connection:
+                self._connection.execute("BEGIN")
+                self._connection.executemany(_INSERT, self._pending)
+        except sqlite3.Error as e:
+            # The sidecars still have them, a rebuild restores the entries
+            logger.error(f"Failed to index {len(self._pending)} captures: {e}")
+        self._pending.clear()
+
+
+def scan_sidecars(storage_dir: Path) -> Iterable[IndexEntry]:
+    """
+    Yields an entry for every capture under `storage_dir` that has a
+    readable sidecar or segment manifest, pointing at where the capture is
+    now. Hidden directories, e.g. the spool and the outbox, are skipped.
+    """
+    for directory, subdirs, files in os.walk(storage_dir):
+        subdirs[:] = [name for name in subdirs if not name.startswith(".")]
+        directory = Path(directory)
+        names = set(files)
+        for name in files:
+            if name.endswith(SEGMENT_SUFFIX + MANIFEST_SUFFIX):
+                segment_name = name[: -len(MANIFEST_SUFFIX)]
+                if segment_name in names:
+                    yield from _scan_manifest(
+                        directory / name, directory / segment_name
+                    )
+                continue
+
+            if not name.endswith(SIDECAR_SUFFIX):
+                continue
+            stem = name[: -len(SIDECAR_SUFFIX)]
+            data_name = next(
+                (stem + suffix for suffix in DATA_SUFFIXES if stem + suffix in names),
+                None,
+            )
+            if data_name is None:
+                # Other JSON files, or a capture that was deleted
+                continue
+
+            sidecar = directory / name
+            try:
+                entry = IndexEntry.model_validate_json(sidecar.read_text())
+            except (OSError, ValidationError) as e:
+                logger.warning(f"Skipping unreadable capture sidecar {sidecar}: {e}")
+                continue
+            entry.source_path = directory / data_name
+            yield entry
+
+
+def _scan_manifest(manifest: Path, segment_path: Path) -> Iterable[IndexEntry]:
+    try:
+        lines = manifest.read_text().splitlines()
+    except OSError as e:
+        logger.warning(f"Skipping unreadable segment manifest {manifest}: {e}")
+        return
+
+    for line in lines:
+        try:
+            entry = IndexEntry.model_validate_json(line)
+        except ValidationError:
+            # A line torn by a crash, or not a record
+            logger.warning(f"Skipping unreadable record in {manifest}")
+            continue
+        _, offset = split_location(entry.source_path)
+        if offset is None:
+            continue
+        entry.source_path = segment_location(segment_path, offset)
+        yield entry
+
+
+def _optional(params: Mapping[str, str], name: str, parse):
+    value = params.get(name)
+    return None if value is None else parse(value)
@@ -0,0 +1,127 @@
+import asyncio
+from collections import deque
+from enum import Enum
+from typing import Callable, Deque, Generic, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class OverflowPolicy(str, Enum):
+    """What happens to a capture that does not fit in the processing queue."""
+
+    # Write the capture to the spool directory, it keeps its place in the queue
+    SPILL = "spill"
+    # Hold up the sweep until processing has made room
+    BLOCK = "block"
+    # Drop queued captures, oldest first, until the new one fits
+    DROP_OLDEST = "drop_oldest"
+    # Drop the new capture
+    DROP_NEWEST = "drop_newest"
+    # Keep only as much of the new capture as fits
+    DEGRADE = "degrade"
+
+
+class ByteBudgetQueue(Generic[T]):
+    """
+    A FIFO queue bounded by the total size of its items rather than their count.
+
+    Item sizes come from `size_of` when they are added. An item is always
+    accepted into an empty queue, so one that is larger than the whole
+    budget cannot stall the pipeline.
+
+    `buffers_available` is an optional second limit for items that hold
+    memory, e.g. whether the capture buffer pool can still serve the next
+    capture. Queued captures keep their pooled buffers, so the pool can run
+    out long before the byte budget does. Call capacity_changed() when it
+    may have changed without the queue knowing, e.g. a buffer was returned.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        size_of: Callable[[T], int],
+        buffers_available: Optional[Callable[[], bool]] = None,
+    ):
+        self.max_bytes = max_bytes
+        self._size_of = size_of
+        self._buffers_available = buffers_available
+        self._items: Deque[Tuple[T, int]] = deque()
+        self._nbytes = 0
+        # Set and replaced whenever items are added or removed
+        self._changed = asyncio.Event()
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    @property
+    def free_bytes(self) -> int:
+        return max(0, self.max_bytes - self._nbytes)
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def has_room(self, nbytes: int) -> bool:
+        return self.has_byte_room(nbytes) and self.has_buffer_room(nbytes)
+
+    def has_byte_room(self, nbytes: int) -> bool:
+        return not self._items or self._nbytes + nbytes <= self.max_bytes
+
+    def has_buffer_room(self, nbytes: int) -> bool:
+        # Items that hold no memory hold no buffer either
+        return (
+            nbytes == 0 or self._buffers_available is None or self._buffers_available()
+        )
+
+    def capacity_changed(self) -> None:
+        """Makes waiting put() calls re-check the limits."""
+        self._notify()
+
+    def put_nowait(self, item: T) -> None:
+        """Adds the item regardless of the budget."""
+        size = self._size_of(item)
+        self._items.append((item, size))
+        self._nbytes += size
+        self._notify()
+
+    async def put(self, item: T) -> None:
+        """Waits until the item fits in the budget and the buffers, then adds it."""
+        size = self._size_of(item)
+        while not self.has_room(size):
+            await self._changed.wait()
+        self.put_nowait(item)
+
+    async def get(self) -> T:
+        """Waits for and removes the oldest item."""
+        while not self._items:
+            await self._changed.wait()
+        return self.get_nowait()
+
+    def get_nowait(self) -> T:
+        if not self._items:
+            raise asyncio.QueueEmpty
+        item, size = self._items.popleft()
+        self._nbytes -= size
+        self._notify()
+        return item
+
+    def pop_oldest_sized(self) -> Optional[T]:
+        """
+        Removes the oldest item that counts against the budget, skipping items
+        of size zero. Returns None if there is none.
+        """
+        for index, (item, size) in enumerate(self._items):
+            if size > 0:
+                del self._items[index]
+                self._nbytes -= size
+                self._notify()
+                return item
+        return None
+
+    def _notify(self) -> None:
+        # Every waiter re-checks its condition, later waits use the fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
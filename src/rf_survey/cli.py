@@ -85,6 +85,13 @@ def update_settings_from_args(settings: AppSettings) -> AppSettings:
         default=settings.RECORDS,
         help="# of files generated per frequency. Env: RF_RECORDS",
     )
+    parser.add_argument(
+        "-cr",
+        "--continuous_records",
+        action="store_true",
+        default=settings.CONTINUOUS_RECORDS,
+        help="Capture all records of a frequency back-to-back from one stream. Env: RF_CONTINUOUS_RECORDS",
+    )
     parser.add_argument(
         "-o",
         "--organization",
@@ -128,6 +135,7 @@ def update_settings_from_args(settings: AppSettings) -> AppSettings:
         duration_sec=settings.DURATION_SEC,
         gain=settings.GAIN,
         records=settings.RECORDS,
+        continuous_records=settings.CONTINUOUS_RECORDS,
         organization=settings.ORGANIZATION,
         coordinates=settings.COORDINATES,
         cycles=settings.CYCLES,
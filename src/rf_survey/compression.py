@@ -0,0 +1,264 @@
+import lzma
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from rf_survey.hashing import ChecksumMethod
+from rf_survey.spectrum import sc16_as_iq
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSED_SUFFIX = ".sc16z"
+
+FILE_MAGIC = b"RFSC16Z\x00"
+FILE_VERSION = 2
+
+# Magic, version, codec id, filter flags, block size and total samples
+FILE_HEADER = struct.Struct("<8sHBBIQ")
+# Offset and compressed length of each block, in file order
+BLOCK_ENTRY = struct.Struct("<QI")
+# Offset of the block index, the last bytes of the file
+FILE_FOOTER = struct.Struct("<Q")
+
+FILTER_DELTA = 0x1
+FILTER_SHUFFLE = 0x2
+
+# 1 Mi samples, 4 MiB of sc16, per independently decodable block
+DEFAULT_BLOCK_SAMPLES = 1 << 20
+
+
+class _Codec(NamedTuple):
+    id: int
+    default_level: int
+    compress: Callable[[bytes, int], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+def _lzma_compress(data: bytes, level: int) -> bytes:
+    return lzma.compress(data, preset=level)
+
+
+def _zstd_compress(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+_CODECS: Dict[str, _Codec] = {
+    # Fast levels by default, the stage must keep up with the receiver
+    "zlib": _Codec(1, 1, zlib.compress, zlib.decompress),
+    "lzma": _Codec(2, 0, _lzma_compress, lzma.decompress),
+    "zstd": _Codec(3, 3, _zstd_compress, _zstd_decompress),
+}
+_CODEC_NAMES = {codec.id: name for name, codec in _CODECS.items()}
+
+
+def _codec(name: str) -> _Codec:
+    try:
+        codec = _CODECS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown compression codec '{name}', expected one of {sorted(_CODECS)}"
+        ) from None
+    if name == "zstd" and zstandard is None:
+        raise ValueError(
+            "Compression codec 'zstd' requires the optional 'zstandard' package"
+        )
+    return codec
+
+
+@dataclass(frozen=True)
+class CompressionConfig:
+    """How stored captures are compressed."""
+
+    codec: str = "zlib"
+    # The codec's fast default when unset
+    level: Optional[int] = None
+    # Store the difference to the previous sample of each component
+    delta: bool = True
+    # Group the low and the high bytes of the samples, which compress better
+    shuffle: bool = True
+    block_samples: int = DEFAULT_BLOCK_SAMPLES
+
+    def __post_init__(self):
+        # Fail at startup rather than on the first capture
+        _codec(self.codec)
+        if self.block_samples < 1:
+            raise ValueError("block_samples must be at least 1")
+
+    @property
+    def filters(self) -> int:
+        return (FILTER_DELTA if self.delta else 0) | (
+            FILTER_SHUFFLE if self.shuffle else 0
+        )
+
+
+@dataclass(frozen=True)
+class CompressionResult:
+    checksum: str
+    raw_bytes: int
+    compressed_bytes: int
+    duration_sec: float
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_bytes / max(self.compressed_bytes, 1)
+
+
+def _encode_block(samples: np.ndarray, filters: int) -> bytes:
+    iq = sc16_as_iq(samples)
+    if filters & FILTER_DELTA:
+        # Wraps around in int16, which the cumulative sum undoes exactly
+        filtered = np.empty_like(iq)
+        filtered[0] = iq[0]
+        np.subtract(iq[1:], iq[:-1], out=filtered[1:])
+        iq = filtered
+    if filters & FILTER_SHUFFLE:
+        return iq.view(np.uint8).reshape(-1, 2).T.tobytes()
+    return iq.tobytes()
+
+
+def _decode_block(data: bytes, filters: int) -> np.ndarray:
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if filters & FILTER_SHUFFLE:
+        raw = raw.reshape(2, -1).T
+    iq = np.ascontiguousarray(raw).view(np.int16).reshape(-1, 2)
+    if filters & FILTER_DELTA:
+        iq = np.cumsum(iq, axis=0, dtype=np.int16)
+    return np.ascontiguousarray(iq).view(np.int32).ravel()
+
+
+def write_compressed(
+    path: Path,
+    samples: np.ndarray,
+    config: CompressionConfig,
+    checksum_method: ChecksumMethod,
+) -> CompressionResult:
+    """
+    Compresses sc16 samples to `path` and checksums the file in the same
+    pass. The file is a header followed by the blocks, each of which
+    decodes on its own, then an index of the blocks and a footer pointing
+    at it. Each block is written as soon as it is compressed, so only one
+    is held in memory at a time.
+    """
+    start = time.monotonic()
+    codec = _codec(config.codec)
+    level = codec.default_level if config.level is None else config.level
+
+    header = FILE_HEADER.pack(
+        FILE_MAGIC,
+        FILE_VERSION,
+        codec.id,
+        config.filters,
+        config.block_samples,
+        len(samples),
+    )
+
+    checksummer = checksum_method.create()
+    index = bytearray()
+    with open(path, "wb") as f:
+
+        def write(part: bytes) -> None:
+            f.write(part)
+            checksummer.update(part)
+
+        write(header)
+        offset = FILE_HEADER.size
+        for first in range(0, len(samples), config.block_samples):
+            block = samples[first : first + config.block_samples]
+            compressed = codec.compress(_encode_block(block, config.filters), level)
+            write(compressed)
+            index += BLOCK_ENTRY.pack(offset, len(compressed))
+            offset += len(compressed)
+
+        write(bytes(index))
+        write(FILE_FOOTER.pack(offset))
+
+    return CompressionResult(
+        checksum=checksummer.hexdigest(),
+        raw_bytes=samples.nbytes,
+        compressed_bytes=offset + len(index) + FILE_FOOTER.size,
+        duration_sec=time.monotonic() - start,
+    )
+
+
+class CompressedReader:
+    """
+    Reads the samples of a compressed capture, decoding only the blocks
+    that hold the requested range.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file: BinaryIO = open(path, "rb")
+        try:
+            self._read_index()
+        except BaseException:
+            self._file.close()
+            raise
+
+    def _read_index(self) -> None:
+        header = self._file.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size:
+            raise ValueError(f"{self.path} is not a compressed capture")
+        magic, version, codec_id, filters, block_samples, num_samples = (
+            FILE_HEADER.unpack(header)
+        )
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            raise ValueError(f"{self.path} is not a compressed capture")
+        if codec_id not in _CODEC_NAMES:
+            raise ValueError(f"{self.path} uses an unknown codec ({codec_id})")
+
+        self.codec = _CODEC_NAMES[codec_id]
+        self._decompress = _codec(self.codec).decompress
+        self.filters = filters
+        self.block_samples = block_samples
+        self.num_samples = num_samples
+
+        num_blocks = -(-num_samples // block_samples)
+        self._file.seek(-FILE_FOOTER.size, os.SEEK_END)
+        (index_offset,) = FILE_FOOTER.unpack(self._file.read(FILE_FOOTER.size))
+        self._file.seek(index_offset)
+        index = self._file.read(num_blocks * BLOCK_ENTRY.size)
+        if len(index) < num_blocks * BLOCK_ENTRY.size:
+            raise ValueError(f"{self.path} is a truncated compressed capture")
+        self._blocks: List[Tuple[int, int]] = list(BLOCK_ENTRY.iter_unpack(index))
+
+    def read(self, start: int = 0, count: Optional[int] = None) -> np.ndarray:
+        """Returns `count` samples from `start`, or all after it, one per int32."""
+        end = (
+            self.num_samples if count is None else min(start + count, self.num_samples)
+        )
+        if start >= end:
+            return np.empty(0, dtype=np.int32)
+
+        first, last = start // self.block_samples, (end - 1) // self.block_samples
+        decoded = [self._read_block(index) for index in range(first, last + 1)]
+        samples = np.concatenate(decoded) if len(decoded) > 1 else decoded[0]
+        skip = start - first * self.block_samples
+        return samples[skip : skip + end - start]
+
+    def _read_block(self, index: int) -> np.ndarray:
+        offset, length = self._blocks[index]
+        self._file.seek(offset)
+        return _decode_block(self._decompress(self._file.read(length)), self.filters)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "CompressedReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
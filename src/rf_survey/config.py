@@ -2,7 +2,10 @@ import socket
 from pydantic import SecretStr, computed_field, Field
 from pydantic_settings import SettingsConfigDict, BaseSettings
 from dataclasses import dataclass
-from typing import Optional
+from pathlib import Path
+from typing import Literal, Optional
+
+from rf_survey.capture_queue import OverflowPolicy
 
 
 @dataclass
@@ -27,6 +30,7 @@ class AppSettings(BaseSettings):
     ORGANIZATION: str = "DefaultOrg"
     COORDINATES: str = "0.0N,0.0W"
     RECORDS: int = 1
+    CONTINUOUS_RECORDS: bool = False
     CYCLES: int = 1
     TIMER: int = 10
     JITTER: float = 0.0
@@ -35,6 +39,100 @@ class AppSettings(BaseSettings):
     NATS_PORT: int = 4222
     NATS_TOKEN: Optional[SecretStr] = None
     STORAGE_PATH: str = "/tmp"
+    # Subdirectories captures are stored in, e.g. "{year}/{month}/{day}/{hour}/{band}"
+    STORAGE_LAYOUT: str = ""
+    STORAGE_BAND_WIDTH_HZ: int = Field(default=100_000_000, gt=0)
+    # Append the IQ of many captures to rolling segment files instead of a file each
+    CONTAINER_ENABLED: bool = False
+    CONTAINER_SEGMENT_BYTES: int = Field(default=1_073_741_824, ge=1)
+    CONTAINER_SEGMENT_SEC: float = Field(default=3600.0, gt=0)
+    CONTAINER_SEGMENT_CAPTURES: int = Field(default=4096, ge=1)
+    # Lossless compression of the stored IQ, in independently decodable blocks
+    COMPRESSION_ENABLED: bool = False
+    COMPRESSION_CODEC: Literal["zlib", "lzma", "zstd"] = "zlib"
+    # The codec's fast default when unset
+    COMPRESSION_LEVEL: Optional[int] = None
+    COMPRESSION_DELTA: bool = True
+    COMPRESSION_SHUFFLE: bool = True
+    COMPRESSION_BLOCK_SAMPLES: int = Field(default=1_048_576, ge=1)
+    # sc12 streams 12-bit samples from the radio and stores them packed in 3 bytes
+    SAMPLE_FORMAT: Literal["sc16", "sc12"] = "sc16"
+    # Raised at startup to the records of a continuous dwell plus one per worker
+    BUFFER_POOL_SIZE: int = Field(default=3, ge=1)
+    STREAM_TO_DISK: bool = False
+    STREAM_CHUNK_SAMPLES: int = Field(default=1_048_576, ge=1)
+    TUNING_CACHE_PATH: Optional[str] = None
+    IO_THREADS: int = Field(default=2, ge=1)
+    PROCESSING_WORKERS: int = Field(default=2, ge=1)
+    QUEUE_MAX_BYTES: int = Field(default=2_147_483_648, ge=1)
+    QUEUE_OVERFLOW_POLICY: OverflowPolicy = OverflowPolicy.SPILL
+    SPOOL_PATH: Optional[str] = None
+    OUTBOX_PATH: Optional[str] = None
+    OUTBOX_FSYNC: bool = True
+    OUTBOX_BATCH_SIZE: int = Field(default=64, ge=1)
+    # Messages per second, also bounds the replay of a backlog
+    OUTBOX_MAX_RATE: float = Field(default=50.0, gt=0)
+    # Publishes outstanding at once, with or without the outbox
+    PUBLISH_MAX_IN_FLIGHT: int = Field(default=8, ge=1)
+    CHECKSUM_ALGORITHM: str = "sha256"
+    # Threads for parallel tree hashing, 0 hashes each capture in one pass
+    CHECKSUM_TREE_THREADS: int = Field(default=0, ge=0)
+    # Keep the raw IQ, disable to store only the derived products
+    STORE_IQ: bool = True
+
+    PSD_ENABLED: bool = False
+    PSD_FFT_SIZE: int = Field(default=1024, ge=2)
+    PSD_WINDOW: str = "hann"
+    PSD_OVERLAP: float = Field(default=0.5, ge=0, lt=1)
+    PSD_AVERAGE: Literal["mean", "max"] = "mean"
+    # Segments averaged per capture, 0 averages all of them
+    PSD_MAX_SEGMENTS: int = Field(default=0, ge=0)
+    # Stitch the PSDs of each sweep into one wideband spectrum, needs the PSD stage
+    SWEEP_SPECTRUM_ENABLED: bool = False
+    # Central fraction of each step kept, the edges are filter roll-off
+    SWEEP_USABLE_BANDWIDTH: float = Field(default=0.8, gt=0, le=1)
+
+    # RMS, peak, DC offset, I/Q imbalance and saturation of every capture
+    SIGNAL_STATS_ENABLED: bool = False
+    # Width of the bands the statistics metrics are grouped by
+    STATS_BAND_WIDTH_HZ: int = Field(default=100_000_000, gt=0)
+
+    # Per-frequency noise floor quantiles, served at /noise_floor on the metrics port
+    NOISE_FLOOR_ENABLED: bool = False
+    NOISE_FLOOR_PATH: Optional[str] = None
+    NOISE_FLOOR_SNAPSHOT_SEC: float = Field(default=300.0, gt=0)
+    NOISE_FLOOR_BINS: int = Field(default=32, ge=1)
+    NOISE_FLOOR_MAX_FREQUENCIES: int = Field(default=512, ge=1)
+    NOISE_FLOOR_EMA_ALPHA: float = Field(default=0.05, gt=0, le=1)
+
+    # Time-frequency occupancy history, dumped as binary arrays for dashboards
+    OCCUPANCY_ENABLED: bool = False
+    OCCUPANCY_PATH: Optional[str] = None
+    OCCUPANCY_DUMP_PATH: Optional[str] = None
+    OCCUPANCY_DUMP_SEC: float = Field(default=60.0, gt=0)
+    OCCUPANCY_BIN_WIDTH_HZ: int = Field(default=1_000_000, gt=0)
+    # Above the noise floor by this much counts as occupied
+    OCCUPANCY_THRESHOLD_DB: float = 6.0
+    # Frequency range covered, the configured sweep band if unset
+    OCCUPANCY_MIN_FREQ_HZ: Optional[int] = None
+    OCCUPANCY_MAX_FREQ_HZ: Optional[int] = None
+
+    # SQLite index of the stored captures, queried with rf-survey-index
+    INDEX_ENABLED: bool = False
+    INDEX_PATH: Optional[str] = None
+    INDEX_BATCH_SIZE: int = Field(default=256, ge=1)
+    # Longest a capture waits for its batch to be inserted
+    INDEX_FLUSH_SEC: float = Field(default=5.0, gt=0)
+
+    # Store quiet captures as an excerpt or metadata only, full IQ only on a change
+    TRIAGE_ENABLED: bool = False
+    TRIAGE_QUIET_ACTION: Literal["excerpt", "metadata"] = "excerpt"
+    TRIAGE_EXCERPT_SAMPLES: int = Field(default=65536, ge=1)
+    # Deviation from the baseline, in standard deviations, that counts as a change
+    TRIAGE_CHANGE_THRESHOLD: float = Field(default=4.0, gt=0)
+    TRIAGE_MAX_CLIPPED_SAMPLES: int = Field(default=0, ge=0)
+    TRIAGE_WARMUP_CAPTURES: int = Field(default=10, ge=0)
+    TRIAGE_BASELINE_ALPHA: float = Field(default=0.05, gt=0, le=1)
     LOG_LEVEL: str = "INFO"
 
     ZMS_ZMC_HTTP: Optional[str] = None
@@ -69,6 +167,24 @@ class AppSettings(BaseSettings):
         """Dynamically constructs the NATS subject for this host."""
         return f"jobs.rf.{self.HOSTNAME}"
 
+    @computed_field
+    @property
+    def NATS_PRODUCTS_SUBJECT(self) -> str:
+        """NATS subject for the data products derived from captures."""
+        return f"products.rf.{self.HOSTNAME}"
+
+    @property
+    def products_enabled(self) -> bool:
+        """Whether any stage derives data products from the captures."""
+        return self.PSD_ENABLED or self.SIGNAL_STATS_ENABLED or self.TRIAGE_ENABLED
+
+    @property
+    def index_path(self) -> Path:
+        """The capture index database, kept in the storage directory by default."""
+        if self.INDEX_PATH:
+            return Path(self.INDEX_PATH)
+        return Path(self.STORAGE_PATH) / ".captures.db"
+
     @computed_field
     @property
     def zms(self) -> Optional[ZmsSettings]:
@@ -0,0 +1,326 @@
+import logging
+import mmap
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from rf_survey.hashing import Checksummer, ChecksumMethod, write_hashed
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".seg"
+# Records of the captures in a segment, one JSON line each, next to the segment
+MANIFEST_SUFFIX = ".jsonl"
+
+SEGMENT_MAGIC = b"RFSEG\x00\x00\x01"
+SEGMENT_VERSION = 1
+
+# Magic, version, index capacity, captures committed
+SEGMENT_HEADER = struct.Struct("<8sIII")
+# Offset and length in bytes, timestamp in ns since the epoch, center
+# frequency and sample rate in Hz
+INDEX_ENTRY = struct.Struct("<QQqqq")
+
+# Captures start on page boundaries, so each one maps cleanly on its own
+ALIGNMENT = mmap.PAGESIZE
+
+DEFAULT_SEGMENT_BYTES = 1024 * 1024 * 1024
+DEFAULT_SEGMENT_SEC = 3600.0
+DEFAULT_SEGMENT_CAPACITY = 4096
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _to_ns(timestamp: datetime) -> int:
+    # Exact to the microsecond, unlike going through a float
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return (timestamp - _EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def _from_ns(timestamp_ns: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=timestamp_ns // 1000)
+
+
+def segment_location(segment_path: Path, offset: int) -> Path:
+    """The source path of the capture at `offset` in a segment."""
+    return segment_path.with_name(f"{segment_path.name}@{offset}")
+
+
+def split_location(source_path: Path) -> Tuple[Path, Optional[int]]:
+    """
+    Splits a source path into the file and the capture's offset in it,
+    None for a capture stored in a file of its own.
+    """
+    name, separator, offset = source_path.name.rpartition("@")
+    if not separator or not name.endswith(SEGMENT_SUFFIX) or not offset.isdigit():
+        return source_path, None
+    return source_path.with_name(name), int(offset)
+
+
+@dataclass(frozen=True)
+class ContainerEntry:
+    """Where a capture is in its segment and what was captured."""
+
+    offset: int
+    nbytes: int
+    timestamp: datetime
+    center_freq_hz: int
+    sample_rate_hz: int
+
+
+@dataclass(frozen=True)
+class ContainerLocation:
+    """A capture appended to a segment."""
+
+    segment_path: Path
+    offset: int
+    nbytes: int
+    checksum: str
+
+    @property
+    def source_path(self) -> Path:
+        return segment_location(self.segment_path, self.offset)
+
+
+class _OpenSegment:
+    def __init__(self, path: Path, capacity: int):
+        self.path = path
+        self.capacity = capacity
+        self.opened_at = time.monotonic()
+        self.count = 0
+        self.end = _align(SEGMENT_HEADER.size + capacity * INDEX_ENTRY.size)
+        self.file: BinaryIO = open(path, "wb")
+        self.manifest: Optional[BinaryIO] = None
+        self._write_header()
+
+    def append(
+        self,
+        data: memoryview,
+        entry: ContainerEntry,
+        checksummer: Optional[Checksummer],
+    ) -> None:
+        self.file.seek(entry.offset)
+        write_hashed(self.file, data, checksummer)
+
+        # The capture only counts once its data and index entry are written
+        self.file.seek(SEGMENT_HEADER.size + self.count * INDEX_ENTRY.size)
+        self.file.write(
+            INDEX_ENTRY.pack(
+                entry.offset,
+                entry.nbytes,
+                _to_ns(entry.timestamp),
+                entry.center_freq_hz,
+                entry.sample_rate_hz,
+            )
+        )
+        self.count += 1
+        self._write_header()
+        self.file.flush()
+        self.end = _align(entry.offset + entry.nbytes)
+
+    def add_record(self, record_json: str) -> None:
+        if self.manifest is None:
+            self.manifest = open(manifest_path(self.path), "ab")
+        self.manifest.write(record_json.encode() + b"\n")
+        self.manifest.flush()
+
+    def close(self) -> None:
+        self.file.close()
+        if self.manifest is not None:
+            self.manifest.close()
+
+    def _write_header(self) -> None:
+        self.file.seek(0)
+        self.file.write(
+            SEGMENT_HEADER.pack(
+                SEGMENT_MAGIC, SEGMENT_VERSION, self.capacity, self.count
+            )
+        )
+
+
+def manifest_path(segment_path: Path) -> Path:
+    return segment_path.with_name(segment_path.name + MANIFEST_SUFFIX)
+
+
+class ContainerWriter:
+    """
+    Appends captures to rolling segment files instead of a file per capture.
+
+    A segment starts with a fixed size index of the offset, length,
+    timestamp and center frequency of every capture in it, followed by the
+    page aligned samples. A capture is committed by writing its index entry
+    and then the count in the header, so a segment is readable at any time
+    and a torn append is simply not counted. Each directory of the storage
+    layout gets its own segment, which is rolled over once it reaches
+    `segment_bytes`, is `segment_sec` old or its index is full.
+
+    Safe to use from several processing workers at once. Each capture is
+    checksummed as it is written, in the same pass over the samples.
+    """
+
+    def __init__(
+        self,
+        checksum_method: Optional[ChecksumMethod] = None,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        segment_sec: float = DEFAULT_SEGMENT_SEC,
+        capacity: int = DEFAULT_SEGMENT_CAPACITY,
+    ):
+        self.checksum_method = checksum_method or ChecksumMethod()
+        self.segment_bytes = segment_bytes
+        self.segment_sec = segment_sec
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._segments: Dict[Path, _OpenSegment] = {}
+
+    def append(
+        self,
+        directory: Path,
+        stem: str,
+        samples: np.ndarray,
+        timestamp: datetime,
+        center_freq_hz: int,
+        sample_rate_hz: int,
+        checksum: Optional[str] = None,
+    ) -> ContainerLocation:
+        """
+        Appends a capture to the open segment in `directory`, starting one
+        named after `stem` if there is none. `checksum` skips hashing
+        samples that were already checksummed.
+        """
+        data = memoryview(samples).cast("B")
+        checksummer = self.checksum_method.create() if checksum is None else None
+
+        with self._lock:
+            self._roll_expired()
+            segment = self._segments.get(directory)
+            if segment is not None and (
+                segment.count >= segment.capacity
+                or segment.end + len(data) > self.segment_bytes
+            ):
+                self._close(directory)
+                segment = None
+            if segment is None:
+                segment = _OpenSegment(
+                    directory / f"{stem}{SEGMENT_SUFFIX}", self.capacity
+                )
+                self._segments[directory] = segment
+
+            entry = ContainerEntry(
+                offset=segment.end,
+                nbytes=len(data),
+                timestamp=timestamp,
+                center_freq_hz=center_freq_hz,
+                sample_rate_hz=sample_rate_hz,
+            )
+            try:
+                segment.append(data, entry, checksummer)
+            except OSError:
+                # Whatever was half written is past the committed count
+                self._close(directory)
+                raise
+
+        if checksummer is not None:
+            # A tree hash may still be finishing its leaves, without the lock
+            checksum = checksummer.hexdigest()
+        return ContainerLocation(segment.path, entry.offset, entry.nbytes, checksum)
+
+    def add_record(self, location: ContainerLocation, record_json: str) -> None:
+        """
+        Appends the record describing a capture to its segment's manifest,
+        from which the capture index can be rebuilt.
+        """
+        with self._lock:
+            segment = self._segments.get(location.segment_path.parent)
+            if segment is not None and segment.path == location.segment_path:
+                segment.add_record(record_json)
+                return
+        # The segment was rolled over in the meantime
+        with open(manifest_path(location.segment_path), "ab") as f:
+            f.write(record_json.encode() + b"\n")
+
+    def close(self) -> None:
+        with self._lock:
+            for directory in list(self._segments):
+                self._close(directory)
+
+    def _roll_expired(self) -> None:
+        now = time.monotonic()
+        for directory, segment in list(self._segments.items()):
+            if now - segment.opened_at >= self.segment_sec:
+                self._close(directory)
+
+    def _close(self, directory: Path) -> None:
+        segment = self._segments.pop(directory)
+        try:
+            segment.close()
+        except OSError as e:
+            logger.error(f"Failed to close segment {segment.path}: {e}")
+        logger.debug(f"Closed segment {segment.path} with {segment.count} captures.")
+
+
+class ContainerReader:
+    """
+    Random access to the captures in a segment through a read-only memory
+    map. The samples returned are views of the mapping, valid until close().
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, capacity, count = SEGMENT_HEADER.unpack_from(self._mmap)
+        if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a capture segment")
+
+        self.entries: List[ContainerEntry] = []
+        for index in range(min(count, capacity)):
+            offset, nbytes, timestamp_ns, center_freq_hz, sample_rate_hz = (
+                INDEX_ENTRY.unpack_from(
+                    self._mmap, SEGMENT_HEADER.size + index * INDEX_ENTRY.size
+                )
+            )
+            self.entries.append(
+                ContainerEntry(
+                    offset=offset,
+                    nbytes=nbytes,
+                    timestamp=_from_ns(timestamp_ns),
+                    center_freq_hz=center_freq_hz,
+                    sample_rate_hz=sample_rate_hz,
+                )
+            )
+        self._by_offset = {entry.offset: entry for entry in self.entries}
+
+    def samples(self, offset: int) -> np.ndarray:
+        """The sc16 samples of the capture at `offset`, one per int32."""
+        entry = self._by_offset.get(offset)
+        if entry is None:
+            raise KeyError(f"No capture at offset {offset} in {self.path}")
+        return np.frombuffer(
+            self._mmap, dtype=np.int32, count=entry.nbytes // 4, offset=entry.offset
+        )
+
+    def close(self) -> None:
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Sample views are still alive, the mapping goes with the last one
+            pass
+
+    def __enter__(self) -> "ContainerReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
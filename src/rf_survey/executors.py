@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    A named thread pool that keeps count of queued and running work items so
+    they can be exported as metrics.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        super().__init__(max_workers=max_workers, thread_name_prefix=name)
+        self.name = name
+        self.max_workers = max_workers
+        self._counter_lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Work items submitted but not yet picked up by a thread."""
+        with self._counter_lock:
+            return self._queued
+
+    @property
+    def active_threads(self) -> int:
+        """Threads currently running a work item."""
+        with self._counter_lock:
+            return self._active
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        with self._counter_lock:
+            self._queued += 1
+
+        def run():
+            with self._counter_lock:
+                self._queued -= 1
+                self._active += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._counter_lock:
+                    self._active -= 1
+
+        future = super().submit(run)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future) -> None:
+        # Work cancelled before it started never ran, so it is still counted as queued
+        if future.cancelled():
+            with self._counter_lock:
+                self._queued -= 1
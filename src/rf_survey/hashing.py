@@ -0,0 +1,192 @@
+import hashlib
+import time
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, List, Optional, Tuple
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - optional dependency
+    xxhash = None
+
+# Matches rf_shared.checksum.get_checksum, checksums keep their plain hex format
+DEFAULT_ALGORITHM = "sha256"
+
+# Size of the independently hashed leaves of a tree hash
+TREE_LEAF_BYTES = 4 * 1024 * 1024
+
+# Chunk size for the fused write-and-hash pass, small enough to stay in cache
+WRITE_CHUNK_BYTES = 1024 * 1024
+
+
+def _new_xxh3_128():
+    if xxhash is None:
+        raise ValueError(
+            "Checksum algorithm 'xxh3_128' requires the optional 'xxhash' package"
+        )
+    return xxhash.xxh3_128()
+
+
+_ALGORITHMS: dict[str, Callable] = {
+    "sha256": hashlib.sha256,
+    "blake2b": hashlib.blake2b,
+    "xxh3_128": _new_xxh3_128,
+}
+
+
+def _new_hash(algorithm: str):
+    try:
+        factory = _ALGORITHMS[algorithm]
+    except KeyError:
+        raise ValueError(
+            f"Unknown checksum algorithm '{algorithm}', expected one of {sorted(_ALGORITHMS)}"
+        ) from None
+    return factory()
+
+
+def _hash_leaf(algorithm: str, data: memoryview) -> bytes:
+    leaf = _new_hash(algorithm)
+    leaf.update(data)
+    return leaf.digest()
+
+
+class Checksummer:
+    """
+    Incrementally checksums a capture that arrives in chunks.
+
+    With an executor, the data is split into fixed size leaves that are hashed
+    in parallel and the checksum is the hash over the leaf digests. hashlib
+    releases the GIL on large buffers, so a thread pool spreads the work over
+    all cores. Chunks passed to update() must stay unchanged until
+    hexdigest() returns.
+
+    Anything but a flat SHA-256 is prefixed with its method, e.g.
+    `blake2b-tree:<hex>`, so consumers can tell how to verify it.
+    """
+
+    def __init__(
+        self,
+        algorithm: str = DEFAULT_ALGORITHM,
+        executor: Optional[Executor] = None,
+        leaf_bytes: int = TREE_LEAF_BYTES,
+    ):
+        self.algorithm = algorithm
+        self._executor = executor
+        self._leaf_bytes = leaf_bytes
+
+        # Flat hash, or the hash of the leaf that is being filled
+        self._hash = _new_hash(algorithm)
+        self._leaf_filled = 0
+        self._leaves: List[Future | bytes] = []
+
+    @property
+    def is_tree(self) -> bool:
+        return self._executor is not None
+
+    def update(self, data) -> None:
+        view = memoryview(data).cast("B")
+
+        if not self.is_tree:
+            self._hash.update(view)
+            return
+
+        while len(view) > 0:
+            if self._leaf_filled == 0 and len(view) >= self._leaf_bytes:
+                # Whole leaves are hashed on the executor without copying
+                leaf, view = view[: self._leaf_bytes], view[self._leaf_bytes :]
+                self._leaves.append(
+                    self._executor.submit(_hash_leaf, self.algorithm, leaf)
+                )
+                continue
+
+            # A leaf spread over several chunks is hashed as it arrives
+            take = min(len(view), self._leaf_bytes - self._leaf_filled)
+            self._hash.update(view[:take])
+            self._leaf_filled += take
+            view = view[take:]
+
+            if self._leaf_filled == self._leaf_bytes:
+                self._finish_partial_leaf()
+
+    def hexdigest(self) -> str:
+        if not self.is_tree:
+            digest = self._hash.hexdigest()
+            if self.algorithm == DEFAULT_ALGORITHM:
+                return digest
+            return f"{self.algorithm}:{digest}"
+
+        if self._leaf_filled > 0:
+            self._finish_partial_leaf()
+
+        root = _new_hash(self.algorithm)
+        for leaf in self._leaves:
+            root.update(leaf.result() if isinstance(leaf, Future) else leaf)
+        return f"{self.algorithm}-tree:{root.hexdigest()}"
+
+    def _finish_partial_leaf(self) -> None:
+        self._leaves.append(self._hash.digest())
+        self._hash = _new_hash(self.algorithm)
+        self._leaf_filled = 0
+
+
+@dataclass(frozen=True)
+class ChecksumMethod:
+    """How capture checksums are computed, shared by every stage that hashes."""
+
+    algorithm: str = DEFAULT_ALGORITHM
+
+    # Enables parallel tree hashing on this executor
+    tree_executor: Optional[Executor] = None
+
+    def __post_init__(self):
+        # Fail at startup rather than on the first capture
+        _new_hash(self.algorithm)
+
+    def create(self) -> Checksummer:
+        return Checksummer(self.algorithm, self.tree_executor)
+
+
+def write_and_hash(
+    path: Path,
+    data,
+    method: ChecksumMethod,
+    chunk_bytes: int = WRITE_CHUNK_BYTES,
+) -> Tuple[str, float]:
+    """
+    Writes `data` to `path` and checksums it in the same pass, so each chunk
+    is hashed while it is still in cache. A tree hash instead runs on its
+    executor alongside the write. Returns the checksum and the time spent
+    in seconds.
+    """
+    start = time.monotonic()
+    checksummer = method.create()
+    with open(path, "wb") as f:
+        write_hashed(f, data, checksummer, chunk_bytes)
+
+    checksum = checksummer.hexdigest()
+    return checksum, time.monotonic() - start
+
+
+def write_hashed(
+    f: BinaryIO,
+    data,
+    checksummer: Optional[Checksummer],
+    chunk_bytes: int = WRITE_CHUNK_BYTES,
+) -> None:
+    """
+    Writes `data` at the current position of `f`, feeding each chunk to
+    `checksummer` (if any) right after it is written.
+    """
+    view = memoryview(data).cast("B")
+    hash_chunks = checksummer is not None and not checksummer.is_tree
+
+    if checksummer is not None and checksummer.is_tree:
+        # Leaves are hashed on the executor while the file is being written
+        checksummer.update(view)
+
+    for offset in range(0, len(view), chunk_bytes):
+        chunk = view[offset : offset + chunk_bytes]
+        f.write(chunk)
+        if hash_chunks:
+            checksummer.update(chunk)
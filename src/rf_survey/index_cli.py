@@ -0,0 +1,110 @@
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from rf_survey.capture_index import DEFAULT_QUERY_LIMIT, CaptureIndex
+from rf_survey.cli import positive_int_float
+from rf_survey.config import AppSettings
+
+
+def iso_datetime(value: str) -> datetime:
+    """Parse an ISO 8601 time for argparse, naive times are UTC."""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not an ISO 8601 time.")
+
+
+def parse_args(settings: AppSettings, argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Look up stored captures in the local capture index.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=settings.index_path,
+        help="Index database. Env: RF_INDEX_PATH",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query = commands.add_parser(
+        "query",
+        help="List the captures in a frequency range and time window.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    query.add_argument(
+        "--min-freq", type=positive_int_float, help="Lowest center frequency in Hz."
+    )
+    query.add_argument(
+        "--max-freq", type=positive_int_float, help="Highest center frequency in Hz."
+    )
+    query.add_argument(
+        "--start", type=iso_datetime, help="Earliest capture time (ISO 8601)."
+    )
+    query.add_argument(
+        "--end", type=iso_datetime, help="Latest capture time, excluded."
+    )
+    query.add_argument("--checksum", help="Only the capture with this checksum.")
+    query.add_argument("--limit", type=positive_int_float, default=DEFAULT_QUERY_LIMIT)
+    query.add_argument(
+        "--json",
+        action="store_true",
+        help="Print each capture's indexed fields as a JSON line instead of its path.",
+    )
+
+    rebuild = commands.add_parser(
+        "rebuild",
+        help="Recreate the index from the capture files and their sidecars.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    rebuild.add_argument(
+        "--storage",
+        type=Path,
+        default=Path(settings.STORAGE_PATH),
+        help="Directory holding the captures. Env: RF_STORAGE_PATH",
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(AppSettings(), argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    if args.command == "query" and not args.index.exists():
+        print(f"No capture index at {args.index}", file=sys.stderr)
+        return 1
+
+    index = CaptureIndex(args.index)
+    try:
+        if args.command == "rebuild":
+            index.rebuild(args.storage)
+            return 0
+
+        start = time.monotonic()
+        entries = index.query(
+            min_freq_hz=args.min_freq,
+            max_freq_hz=args.max_freq,
+            start=args.start,
+            end=args.end,
+            checksum=args.checksum,
+            limit=args.limit,
+        )
+        for entry in entries:
+            print(entry.model_dump_json() if args.json else entry.source_path)
+        print(
+            f"{len(entries)} captures in {(time.monotonic() - start) * 1e3:.1f} ms",
+            file=sys.stderr,
+        )
+        return 0
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
-from typing import Protocol
+from concurrent.futures import Executor
+from typing import Any, Callable, Mapping, Optional, Protocol
 
 from rf_survey.models import SweepConfig, ReceiverConfig
+from rf_survey.signal_stats import SignalStats
 
 
 class IMetrics(Protocol):
@@ -10,12 +12,57 @@ class IMetrics(Protocol):
 
     def update_temperature(self, temp_c: float) -> None: ...
 
-    def update_queue_size(self, size: int) -> None: ...
+    def update_queue_size(self, size: int, nbytes: int) -> None: ...
+
+    def increment_captures_spilled(self) -> None: ...
+
+    def increment_captures_degraded(self) -> None: ...
+
+    def increment_captures_dropped(self, reason: str) -> None: ...
+
+    def observe_triage_decision(self, action: str, bytes_saved: int) -> None: ...
+
+    def update_buffer_pool(self, in_use: int, capacity: int) -> None: ...
+
+    def update_executor(
+        self, name: str, queue_depth: int, active_threads: int
+    ) -> None: ...
+
+    def update_outbox_lag(self, lag: int) -> None: ...
+
+    def observe_stage_latency(self, stage: str, duration_sec: float) -> None: ...
+
+    def observe_signal_stats(
+        self, band: str, stats: SignalStats, cost_ratio: float
+    ) -> None: ...
+
+    def observe_stage_throughput(
+        self, stage: str, num_bytes: int, duration_sec: float
+    ) -> None: ...
+
+    def observe_compression(
+        self, codec: str, raw_bytes: int, compressed_bytes: int, duration_sec: float
+    ) -> None: ...
+
+    def observe_capture_start_lateness(self, lateness_sec: float) -> None: ...
+
+    def observe_receiver_reconfiguration(
+        self, duration_sec: float, full_reset: bool
+    ) -> None: ...
+
+    def observe_reconfiguration_apply(self, duration_sec: float) -> None: ...
 
     def update_sweep_config(self, sweep_config: SweepConfig) -> None: ...
 
     def update_receiver_config(self, receiver_config: ReceiverConfig) -> None: ...
 
+    def add_json_route(
+        self,
+        path: str,
+        provider: Callable[[Mapping[str, str]], Any],
+        executor: Optional[Executor] = None,
+    ) -> None: ...
+
     async def run(self) -> None: ...
 
 
@@ -8,11 +8,15 @@ from rf_shared.logger import setup_logging
 from rf_shared.nats_client import NatsProducer
 
 from rf_survey.app_builder import SurveyAppBuilder
+from rf_survey.buffer_pool import required_pool_size
 from rf_survey.config import app_settings
 from rf_survey.cli import update_settings_from_args
+from rf_survey.executors import InstrumentedThreadPoolExecutor
+from rf_survey.hashing import ChecksumMethod
 from rf_survey.metrics import Metrics
 from rf_survey.receiver import Receiver
 from rf_survey.models import ApplicationInfo, SweepConfig, ReceiverConfig
+from rf_survey.tuning_cache import TuningCache
 from rf_survey.watchdog import ApplicationWatchdog
 
 
@@ -53,6 +57,7 @@ async def run():
         step_hz=settings.BANDWIDTH,
         cycles=settings.CYCLES,
         records_per_step=settings.RECORDS,
+        continuous_records=settings.CONTINUOUS_RECORDS,
         interval_sec=settings.TIMER,
         max_jitter_sec=settings.JITTER,
     )
@@ -63,20 +68,69 @@ async def run():
         duration_sec=settings.DURATION_SEC,
     )
 
+    tuning_cache = TuningCache(
+        path=Path(settings.TUNING_CACHE_PATH) if settings.TUNING_CACHE_PATH else None
+    )
+    tuning_cache.load()
+
+    # A single thread owns the USRP, file I/O gets its own pool so a slow
+    # write can never hold up a capture
+    hardware_executor = InstrumentedThreadPoolExecutor("hardware", max_workers=1)
+    io_executor = InstrumentedThreadPoolExecutor("io", max_workers=settings.IO_THREADS)
+    # One thread per worker, spills and serialization must not queue behind them
+    processing_executor = InstrumentedThreadPoolExecutor(
+        "processing", max_workers=settings.PROCESSING_WORKERS
+    )
+
+    hash_executor = None
+    if settings.CHECKSUM_TREE_THREADS > 0:
+        hash_executor = InstrumentedThreadPoolExecutor(
+            "hash", max_workers=settings.CHECKSUM_TREE_THREADS
+        )
+    checksum_method = ChecksumMethod(
+        algorithm=settings.CHECKSUM_ALGORITHM, tree_executor=hash_executor
+    )
+
+    buffer_pool_size = settings.BUFFER_POOL_SIZE
+    if not settings.STREAM_TO_DISK:
+        # Every record of a continuous dwell needs a buffer while the workers hold theirs
+        buffer_pool_size = max(
+            buffer_pool_size,
+            required_pool_size(
+                sweep_config.records_per_capture, settings.PROCESSING_WORKERS
+            ),
+        )
+
     receiver = Receiver(
         receiver_config=receiver_config,
+        buffer_pool_size=buffer_pool_size,
+        stream_dir=app_info.output_path if settings.STREAM_TO_DISK else None,
+        chunk_samples=settings.STREAM_CHUNK_SAMPLES,
+        tuning_cache=tuning_cache,
+        executor=hardware_executor,
+        checksum_method=checksum_method,
+        otw_format=settings.SAMPLE_FORMAT,
     )
 
+    nats_connect_options = {
+        "servers": settings.NATS_URL,
+        "token": settings.NATS_TOKEN.get_secret_value()
+        if settings.NATS_TOKEN
+        else None,
+    }
+
     producer = NatsProducer(
         subject=settings.NATS_SUBJECT,
-        connect_options={
-            "servers": settings.NATS_URL,
-            "token": settings.NATS_TOKEN.get_secret_value()
-            if settings.NATS_TOKEN
-            else None,
-        },
+        connect_options=nats_connect_options,
     )
 
+    products_producer = None
+    if settings.products_enabled:
+        products_producer = NatsProducer(
+            subject=settings.NATS_PRODUCTS_SUBJECT,
+            connect_options=nats_connect_options,
+        )
+
     watchdog = ApplicationWatchdog(
         timeout_seconds=30,
     )
@@ -88,6 +142,10 @@ async def run():
         receiver=receiver,
         producer=producer,
         watchdog=watchdog,
+        io_executor=io_executor,
+        processing_executor=processing_executor,
+        checksum_method=checksum_method,
+        products_producer=products_producer,
     )
 
     if settings.METRICS_ENABLED:
@@ -99,7 +157,15 @@ async def run():
 
     app = await app_builder.build()
 
-    await app.run()
+    try:
+        await app.run()
+    finally:
+        hardware_executor.shutdown(wait=False, cancel_futures=True)
+        # Let in-flight writes finish so no capture file is left truncated
+        processing_executor.shutdown(wait=True)
+        io_executor.shutdown(wait=True)
+        if hash_executor is not None:
+            hash_executor.shutdown(wait=True)
 
 
 def main():
@@ -1,10 +1,13 @@
 import asyncio
 import logging
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Mapping, Optional, Tuple
 from aiohttp import web
 from prometheus_client.aiohttp import make_aiohttp_handler
-from prometheus_client import CollectorRegistry, Gauge
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
 
 from rf_survey.models import ApplicationInfo, SweepConfig, ReceiverConfig
+from rf_survey.signal_stats import SignalStats
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +16,10 @@ class Metrics:
     def __init__(self, app_info: ApplicationInfo, listen_port: int = 9090):
         self.registry = CollectorRegistry()
         self._listen_port = listen_port
+        # Extra JSON endpoints served next to /metrics
+        self._json_routes: List[
+            Tuple[str, Callable[[Mapping[str, str]], Any], Optional[Executor]]
+        ] = []
 
         self.build_info = Gauge(
             "rf_survey_build_info",
@@ -37,6 +44,195 @@ class Metrics:
             "Number of items in the processing queue",
             registry=self.registry,
         )
+        self.processing_queue_bytes = Gauge(
+            "rf_survey_processing_queue_bytes",
+            "IQ bytes held in memory by the processing queue",
+            registry=self.registry,
+        )
+        self.captures_spilled = Counter(
+            "rf_survey_captures_spilled_total",
+            "Captures written to the spool because the processing queue was full",
+            registry=self.registry,
+        )
+        self.captures_degraded = Counter(
+            "rf_survey_captures_degraded_total",
+            "Captures truncated to fit in the processing queue",
+            registry=self.registry,
+        )
+        self.captures_dropped = Counter(
+            "rf_survey_captures_dropped_total",
+            "Captures dropped because the processing queue was full",
+            ["reason"],
+            registry=self.registry,
+        )
+        self.triage_decisions = Counter(
+            "rf_survey_triage_decisions_total",
+            "Captures by how much of their IQ triage kept",
+            ["action"],
+            registry=self.registry,
+        )
+        self.triage_bytes_saved = Counter(
+            "rf_survey_triage_bytes_saved_total",
+            "IQ bytes not stored because triage found the capture quiet",
+            registry=self.registry,
+        )
+
+        # Capture buffer pool
+        self.capture_buffers_in_use = Gauge(
+            "rf_survey_capture_buffers_in_use",
+            "Number of pooled capture buffers currently leased to captures",
+            registry=self.registry,
+        )
+        self.capture_buffers_total = Gauge(
+            "rf_survey_capture_buffers_total",
+            "Total number of preallocated capture buffers",
+            registry=self.registry,
+        )
+
+        # Executors
+        self.executor_queue_depth = Gauge(
+            "rf_survey_executor_queue_depth",
+            "Work items waiting for a thread in each executor",
+            ["executor"],
+            registry=self.registry,
+        )
+        self.executor_active_threads = Gauge(
+            "rf_survey_executor_active_threads",
+            "Threads currently running a work item in each executor",
+            ["executor"],
+            registry=self.registry,
+        )
+
+        # Outbox
+        self.outbox_lag = Gauge(
+            "rf_survey_outbox_lag_messages",
+            "Messages written to the outbox but not yet published",
+            registry=self.registry,
+        )
+
+        # Per stage latency, to locate the bottleneck of the pipeline
+        self.stage_latency = Histogram(
+            "rf_survey_stage_latency_seconds",
+            "Time a capture spends in each stage of the processing pipeline",
+            ["stage"],
+            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0),
+            registry=self.registry,
+        )
+
+        # Per-capture signal statistics, grouped by band
+        self.capture_rms_dbfs = Histogram(
+            "rf_survey_capture_rms_dbfs",
+            "RMS power of each capture relative to ADC full scale",
+            ["band"],
+            buckets=(-90, -80, -70, -60, -50, -40, -30, -20, -10, -3, 0),
+            registry=self.registry,
+        )
+        self.capture_peak_dbfs = Histogram(
+            "rf_survey_capture_peak_dbfs",
+            "Peak sample magnitude of each capture relative to ADC full scale",
+            ["band"],
+            buckets=(-60, -50, -40, -30, -20, -10, -6, -3, -1, 0),
+            registry=self.registry,
+        )
+        self.capture_dc_offset_dbfs = Histogram(
+            "rf_survey_capture_dc_offset_dbfs",
+            "Power of the DC offset of each capture relative to ADC full scale",
+            ["band"],
+            buckets=(-120, -100, -90, -80, -70, -60, -50, -40, -30),
+            registry=self.registry,
+        )
+        self.capture_iq_gain_imbalance_db = Histogram(
+            "rf_survey_capture_iq_gain_imbalance_db",
+            "Power of I over power of Q in each capture",
+            ["band"],
+            buckets=(-1.0, -0.5, -0.2, -0.1, -0.05, 0.05, 0.1, 0.2, 0.5, 1.0),
+            registry=self.registry,
+        )
+        self.capture_iq_phase_imbalance_deg = Histogram(
+            "rf_survey_capture_iq_phase_imbalance_degrees",
+            "Phase error between I and Q in each capture",
+            ["band"],
+            buckets=(-5.0, -2.0, -1.0, -0.5, -0.1, 0.1, 0.5, 1.0, 2.0, 5.0),
+            registry=self.registry,
+        )
+        self.capture_saturation_fraction = Histogram(
+            "rf_survey_capture_saturation_fraction",
+            "Fraction of the samples of each capture at the ADC rails",
+            ["band"],
+            buckets=(0, 1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 0.1, 1.0),
+            registry=self.registry,
+        )
+        self.signal_stats_cost_ratio = Histogram(
+            "rf_survey_signal_stats_cost_ratio",
+            "CPU time spent on the signal statistics over the capture length",
+            buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+            registry=self.registry,
+        )
+
+        # Processing stage throughput
+        self.stage_bytes = Counter(
+            "rf_survey_stage_bytes_total",
+            "Bytes output by each processing stage",
+            ["stage"],
+            registry=self.registry,
+        )
+        self.stage_seconds = Counter(
+            "rf_survey_stage_seconds_total",
+            "Time spent in each processing stage",
+            ["stage"],
+            registry=self.registry,
+        )
+        self.stage_throughput = Gauge(
+            "rf_survey_stage_throughput_bytes_per_second",
+            "Throughput of the last item through each processing stage",
+            ["stage"],
+            registry=self.registry,
+        )
+
+        # Compression of stored captures
+        self.compression_ratio = Histogram(
+            "rf_survey_compression_ratio",
+            "Raw over compressed size of each stored capture",
+            ["codec"],
+            buckets=(1.0, 1.1, 1.25, 1.5, 1.75, 2.0, 2.5, 3.0, 4.0, 8.0),
+            registry=self.registry,
+        )
+        self.compression_throughput = Histogram(
+            "rf_survey_compression_throughput_bytes_per_second",
+            "Raw bytes compressed per second for each stored capture",
+            ["codec"],
+            buckets=(1e6, 5e6, 1e7, 2.5e7, 5e7, 1e8, 2.5e8, 5e8, 1e9),
+            registry=self.registry,
+        )
+        self.compression_bytes_saved = Counter(
+            "rf_survey_compression_bytes_saved_total",
+            "IQ bytes not written thanks to compression",
+            registry=self.registry,
+        )
+
+        # Capture scheduling
+        self.capture_start_lateness_sec = Histogram(
+            "rf_survey_capture_start_lateness_seconds",
+            "Delay between the scheduled interval boundary and the first sample of a capture",
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+            registry=self.registry,
+        )
+
+        # Receiver reconfiguration
+        self.receiver_reconfiguration_sec = Histogram(
+            "rf_survey_receiver_reconfiguration_seconds",
+            "Time taken to apply a new receiver configuration to the hardware",
+            ["mode"],
+            buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+            registry=self.registry,
+        )
+
+        self.reconfiguration_apply_sec = Histogram(
+            "rf_survey_reconfiguration_apply_seconds",
+            "Time from receiving a pending ZMS configuration to having it applied",
+            buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+            registry=self.registry,
+        )
 
         # Sweep Config
         self.config_start_hz = Gauge(
@@ -69,6 +265,11 @@ class Metrics:
             "Number of records to capture at each frequency step",
             registry=self.registry,
         )
+        self.config_continuous_records = Gauge(
+            "rf_survey_config_continuous_records",
+            "Whether records at a step are captured from one continuous stream",
+            registry=self.registry,
+        )
         self.config_max_jitter_sec = Gauge(
             "rf_survey_config_max_jitter_sec",
             "Maximum random delay to add before a capture in seconds",
@@ -96,9 +297,91 @@ class Metrics:
         """Updates the temperature gauge."""
         self.usrp_temperature.set(temp_c)
 
-    def update_queue_size(self, size: int):
-        """Updates the processing queue size gauge."""
+    def update_queue_size(self, size: int, nbytes: int):
+        """Updates the processing queue size gauges."""
         self.processing_queue_size.set(size)
+        self.processing_queue_bytes.set(nbytes)
+
+    def increment_captures_spilled(self):
+        self.captures_spilled.inc()
+
+    def increment_captures_degraded(self):
+        self.captures_degraded.inc()
+
+    def increment_captures_dropped(self, reason: str):
+        self.captures_dropped.labels(reason=reason).inc()
+
+    def observe_triage_decision(self, action: str, bytes_saved: int):
+        self.triage_decisions.labels(action=action).inc()
+        self.triage_bytes_saved.inc(bytes_saved)
+
+    def update_buffer_pool(self, in_use: int, capacity: int):
+        """Updates the capture buffer pool occupancy gauges."""
+        self.capture_buffers_in_use.set(in_use)
+        self.capture_buffers_total.set(capacity)
+
+    def update_executor(self, name: str, queue_depth: int, active_threads: int):
+        """Updates the queue depth and active thread gauges of an executor."""
+        self.executor_queue_depth.labels(executor=name).set(queue_depth)
+        self.executor_active_threads.labels(executor=name).set(active_threads)
+
+    def update_outbox_lag(self, lag: int):
+        self.outbox_lag.set(lag)
+
+    def observe_stage_latency(self, stage: str, duration_sec: float):
+        self.stage_latency.labels(stage=stage).observe(duration_sec)
+
+    def observe_signal_stats(self, band: str, stats: SignalStats, cost_ratio: float):
+        """Records the statistics of a capture and what computing them cost."""
+        self.capture_rms_dbfs.labels(band=band).observe(stats.rms_dbfs)
+        self.capture_peak_dbfs.labels(band=band).observe(stats.peak_dbfs)
+        self.capture_dc_offset_dbfs.labels(band=band).observe(stats.dc_offset_dbfs)
+        self.capture_iq_gain_imbalance_db.labels(band=band).observe(
+            stats.iq_gain_imbalance_db
+        )
+        self.capture_iq_phase_imbalance_deg.labels(band=band).observe(
+            stats.iq_phase_imbalance_deg
+        )
+        self.capture_saturation_fraction.labels(band=band).observe(
+            stats.saturation_fraction
+        )
+        self.signal_stats_cost_ratio.observe(cost_ratio)
+
+    def observe_stage_throughput(self, stage: str, num_bytes: int, duration_sec: float):
+        """Records the bytes a processing stage output and how long it took."""
+        self.stage_bytes.labels(stage=stage).inc(num_bytes)
+        self.stage_seconds.labels(stage=stage).inc(duration_sec)
+        if duration_sec > 0:
+            self.stage_throughput.labels(stage=stage).set(num_bytes / duration_sec)
+
+    def observe_compression(
+        self, codec: str, raw_bytes: int, compressed_bytes: int, duration_sec: float
+    ):
+        """Records how well and how fast a capture was compressed."""
+        self.compression_ratio.labels(codec=codec).observe(
+            raw_bytes / max(compressed_bytes, 1)
+        )
+        if duration_sec > 0:
+            self.compression_throughput.labels(codec=codec).observe(
+                raw_bytes / duration_sec
+            )
+        self.compression_bytes_saved.inc(max(raw_bytes - compressed_bytes, 0))
+
+    def observe_capture_start_lateness(self, lateness_sec: float):
+        """Records how late a capture started against its scheduled boundary."""
+        self.capture_start_lateness_sec.observe(lateness_sec)
+
+    def observe_receiver_reconfiguration(self, duration_sec: float, full_reset: bool):
+        """
+        Records reconfiguration latency, labelled by whether only the changed
+        settings were applied ("delta") or the hardware was re-initialized ("full").
+        """
+        mode = "full" if full_reset else "delta"
+        self.receiver_reconfiguration_sec.labels(mode=mode).observe(duration_sec)
+
+    def observe_reconfiguration_apply(self, duration_sec: float):
+        """Records the time from a pending configuration to it being applied."""
+        self.reconfiguration_apply_sec.observe(duration_sec)
 
     def update_sweep_config(self, sweep_config: SweepConfig):
         """
@@ -111,6 +394,7 @@ class Metrics:
         self.config_records_per_step.set(sweep_config.records_per_step)
         self.config_interval_sec.set(sweep_config.interval_sec)
         self.config_max_jitter_sec.set(sweep_config.max_jitter_sec)
+        self.config_continuous_records.set(int(sweep_config.continuous_records))
 
     def update_receiver_config(self, receiver_config: ReceiverConfig):
         """
@@ -120,11 +404,27 @@ class Metrics:
         self.receiver_config_bandwidth_hz.set(receiver_config.bandwidth_hz)
         self.receiver_config_duration_sec.set(receiver_config.duration_sec)
 
+    def add_json_route(
+        self,
+        path: str,
+        provider: Callable[[Mapping[str, str]], Any],
+        executor: Optional[Executor] = None,
+    ) -> None:
+        """
+        Serves the result of `provider`, called with the query parameters, as
+        JSON at `path`. A provider that blocks, e.g. on a database, is given
+        an `executor` to run on instead of the event loop. Must be called
+        before run().
+        """
+        self._json_routes.append((path, provider, executor))
+
     async def run(self):
         app = web.Application()
         metrics_handler = make_aiohttp_handler(registry=self.registry)
 
         app.router.add_get("/metrics", metrics_handler)
+        for path, provider, executor in self._json_routes:
+            app.router.add_get(path, self._json_handler(provider, executor))
 
         runner = web.AppRunner(app)
         await runner.setup()
@@ -138,6 +438,24 @@ class Metrics:
             await runner.cleanup()
             logger.info("Metrics server shut down.")
 
+    @staticmethod
+    def _json_handler(
+        provider: Callable[[Mapping[str, str]], Any], executor: Optional[Executor]
+    ):
+        async def handler(request: web.Request) -> web.Response:
+            params = dict(request.query)
+            try:
+                if executor is None:
+                    result = provider(params)
+                else:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(executor, provider, params)
+                return web.json_response(result)
+            except ValueError as e:
+                raise web.HTTPBadRequest(reason=str(e))
+
+        return handler
+
 
 class NullMetrics:
     """A non-operational metrics client that satisfies the IMetrics interface."""
@@ -145,7 +463,57 @@ class NullMetrics:
     def update_temperature(self, temp_c: float) -> None:
         pass
 
-    def update_queue_size(self, size: int) -> None:
+    def update_queue_size(self, size: int, nbytes: int) -> None:
+        pass
+
+    def increment_captures_spilled(self) -> None:
+        pass
+
+    def increment_captures_degraded(self) -> None:
+        pass
+
+    def increment_captures_dropped(self, reason: str) -> None:
+        pass
+
+    def observe_triage_decision(self, action: str, bytes_saved: int) -> None:
+        pass
+
+    def update_buffer_pool(self, in_use: int, capacity: int) -> None:
+        pass
+
+    def update_executor(self, name: str, queue_depth: int, active_threads: int) -> None:
+        pass
+
+    def update_outbox_lag(self, lag: int) -> None:
+        pass
+
+    def observe_stage_latency(self, stage: str, duration_sec: float) -> None:
+        pass
+
+    def observe_signal_stats(
+        self, band: str, stats: SignalStats, cost_ratio: float
+    ) -> None:
+        pass
+
+    def observe_stage_throughput(
+        self, stage: str, num_bytes: int, duration_sec: float
+    ) -> None:
+        pass
+
+    def observe_compression(
+        self, codec: str, raw_bytes: int, compressed_bytes: int, duration_sec: float
+    ) -> None:
+        pass
+
+    def observe_capture_start_lateness(self, lateness_sec: float) -> None:
+        pass
+
+    def observe_receiver_reconfiguration(
+        self, duration_sec: float, full_reset: bool
+    ) -> None:
+        pass
+
+    def observe_reconfiguration_apply(self, duration_sec: float) -> None:
         pass
 
     def update_sweep_config(self, sweep_config: SweepConfig) -> None:
@@ -154,6 +522,14 @@ class NullMetrics:
     def update_receiver_config(self, receiver_config: ReceiverConfig) -> None:
         pass
 
+    def add_json_route(
+        self,
+        path: str,
+        provider: Callable[[Mapping[str, str]], Any],
+        executor: Optional[Executor] = None,
+    ) -> None:
+        pass
+
     async def run(self) -> None:
         logger.warning("Using NullMetrics. Prometheus monitoring is disabled.")
         pass
@@ -0,0 +1,86 @@
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from rf_survey.capture_index import CaptureIndex
+from rf_survey.cli import positive_int_float
+from rf_survey.config import AppSettings
+from rf_survey.storage_layout import StorageLayout, migrate_flat_archive
+
+
+def parse_args(settings: AppSettings, argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Move a flat capture archive into the configured storage layout.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--storage",
+        type=Path,
+        default=Path(settings.STORAGE_PATH),
+        help="Root of the layout. Env: RF_STORAGE_PATH",
+    )
+    parser.add_argument(
+        "--source",
+        type=Path,
+        help="Flat directory to move captures from, the storage root by default.",
+    )
+    parser.add_argument(
+        "--layout",
+        default=settings.STORAGE_LAYOUT,
+        help="Subdirectory template, e.g. '{year}/{month}/{day}/{hour}/{band}'. "
+        "Env: RF_STORAGE_LAYOUT",
+    )
+    parser.add_argument(
+        "--band-width",
+        type=positive_int_float,
+        default=settings.STORAGE_BAND_WIDTH_HZ,
+        help="Width of the {band} directories in Hz. Env: RF_STORAGE_BAND_WIDTH_HZ",
+    )
+    parser.add_argument(
+        "--workers",
+        type=positive_int_float,
+        default=8,
+        help="Captures moved in parallel.",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only log what would be moved."
+    )
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="Rebuild the capture index from the moved files afterwards.",
+    )
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=settings.index_path,
+        help="Capture index rebuilt by --reindex. Env: RF_INDEX_PATH",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(AppSettings(), argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    try:
+        layout = StorageLayout(args.storage, args.layout, args.band_width)
+        result = migrate_flat_archive(layout, args.source, args.workers, args.dry_run)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    if args.reindex and not args.dry_run:
+        index = CaptureIndex(args.index)
+        try:
+            index.rebuild(args.storage)
+        finally:
+            index.close()
+
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,16 @@ import asyncio
 import datetime
 import logging
 import threading
-import numpy as np
-from typing import Optional
+from typing import List, Optional
 
-from rf_survey.models import ReceiverConfig, RawCapture, CaptureResult
+from rf_survey.buffer_pool import CaptureBufferPool
+from rf_survey.models import (
+    ReceiverConfig,
+    RawCapture,
+    CaptureResult,
+    CaptureAbortedError,
+)
+from rf_survey.tuning_cache import TuningCache
 
 logger = logging.getLogger(__name__)
 
@@ -19,10 +25,18 @@ class Receiver:
     def __init__(
         self,
         receiver_config: ReceiverConfig,
+        buffer_pool_size: int = 3,
+        tuning_cache: Optional[TuningCache] = None,
         **kwargs,
     ):
         self.config = receiver_config
+        self.executor = None
+        self.tuning_cache = tuning_cache or TuningCache()
+        self.buffer_pool = CaptureBufferPool(
+            num_samples=receiver_config.num_samples, size=buffer_pool_size
+        )
         self._hardware_lock = threading.Lock()
+        self._abort_event = asyncio.Event()
         self.serial = "MOCK-SERIAL-123"
         self.hostname = "mock-host"  # Needed for processing step
         logger.info("--- MockReceiver created ---")
@@ -32,14 +46,37 @@ class Receiver:
         """Simulates the one-time hardware initialization."""
         logger.info("MockReceiver: initialize() called.")
 
-    async def reconfigure(self, new_config: ReceiverConfig) -> None:
+    async def reconfigure(self, new_config: ReceiverConfig) -> bool:
         """Simulates applying a new configuration."""
         logger.info(f"MockReceiver: reconfigure() called with new config: {new_config}")
         with self._hardware_lock:
-            logger.info("Simulating hardware hard reset delay...")
-            await asyncio.sleep(0.1)  # Simulate the blocking part
+            logger.info("Simulating setter delay...")
+            await asyncio.sleep(0.01)  # Simulate the blocking part
             self.config = new_config
+            self.buffer_pool.resize(new_config.num_samples)
             logger.info("MockReceiver: Reconfiguration complete.")
+            return False
+
+    async def reset(self) -> None:
+        """Simulates a full hardware re-initialization."""
+        logger.info("MockReceiver: reset() called.")
+        with self._hardware_lock:
+            logger.info("Simulating hardware hard reset delay...")
+            await asyncio.sleep(0.1)  # Simulate the blocking part
+            logger.info("MockReceiver: Reset complete.")
+
+    async def prepare_frequency(self, center_freq_hz: int) -> None:
+        """Simulates tuning ahead of a capture."""
+        logger.info(
+            f"MockReceiver: prepare_frequency() for frequency {center_freq_hz / 1e6:.2f} MHz."
+        )
+
+    def abort_captures(self) -> None:
+        logger.info("MockReceiver: abort_captures() called.")
+        self._abort_event.set()
+
+    def clear_abort(self) -> None:
+        self._abort_event.clear()
 
     async def receive_samples(self, center_freq_hz: int) -> CaptureResult:
         """
@@ -53,15 +90,28 @@ class Receiver:
             # Simulate the blocking work of a capture
             capture_duration = self.config.duration_sec
             logger.debug(f"Simulating a capture of {capture_duration:.3f} seconds...")
-            await asyncio.sleep(capture_duration)
+            try:
+                await asyncio.wait_for(
+                    self._abort_event.wait(), timeout=capture_duration
+                )
+                raise CaptureAbortedError("Mock capture aborted")
+            except asyncio.TimeoutError:
+                pass
 
             logger.info("MockReceiver: Capture complete. Building RawCapture object.")
 
-            # Create a buffer of fake data with the correct size and dtype
-            mock_buffer = np.zeros(self.config.num_samples, dtype=np.int32)
+            # Lease a buffer and fill it with fake data. Waiting for one blocks,
+            # so it runs off the event loop as in the real Receiver
+            loop = asyncio.get_running_loop()
+            lease = await loop.run_in_executor(
+                self.executor, lambda: self.buffer_pool.acquire(timeout=1.0)
+            )
+            mock_buffer = lease.buffer[: self.config.num_samples]
+            mock_buffer.fill(0)
 
             raw_capture = RawCapture(
-                iq_data_bytes=mock_buffer.tobytes(),
+                iq_data=mock_buffer,
+                buffer_lease=lease,
                 center_freq_hz=center_freq_hz,
                 # For now, use datetime.now() as requested.
                 capture_timestamp=datetime.datetime.now(datetime.timezone.utc),
@@ -69,5 +119,16 @@ class Receiver:
 
             return CaptureResult(raw_capture, self.config)
 
+    async def receive_records(
+        self, center_freq_hz: int, num_records: int
+    ) -> List[CaptureResult]:
+        """
+        Simulates a continuous dwell by capturing the records back-to-back.
+        """
+        results = []
+        for _ in range(num_records):
+            results.append(await self.receive_samples(center_freq_hz))
+        return results
+
     async def get_temperature(self) -> Optional[float]:
         return 12.5
@@ -1,10 +1,15 @@
 import random
-from dataclasses import dataclass
+import time
+import numpy as np
+from dataclasses import dataclass, field
 from pathlib import Path
 from pydantic import BaseModel, Field, model_validator
 from uuid import uuid4
 from datetime import datetime
+from typing import Optional, Union
 
+from rf_survey.buffer_pool import BufferLease
+from rf_survey.capture_file import StreamedCaptureFile, SpooledCaptureFile
 from rf_survey.utils.scheduler import calculate_wait_time
 from rf_survey.__about__ import __version__ as app_version
 
@@ -17,6 +22,8 @@ class SweepConfig(BaseModel):
     records_per_step: int
     interval_sec: int
     max_jitter_sec: float
+    # Capture all records of a step back-to-back from one stream
+    continuous_records: bool = False
 
     @model_validator(mode="after")
     def end_must_be_gte_start(self) -> "SweepConfig":
@@ -24,6 +31,20 @@ class SweepConfig(BaseModel):
             raise ValueError("end_hz cannot be less than start_hz")
         return self
 
+    @property
+    def records_per_capture(self) -> int:
+        """Records one capture returns, a continuous dwell takes the whole step."""
+        if self.continuous_records and self.records_per_step > 1:
+            return self.records_per_step
+        return 1
+
+    @property
+    def num_steps(self) -> int:
+        """Center frequencies visited by one sweep."""
+        if self.step_hz <= 0:
+            return 1
+        return (self.end_hz - self.start_hz) // self.step_hz + 1
+
     def next_collection_wait_duration(self) -> float:
         """
         Calculates the total time to wait until the next collection,
@@ -41,6 +62,7 @@ class ReceiverConfig(BaseModel):
     gain_db: int = Field(..., ge=0, le=76)
     bandwidth_hz: int = Field(..., gt=0)
     duration_sec: float = Field(..., gt=0)
+    antenna: str = "RX2"
 
     @property
     def num_samples(self) -> int:
@@ -53,8 +75,9 @@ class RawCapture:
     Holds the direct, unprocessed output of a single hardware capture.
     """
 
-    # The raw binary data, ready to be saved to a file.
-    iq_data_bytes: bytes
+    # Zero-copy view of the raw sc16 samples (one int32 per complex sample),
+    # ready to be saved to a file.
+    iq_data: np.ndarray
 
     # The exact center frequency used for this capture.
     center_freq_hz: int
@@ -62,6 +85,41 @@ class RawCapture:
     # The precise hardware timestamp of the first sample.
     capture_timestamp: datetime
 
+    # Lease on the pooled buffer backing iq_data, if any.
+    buffer_lease: Optional[BufferLease] = None
+
+    # Set instead of a lease when the samples were streamed straight to a
+    # file or spilled to the spool, which is then already written and checksummed.
+    capture_file: Optional[Union[StreamedCaptureFile, SpooledCaptureFile]] = None
+
+    @property
+    def resident_bytes(self) -> int:
+        """Memory held by the samples, file backed captures only hold page cache."""
+        return 0 if self.capture_file is not None else self.iq_data.nbytes
+
+    def release(self) -> None:
+        """
+        Returns the backing buffer to its pool. iq_data must not be used afterwards.
+        """
+        if self.buffer_lease is not None:
+            self.buffer_lease.release()
+            self.buffer_lease = None
+
+        if self.capture_file is not None:
+            self.capture_file.release()
+
+    def discard(self) -> None:
+        """Releases the capture and deletes any file it was streamed to."""
+        if self.capture_file is not None:
+            self.capture_file.discard()
+        self.release()
+
+
+class CaptureAbortedError(Exception):
+    """Raised when a capture is stopped early, e.g. for a reconfiguration."""
+
+    pass
+
 
 @dataclass
 class CaptureResult:
@@ -71,6 +129,25 @@ class CaptureResult:
     receiver_config: ReceiverConfig
 
 
+@dataclass(frozen=True)
+class SweepPosition:
+    """Where a capture falls within its sweep."""
+
+    sweep_id: str
+    step_index: int
+    step_count: int
+    record_index: int
+    records_per_step: int
+
+    @property
+    def is_last(self) -> bool:
+        """Whether this is the final capture of the sweep."""
+        return (
+            self.step_index == self.step_count - 1
+            and self.record_index == self.records_per_step - 1
+        )
+
+
 @dataclass
 class ProcessingJob:
     """
@@ -81,6 +158,15 @@ class ProcessingJob:
     receiver_config_snapshot: ReceiverConfig
     sweep_config_snapshot: SweepConfig
 
+    # Capture order, used to publish records in order across workers
+    sequence: int
+
+    # Monotonic time the job was created, for queue latency
+    created_at: float = field(default_factory=time.monotonic)
+
+    # Unset for captures recovered from a spool written without it
+    sweep_position: Optional[SweepPosition] = None
+
 
 class ApplicationInfo(BaseModel):
     """
@@ -0,0 +1,259 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.1, 0.5, 0.9)
+
+
+class NoiseFloorKey(NamedTuple):
+    """Noise floors are only comparable at the same frequency, rate and gain."""
+
+    center_freq_hz: int
+    sample_rate_hz: int
+    gain_db: int
+
+
+@dataclass(frozen=True)
+class NoiseFloorConfig:
+    """Resolution and memory bounds of the noise floor tracker."""
+
+    # Bins each capture's spectrum is reduced to
+    bins_per_step: int = 32
+    # Range and resolution of the quantile histograms, in dBFS/Hz
+    min_db: float = -200.0
+    max_db: float = -40.0
+    resolution_db: float = 0.5
+    ema_alpha: float = 0.05
+    # Frequencies tracked, the least recently updated one is replaced beyond this
+    max_frequencies: int = 512
+    # Histogram counts are halved at this many captures, so old ones fade out
+    max_count: int = 10_000
+
+    def __post_init__(self):
+        if self.max_db <= self.min_db:
+            raise ValueError("max_db must be above min_db")
+        if not 0 < self.ema_alpha <= 1:
+            raise ValueError("ema_alpha must be in (0, 1]")
+
+    @property
+    def histogram_bins(self) -> int:
+        return int(np.ceil((self.max_db - self.min_db) / self.resolution_db))
+
+
+class NoiseFloorEstimate(BaseModel):
+    """The tracked noise floor at one frequency, one value per bin."""
+
+    center_freq_hz: int
+    sample_rate_hz: int
+    gain_db: int
+    captures: float
+    updated_at: float
+    # Bins are evenly spaced across the sample rate, lowest frequency first
+    bin_width_hz: float
+    p10_dbfs_hz: List[float]
+    p50_dbfs_hz: List[float]
+    p90_dbfs_hz: List[float]
+    ema_dbfs_hz: List[float]
+
+
+def pool_spectrum(psd_db: np.ndarray, bins: int) -> np.ndarray:
+    """
+    Reduces a spectrum to `bins` bins by the median of each group, which
+    follows the noise floor rather than the signals on top of it.
+    """
+    group = len(psd_db) // bins
+    if group == 0:
+        raise ValueError(f"Cannot reduce a {len(psd_db)} bin spectrum to {bins} bins")
+    # Leftover bins are split between both band edges
+    start = (len(psd_db) - group * bins) // 2
+    groups = psd_db[start : start + group * bins].reshape(bins, group)
+    return np.median(groups, axis=1)
+
+
+class NoiseFloorTracker:
+    """
+    Tracks the noise floor per frequency from the spectra of the captures.
+
+    Each frequency gets a histogram sketch per bin, from which the 10th,
+    50th and 90th percentile are read, and an exponential moving average.
+    All of it lives in arrays allocated up front, so memory does not grow
+    with the number of captures. The state can be snapshotted to a file
+    and loaded again on restart.
+
+    Safe to update from several processing workers at once.
+    """
+
+    def __init__(self, config: NoiseFloorConfig, path: Optional[Path] = None):
+        self.config = config
+        self.path = path
+        self._lock = threading.Lock()
+
+        slots, bins = config.max_frequencies, config.bins_per_step
+        self._counts = np.zeros((slots, bins, config.histogram_bins), dtype=np.float32)
+        self._ema = np.zeros((slots, bins), dtype=np.float32)
+        self._captures = np.zeros(slots, dtype=np.float64)
+        self._updated_at = np.zeros(slots, dtype=np.float64)
+        self._slots: Dict[NoiseFloorKey, int] = {}
+
+    def update(self, key: NoiseFloorKey, psd_db: np.ndarray) -> None:
+        """Adds the spectrum of one capture, in dBFS/Hz with DC centred."""
+        config = self.config
+        pooled = pool_spectrum(psd_db, config.bins_per_step)
+        histogram_bin = np.clip(
+            ((pooled - config.min_db) / config.resolution_db).astype(np.int64),
+            0,
+            config.histogram_bins - 1,
+        )
+
+        with self._lock:
+            slot = self._slot(key)
+            counts = self._counts[slot]
+            if self._captures[slot] >= config.max_count:
+                counts *= 0.5
+                self._captures[slot] *= 0.5
+
+            if self._captures[slot] == 0:
+                self._ema[slot] = pooled
+            else:
+                self._ema[slot] += config.ema_alpha * (pooled - self._ema[slot])
+
+            counts[np.arange(config.bins_per_step), histogram_bin] += 1
+            self._captures[slot] += 1
+            self._updated_at[slot] = time.time()
+
+    def estimate(self, key: NoiseFloorKey) -> Optional[NoiseFloorEstimate]:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                return None
+            return self._estimate(key, slot)
+
+    def estimates(
+        self, center_freq_hz: Optional[int] = None
+    ) -> List[NoiseFloorEstimate]:
+        """All tracked frequencies in frequency order, or only the given one."""
+        with self._lock:
+            return [
+                self._estimate(key, slot)
+                for key, slot in sorted(self._slots.items())
+                if center_freq_hz is None or key.center_freq_hz == center_freq_hz
+            ]
+
+    def query(self, params: Mapping[str, str]) -> List[Dict[str, Any]]:
+        """
+        Answers a request to the metrics server. Takes an optional `frequency`
+        parameter in Hz.
+        """
+        frequency = params.get("frequency")
+        estimates = self.estimates(None if frequency is None else int(frequency))
+        return [estimate.model_dump() for estimate in estimates]
+
+    def load(self) -> None:
+        """
+        Loads a snapshot. A missing, unreadable or differently configured
+        snapshot leaves the tracker empty.
+        """
+        if self.path is None or not self.path.exists():
+            return
+
+        try:
+            with np.load(self.path) as snapshot:
+                keys = [NoiseFloorKey(*map(int, key)) for key in snapshot["keys"]]
+                counts = snapshot["counts"]
+                ema = snapshot["ema"]
+                captures = snapshot["captures"]
+                updated_at = snapshot["updated_at"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable noise floor snapshot {self.path}: {e}")
+            return
+
+        if counts.shape[1:] != self._counts.shape[1:]:
+            logger.warning(
+                f"Ignoring noise floor snapshot {self.path}, "
+                "it was taken with different bins or histogram range."
+            )
+            return
+
+        # Keep the most recently updated ones if there are fewer slots now
+        keep = np.argsort(updated_at)[::-1][: self.config.max_frequencies]
+        with self._lock:
+            self._slots = {keys[old]: new for new, old in enumerate(keep)}
+            self._counts[: len(keep)] = counts[keep]
+            self._ema[: len(keep)] = ema[keep]
+            self._captures[: len(keep)] = captures[keep]
+            self._updated_at[: len(keep)] = updated_at[keep]
+        logger.info(f"Loaded the noise floor of {len(keep)} frequencies.")
+
+    def save(self) -> None:
+        """Atomically writes a snapshot to the configured file, if any."""
+        if self.path is None:
+            return
+
+        with self._lock:
+            slots = list(self._slots.values())
+            keys = np.array(list(self._slots.keys()), dtype=np.int64).reshape(-1, 3)
+            snapshot = dict(
+                keys=keys,
+                counts=self._counts[slots],
+                ema=self._ema[slots],
+                captures=self._captures[slots],
+                updated_at=self._updated_at[slots],
+            )
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save noise floor snapshot to {self.path}: {e}")
+
+    def _slot(self, key: NoiseFloorKey) -> int:
+        slot = self._slots.get(key)
+        if slot is not None:
+            return slot
+
+        if len(self._slots) < self.config.max_frequencies:
+            slot = len(self._slots)
+        else:
+            # Reuse the slot of the frequency updated longest ago
+            stale_key = min(self._slots, key=lambda k: self._updated_at[self._slots[k]])
+            slot = self._slots.pop(stale_key)
+            self._counts[slot] = 0
+            self._captures[slot] = 0
+
+        self._slots[key] = slot
+        return slot
+
+    def _estimate(self, key: NoiseFloorKey, slot: int) -> NoiseFloorEstimate:
+        config = self.config
+        cdf = np.cumsum(self._counts[slot], axis=1)
+        cdf /= np.maximum(cdf[:, -1:], 1e-12)
+
+        percentiles = []
+        for quantile in QUANTILES:
+            histogram_bin = np.argmax(cdf >= quantile, axis=1)
+            values = config.min_db + (histogram_bin + 0.5) * config.resolution_db
+            percentiles.append([round(float(v), 2) for v in values])
+
+        return NoiseFloorEstimate(
+            center_freq_hz=key.center_freq_hz,
+            sample_rate_hz=key.sample_rate_hz,
+            gain_db=key.gain_db,
+            captures=float(self._captures[slot]),
+            updated_at=float(self._updated_at[slot]),
+            bin_width_hz=key.sample_rate_hz / config.bins_per_step,
+            p10_dbfs_hz=percentiles[0],
+            p50_dbfs_hz=percentiles[1],
+            p90_dbfs_hz=percentiles[2],
+            ema_dbfs_hz=[round(float(v), 2) for v in self._ema[slot]],
+        )
@@ -0,0 +1,278 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rf_survey.spectrum import WelchConfig, iter_periodograms
+
+logger = logging.getLogger(__name__)
+
+# Occupancy is dumped as one byte per cell, 0-254 for 0-100% and this for no data
+NO_DATA = 255
+
+
+@dataclass(frozen=True)
+class RollupLevel:
+    """One archive of the accumulator: `rows` buckets of `bucket_sec` each."""
+
+    bucket_sec: int
+    rows: int
+
+
+@dataclass(frozen=True)
+class OccupancyConfig:
+    """How occupancy is measured from each capture."""
+
+    # A segment occupies a bin when it is this far above the noise floor
+    threshold_db: float = 6.0
+    # Short segments, so the measurement resolves bursts in time
+    fft_size: int = 256
+    max_segments: int = 512
+    # Central fraction of each capture used, the edges are filter roll-off
+    usable_fraction: float = 0.8
+
+    @property
+    def welch(self) -> WelchConfig:
+        return WelchConfig(
+            fft_size=self.fft_size, overlap=0.0, max_segments=self.max_segments
+        )
+
+
+# 2 hours by the minute, 2 days by the quarter hour, 4 weeks by the hour
+DEFAULT_LEVELS = (
+    RollupLevel(60, 120),
+    RollupLevel(900, 192),
+    RollupLevel(3600, 672),
+)
+
+
+def measure_occupancy(
+    samples: np.ndarray,
+    sample_rate_hz: float,
+    config: WelchConfig,
+    threshold_db: float,
+    floor_db: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, int]:
+    """
+    Counts, per FFT bin, the segments of a capture whose power is more than
+    `threshold_db` above the noise floor. `floor_db` is the floor in dBFS/Hz
+    across the band with DC centred, at any resolution; without it the
+    median of the capture's mean spectrum is used. Returns the counts with
+    DC centred and the number of segments.
+    """
+    densities = np.concatenate(list(iter_periodograms(samples, sample_rate_hz, config)))
+    densities = np.fft.fftshift(densities, axes=1)
+
+    if floor_db is None:
+        floor_power = np.median(densities.mean(axis=0))
+    else:
+        # Resample the floor onto the FFT bins
+        positions = (np.arange(len(floor_db)) + 0.5) / len(floor_db)
+        bins = (np.arange(config.fft_size) + 0.5) / config.fft_size
+        floor_power = 10 ** (np.interp(bins, positions, floor_db) / 10.0)
+
+    threshold = floor_power * 10 ** (threshold_db / 10.0)
+    above = np.count_nonzero(densities > threshold, axis=0)
+    return above, len(densities)
+
+
+class OccupancyAccumulator:
+    """
+    Fraction of time each frequency bin was occupied, kept like a round-robin
+    database.
+
+    Every level is a ring of time buckets over a fixed frequency grid, all
+    allocated up front. Each update is counted into the current bucket of
+    every level, so as a bucket ages out of a fine level its data lives on
+    in the coarser ones. Occupancy is kept as occupied and total segment
+    counts, so coarse buckets are exact rather than averages of averages.
+
+    Safe to update from several processing workers at once.
+    """
+
+    def __init__(
+        self,
+        min_freq_hz: float,
+        max_freq_hz: float,
+        bin_width_hz: float,
+        levels: Sequence[RollupLevel] = DEFAULT_LEVELS,
+        path: Optional[Path] = None,
+    ):
+        if max_freq_hz <= min_freq_hz:
+            raise ValueError("max_freq_hz must be above min_freq_hz")
+
+        self.min_freq_hz = min_freq_hz
+        self.bin_width_hz = bin_width_hz
+        self.num_bins = int(np.ceil((max_freq_hz - min_freq_hz) / bin_width_hz))
+        self.levels = tuple(levels)
+        self.path = path
+        self._lock = threading.Lock()
+
+        self._occupied = [
+            np.zeros((level.rows, self.num_bins), dtype=np.float32)
+            for level in self.levels
+        ]
+        self._totals = [
+            np.zeros((level.rows, self.num_bins), dtype=np.float32)
+            for level in self.levels
+        ]
+        # Bucket number (time // bucket_sec) held by each row, -1 when empty
+        self._buckets = [
+            np.full(level.rows, -1, dtype=np.int64) for level in self.levels
+        ]
+
+    def add(
+        self,
+        timestamp: float,
+        freqs_hz: np.ndarray,
+        occupied: np.ndarray,
+        total: int,
+    ) -> None:
+        """
+        Adds the occupied segment counts measured at `freqs_hz` out of
+        `total` segments, for a capture taken at `timestamp` (Unix seconds).
+        """
+        grid_bins = np.floor((freqs_hz - self.min_freq_hz) / self.bin_width_hz)
+        valid = (grid_bins >= 0) & (grid_bins < self.num_bins)
+        grid_bins = grid_bins[valid].astype(np.int64)
+        occupied_counts = np.bincount(
+            grid_bins, weights=occupied[valid], minlength=self.num_bins
+        )
+        total_counts = np.bincount(grid_bins, minlength=self.num_bins) * total
+
+        with self._lock:
+            for level, occupied_rows, total_rows, buckets in zip(
+                self.levels, self._occupied, self._totals, self._buckets
+            ):
+                bucket = int(timestamp // level.bucket_sec)
+                row = bucket % level.rows
+                if buckets[row] > bucket:
+                    # Older than anything this level still holds
+                    continue
+                if buckets[row] < bucket:
+                    occupied_rows[row] = 0
+                    total_rows[row] = 0
+                    buckets[row] = bucket
+                occupied_rows[row] += occupied_counts
+                total_rows[row] += total_counts
+
+    def occupancy(self, level_index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the bucket start times (Unix seconds), oldest first, and the
+        occupied fraction of each bucket and bin, NaN where nothing was measured.
+        """
+        level = self.levels[level_index]
+        with self._lock:
+            buckets = self._buckets[level_index].copy()
+            occupied = self._occupied[level_index].copy()
+            totals = self._totals[level_index].copy()
+
+        order = np.argsort(buckets)
+        order = order[buckets[order] >= 0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fraction = occupied[order] / totals[order]
+        return buckets[order] * level.bucket_sec, fraction
+
+    def dump(self, directory: Path) -> List[Path]:
+        """
+        Writes each level for dashboards as raw little-endian arrays: an
+        int64 `.times` file with the bucket start times and a uint8 `.u8`
+        file of rows x bins occupancy, plus an `occupancy.json` header
+        describing the layout.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        written = []
+        header = dict(
+            min_freq_hz=self.min_freq_hz,
+            bin_width_hz=self.bin_width_hz,
+            num_bins=self.num_bins,
+            no_data=NO_DATA,
+            levels=[],
+        )
+
+        for index, level in enumerate(self.levels):
+            times, fraction = self.occupancy(index)
+            quantized = np.full(fraction.shape, NO_DATA, dtype=np.uint8)
+            measured = ~np.isnan(fraction)
+            quantized[measured] = np.round(fraction[measured] * 254)
+
+            stem = f"occupancy_{level.bucket_sec}s"
+            for suffix, array in ((".times", times.astype("<i8")), (".u8", quantized)):
+                path = directory / (stem + suffix)
+                _write_atomic(path, array.tobytes())
+                written.append(path)
+            header["levels"].append(dict(asdict(level), name=stem, filled=len(times)))
+
+        header_path = directory / "occupancy.json"
+        _write_atomic(header_path, json.dumps(header).encode())
+        written.append(header_path)
+        return written
+
+    def load(self) -> None:
+        """
+        Loads the counts saved by save(). A missing, unreadable or differently
+        shaped state leaves the accumulator empty.
+        """
+        if self.path is None or not self.path.exists():
+            return
+
+        try:
+            with np.load(self.path) as state:
+                arrays = [
+                    (
+                        state[f"occupied_{i}"],
+                        state[f"totals_{i}"],
+                        state[f"buckets_{i}"],
+                    )
+                    for i in range(len(self.levels))
+                ]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable occupancy state {self.path}: {e}")
+            return
+
+        if any(
+            occupied.shape != current.shape
+            for (occupied, _, _), current in zip(arrays, self._occupied)
+        ):
+            logger.warning(
+                f"Ignoring occupancy state {self.path}, it has a different layout."
+            )
+            return
+
+        with self._lock:
+            for i, (occupied, totals, buckets) in enumerate(arrays):
+                self._occupied[i][:] = occupied
+                self._totals[i][:] = totals
+                self._buckets[i][:] = buckets
+        logger.info(f"Loaded occupancy state from {self.path}.")
+
+    def save(self) -> None:
+        """Atomically writes the counts to the configured file, if any."""
+        if self.path is None:
+            return
+
+        state = {}
+        with self._lock:
+            for i in range(len(self.levels)):
+                state[f"occupied_{i}"] = self._occupied[i].copy()
+                state[f"totals_{i}"] = self._totals[i].copy()
+                state[f"buckets_{i}"] = self._buckets[i].copy()
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **state)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save occupancy state to {self.path}: {e}")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
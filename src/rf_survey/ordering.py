@@ -0,0 +1,61 @@
+from typing import Dict, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class ReorderBuffer(Generic[T]):
+    """
+    Puts results that finish out of order back into sequence order.
+
+    Every sequence number handed out must eventually be completed, either
+    with a result or with None if its job failed or was dropped, otherwise
+    everything after it is held back.
+    """
+
+    def __init__(self, first_sequence: int = 0):
+        self._next_sequence = first_sequence
+        self._pending: Dict[int, Optional[T]] = {}
+
+    @property
+    def next_sequence(self) -> int:
+        """The sequence number the buffer is waiting on."""
+        return self._next_sequence
+
+    @property
+    def pending(self) -> int:
+        """Completed results held back by an earlier sequence number."""
+        return len(self._pending)
+
+    def complete(self, sequence: int, result: Optional[T]) -> List[T]:
+        """
+        Records the result for `sequence` and returns all results that are
+        now in order, skipping the ones completed with None.
+        """
+        if sequence < self._next_sequence or sequence in self._pending:
+            raise ValueError(f"Sequence number {sequence} was already completed")
+
+        self._pending[sequence] = result
+
+        ready = []
+        while self._next_sequence in self._pending:
+            next_result = self._pending.pop(self._next_sequence)
+            if next_result is not None:
+                ready.append(next_result)
+            self._next_sequence += 1
+
+        return ready
+
+    def drain(self) -> List[T]:
+        """
+        Returns every held back result in sequence order, giving up on the
+        missing ones. Used on shutdown.
+        """
+        ready = [
+            self._pending[sequence]
+            for sequence in sorted(self._pending)
+            if self._pending[sequence] is not None
+        ]
+        if self._pending:
+            self._next_sequence = max(self._pending) + 1
+        self._pending.clear()
+        return ready
@@ -0,0 +1,360 @@
+import asyncio
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Callable, List, Optional, Tuple
+
+from rf_survey.interfaces import IMetrics
+
+logger = logging.getLogger(__name__)
+
+# Each record is framed as payload length and CRC32, followed by the payload
+RECORD_HEADER = struct.Struct("<II")
+
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+
+ACK_FILENAME = "acked"
+
+# Backoff between publish attempts while NATS is unreachable
+MIN_RETRY_DELAY_SEC = 0.5
+MAX_RETRY_DELAY_SEC = 30.0
+
+
+def _segment_name(base_offset: int) -> str:
+    return f"{base_offset:020d}.log"
+
+
+class SegmentOutbox:
+    """
+    An append-only log of outgoing messages, split into segment files.
+
+    Every message gets a monotonically increasing offset. A reader consumes
+    messages in order and acknowledges offsets once they have been delivered;
+    the acknowledged offset is persisted and segments that are entirely
+    acknowledged are deleted. A torn record at the end of the log, left by a
+    crash mid-write, is truncated when the outbox is opened.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        fsync: bool = True,
+    ):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._segment_bytes = segment_bytes
+        self._fsync = fsync
+        self._lock = threading.Lock()
+
+        # Base offsets of the segments on disk, oldest first
+        self._segments: List[int] = []
+        self._acked = self._load_ack()
+        self._next_offset = self._acked
+        self._recover()
+
+        self._writer: BinaryIO = open(
+            self.directory / _segment_name(self._segments[-1]), "ab"
+        )
+
+        # Position of the next message to read
+        self._read_offset = self._acked
+        self._reader: Optional[BinaryIO] = None
+        self._reader_segment: Optional[int] = None
+
+    @property
+    def next_offset(self) -> int:
+        """Offset the next appended message will get."""
+        with self._lock:
+            return self._next_offset
+
+    @property
+    def acked_offset(self) -> int:
+        """Every message below this offset has been delivered."""
+        with self._lock:
+            return self._acked
+
+    @property
+    def lag(self) -> int:
+        """Messages appended but not yet acknowledged."""
+        with self._lock:
+            return self._next_offset - self._acked
+
+    def append(self, payload: bytes) -> int:
+        """Durably appends a message and returns its offset."""
+        header = RECORD_HEADER.pack(len(payload), zlib.crc32(payload))
+
+        with self._lock:
+            if self._writer.tell() >= self._segment_bytes:
+                self._roll_segment()
+
+            self._writer.write(header + payload)
+            self._writer.flush()
+            if self._fsync:
+                os.fsync(self._writer.fileno())
+
+            offset = self._next_offset
+            self._next_offset += 1
+            return offset
+
+    def read_batch(self, max_messages: int) -> List[Tuple[int, bytes]]:
+        """Returns up to `max_messages` unread messages with their offsets."""
+        batch = []
+        with self._lock:
+            while len(batch) < max_messages and self._read_offset < self._next_offset:
+                if self._reader is None:
+                    self._open_reader()
+
+                header = self._reader.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    # End of this segment, continue with the next one
+                    later = [b for b in self._segments if b > self._reader_segment]
+                    self._close_reader()
+                    if not later:
+                        break
+                    self._read_offset = max(self._read_offset, later[0])
+                    continue
+
+                length, _ = RECORD_HEADER.unpack(header)
+                batch.append((self._read_offset, self._reader.read(length)))
+                self._read_offset += 1
+
+        return batch
+
+    def rewind(self) -> None:
+        """Moves the reader back to the first unacknowledged message."""
+        with self._lock:
+            self._close_reader()
+            self._read_offset = self._acked
+
+    def ack(self, offset: int) -> None:
+        """Acknowledges every message up to and including `offset`."""
+        with self._lock:
+            if offset < self._acked:
+                return
+
+            self._acked = offset + 1
+            tmp_path = self.directory / (ACK_FILENAME + ".tmp")
+            tmp_path.write_text(str(self._acked))
+            os.replace(tmp_path, self.directory / ACK_FILENAME)
+
+            # Keep the active segment, drop older ones that are fully delivered
+            while len(self._segments) > 1 and self._segments[1] <= self._acked:
+                base = self._segments.pop(0)
+                if self._reader_segment == base:
+                    self._close_reader()
+                (self.directory / _segment_name(base)).unlink(missing_ok=True)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_reader()
+            self._writer.close()
+
+    def _load_ack(self) -> int:
+        try:
+            return int((self.directory / ACK_FILENAME).read_text())
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable outbox ack file, replaying from the start: {e}")
+            return 0
+
+    def _recover(self) -> None:
+        bases = sorted(
+            int(path.stem)
+            for path in self.directory.glob("*.log")
+            if path.stem.isdigit()
+        )
+
+        for base in bases:
+            if self._segments and base != self._next_offset:
+                logger.warning(
+                    f"Outbox segment {base} does not follow offset {self._next_offset}, "
+                    "the messages in between are missing."
+                )
+            self._segments.append(base)
+            self._next_offset = base + self._scan_segment(base)
+
+        if not self._segments:
+            self._next_offset = self._acked
+            self._segments.append(self._acked)
+            (self.directory / _segment_name(self._acked)).touch()
+
+        if self._acked > self._next_offset or self._acked < self._segments[0]:
+            logger.warning(
+                f"Outbox ack offset {self._acked} is outside the log, "
+                f"replaying from {self._segments[0]}."
+            )
+            self._acked = self._segments[0]
+
+        if self._next_offset > self._acked:
+            logger.info(
+                f"Outbox has {self._next_offset - self._acked} unacknowledged messages."
+            )
+
+    def _scan_segment(self, base: int) -> int:
+        """Counts the intact messages in a segment, truncating a torn tail."""
+        path = self.directory / _segment_name(base)
+        count = 0
+        good_bytes = 0
+
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                length, crc = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                count += 1
+                good_bytes = f.tell()
+
+        if good_bytes < path.stat().st_size:
+            logger.warning(f"Truncating torn outbox record at the end of {path}")
+            os.truncate(path, good_bytes)
+
+        return count
+
+    def _roll_segment(self) -> None:
+        self._writer.close()
+        self._segments.append(self._next_offset)
+        self._writer = open(self.directory / _segment_name(self._next_offset), "ab")
+
+    def _open_reader(self) -> None:
+        # Segments hold consecutive offsets, skip to the read offset in the right one
+        base = max(b for b in self._segments if b <= self._read_offset)
+        skip = self._read_offset - base
+
+        self._reader = open(self.directory / _segment_name(base), "rb")
+        self._reader_segment = base
+        for _ in range(skip):
+            length, _ = RECORD_HEADER.unpack(self._reader.read(RECORD_HEADER.size))
+            self._reader.seek(length, os.SEEK_CUR)
+
+    def _close_reader(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        self._reader_segment = None
+
+
+class OutboxPublisher:
+    """
+    Drains a SegmentOutbox in batches through `publish`, acknowledging what
+    was delivered. Publishing is paced to `max_rate` messages per second so a
+    backlog built up during an outage is replayed without flooding NATS.
+    """
+
+    def __init__(
+        self,
+        outbox: SegmentOutbox,
+        publish: Callable[[bytes], Awaitable[None]],
+        metrics: IMetrics,
+        batch_size: int = 64,
+        max_rate: float = 50.0,
+        max_in_flight: int = 8,
+        executor: Optional[Executor] = None,
+    ):
+        self.outbox = outbox
+        self._publish = publish
+        self.metrics = metrics
+        self._batch_size = batch_size
+        self._max_rate = max_rate
+        self._max_in_flight = max_in_flight
+        self._executor = executor
+        self._appended = asyncio.Event()
+
+    async def append(self, payload: bytes) -> int:
+        """Writes a message to the outbox and wakes the publisher."""
+        loop = asyncio.get_running_loop()
+        offset = await loop.run_in_executor(self._executor, self.outbox.append, payload)
+        self._appended.set()
+        return offset
+
+    async def run(self) -> None:
+        logger.info(
+            f"Outbox publisher started with {self.outbox.lag} messages to replay."
+        )
+        loop = asyncio.get_running_loop()
+        retry_delay = MIN_RETRY_DELAY_SEC
+
+        try:
+            while True:
+                self._appended.clear()
+                batch = await loop.run_in_executor(
+                    self._executor, self.outbox.read_batch, self._batch_size
+                )
+                self.metrics.update_outbox_lag(self.outbox.lag)
+
+                if not batch:
+                    try:
+                        await asyncio.wait_for(self._appended.wait(), timeout=1.0)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                batch_start = time.monotonic()
+                delivered = await self._publish_batch(batch)
+
+                if delivered:
+                    last_offset = batch[len(delivered) - 1][0]
+                    await loop.run_in_executor(
+                        self._executor, self.outbox.ack, last_offset
+                    )
+                    elapsed = time.monotonic() - batch_start
+                    self.metrics.observe_stage_throughput(
+                        "publish", sum(delivered), elapsed
+                    )
+
+                if len(delivered) < len(batch):
+                    # Resend from the first undelivered message after a pause
+                    self.outbox.rewind()
+                    await asyncio.sleep(retry_delay)
+                    retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY_SEC)
+                    continue
+
+                retry_delay = MIN_RETRY_DELAY_SEC
+                min_duration = len(batch) / self._max_rate
+                await asyncio.sleep(max(0.0, min_duration - elapsed))
+
+        except asyncio.CancelledError:
+            logger.info("Outbox publisher was cancelled.")
+
+        finally:
+            logger.info(
+                f"Outbox publisher shutting down with {self.outbox.lag} messages unpublished."
+            )
+
+    async def _publish_batch(self, batch: List[Tuple[int, bytes]]) -> List[int]:
+        """
+        Publishes with up to `max_in_flight` messages outstanding, stopping at
+        the first window with a failure. Returns the sizes of the messages
+        delivered before the first failure; later ones are sent again.
+        """
+        delivered = []
+        for start in range(0, len(batch), self._max_in_flight):
+            window = batch[start : start + self._max_in_flight]
+            # Started in offset order, so NATS receives them in order
+            results = await asyncio.gather(
+                *(self._publish_one(payload) for _, payload in window),
+                return_exceptions=True,
+            )
+
+            for (offset, payload), result in zip(window, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to publish outbox message {offset}: {result}")
+                    return delivered
+                delivered.append(len(payload))
+
+        return delivered
+
+    async def _publish_one(self, payload: bytes) -> None:
+        publish_start = time.monotonic()
+        await self._publish(payload)
+        self.metrics.observe_stage_latency("publish", time.monotonic() - publish_start)
@@ -0,0 +1,160 @@
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from rf_survey.hashing import ChecksumMethod
+from rf_survey.spectrum import sc16_as_iq
+
+PACKED_SUFFIX = ".sc12"
+
+# Bytes of one packed I/Q pair, against 4 for sc16
+PACKED_SAMPLE_BYTES = 3
+
+# The ADC's 12 bits are the high bits of each sc16 component
+_LOW_BITS = 0xF
+
+# Samples packed at a time, bounds the temporaries to a few MiB
+PACK_CHUNK_SAMPLES = 1 << 20
+
+
+def is_12bit(samples: np.ndarray, chunk_samples: int = PACK_CHUNK_SAMPLES) -> bool:
+    """Whether sc16 samples only use the high 12 bits of each component."""
+    return all(
+        _is_12bit_chunk(samples[offset : offset + chunk_samples])
+        for offset in range(0, len(samples), chunk_samples)
+    )
+
+
+def _is_12bit_chunk(samples: np.ndarray) -> bool:
+    return not np.bitwise_and(sc16_as_iq(samples), _LOW_BITS).any()
+
+
+def pack_sc12(samples: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Packs sc16 samples, one per int32, to 3 bytes each: the 12-bit I in the
+    first byte and the low nibble of the second, the 12-bit Q in the high
+    nibble of the second and the third byte. Returns an (N, 3) uint8 array,
+    written to `out` if given.
+
+    Raises ValueError if any component has its low 4 bits set, which the
+    packed format cannot hold.
+    """
+    if not _is_12bit_chunk(samples):
+        raise ValueError("Samples use more than 12 bits and cannot be packed")
+    return _pack(samples, out)
+
+
+def _pack(samples: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    # Shifting the bit patterns keeps the sign in the 12th bit
+    high = sc16_as_iq(samples).view(np.uint16) >> 4
+    i, q = high[:, 0], high[:, 1]
+    if out is None:
+        out = np.empty((len(high), PACKED_SAMPLE_BYTES), dtype=np.uint8)
+    out[:, 0] = i & 0xFF
+    out[:, 1] = (i >> 8) | ((q & 0xF) << 4)
+    out[:, 2] = q >> 4
+    return out
+
+
+def unpack_sc12(packed: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Unpacks 3 byte samples back to sc16, one per int32, exactly as they were
+    before packing. `packed` may be any uint8 buffer of whole samples, e.g. a
+    slice of a memory map; the result is written to `out` if given.
+    """
+    packed = np.asarray(packed, dtype=np.uint8).reshape(-1, PACKED_SAMPLE_BYTES)
+    if out is None:
+        out = np.empty(len(packed), dtype=np.int32)
+    iq = sc16_as_iq(out).view(np.uint16)
+
+    b0 = packed[:, 0].astype(np.uint16)
+    b1 = packed[:, 1].astype(np.uint16)
+    b2 = packed[:, 2].astype(np.uint16)
+    iq[:, 0] = (b0 << 4) | ((b1 & 0xF) << 12)
+    iq[:, 1] = (b1 & 0xF0) | (b2 << 8)
+    return out
+
+
+def write_packed(
+    path: Path,
+    samples: np.ndarray,
+    checksum_method: ChecksumMethod,
+    chunk_samples: int = PACK_CHUNK_SAMPLES,
+) -> Tuple[str, float]:
+    """
+    Packs sc16 samples to `path` chunk by chunk and checksums the file in
+    the same pass, each chunk is checked for low bits just before it is
+    packed. Raises ValueError, leaving no file behind, if the samples
+    cannot be packed. Returns the checksum and the time spent in seconds.
+    """
+    start = time.monotonic()
+    checksummer = checksum_method.create()
+    try:
+        with open(path, "wb") as f:
+            for offset in range(0, len(samples), chunk_samples):
+                chunk = samples[offset : offset + chunk_samples]
+                if not _is_12bit_chunk(chunk):
+                    raise ValueError(
+                        "Samples use more than 12 bits and cannot be packed"
+                    )
+                # A new array per chunk, a tree hash may still be reading the last one
+                packed = _pack(chunk)
+                f.write(packed)
+                checksummer.update(packed)
+    except ValueError:
+        path.unlink(missing_ok=True)
+        raise
+
+    return checksummer.hexdigest(), time.monotonic() - start
+
+
+class PackedReader:
+    """
+    Reads the samples of a packed capture through a read-only memory map,
+    unpacking only the requested range.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        size = path.stat().st_size
+        if size % PACKED_SAMPLE_BYTES:
+            raise ValueError(f"{path} is not a packed capture")
+        self.num_samples = size // PACKED_SAMPLE_BYTES
+        self._mmap: Optional[np.memmap] = None
+        if self.num_samples:
+            self._mmap = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def packed(self, start: int = 0, count: Optional[int] = None) -> np.ndarray:
+        """The packed bytes of the samples in the range, a view of the mapping."""
+        end = self._end(start, count)
+        if self._mmap is None or start >= end:
+            return np.empty((0, PACKED_SAMPLE_BYTES), dtype=np.uint8)
+        return self._mmap[
+            start * PACKED_SAMPLE_BYTES : end * PACKED_SAMPLE_BYTES
+        ].reshape(-1, PACKED_SAMPLE_BYTES)
+
+    def read(
+        self,
+        start: int = 0,
+        count: Optional[int] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Returns `count` samples from `start`, or all after it, one per int32."""
+        return unpack_sc12(self.packed(start, count), out)
+
+    def _end(self, start: int, count: Optional[int]) -> int:
+        if count is None:
+            return self.num_samples
+        return min(start + count, self.num_samples)
+
+    def close(self) -> None:
+        # The mapping goes with the last view of it
+        self._mmap = None
+
+    def __enter__(self) -> "PackedReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
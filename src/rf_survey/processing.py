@@ -0,0 +1,571 @@
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+from rf_shared.models import MetadataRecord
+
+from rf_survey.capture_index import CaptureIndex, IndexEntry, write_sidecar
+from rf_survey.compression import (
+    COMPRESSED_SUFFIX,
+    CompressionConfig,
+    write_compressed,
+)
+from rf_survey.container import ContainerLocation, ContainerWriter
+from rf_survey.hashing import ChecksumMethod, write_and_hash
+from rf_survey.interfaces import IMetrics
+from rf_survey.models import (
+    ApplicationInfo,
+    ProcessingJob,
+    RawCapture,
+    ReceiverConfig,
+)
+from rf_survey.noise_floor import NoiseFloorKey, NoiseFloorTracker
+from rf_survey.occupancy import (
+    OccupancyAccumulator,
+    OccupancyConfig,
+    measure_occupancy,
+)
+from rf_survey.packing import PACKED_SAMPLE_BYTES, PACKED_SUFFIX, write_packed
+from rf_survey.products import CaptureProduct, SweepProduct
+from rf_survey.signal_stats import (
+    DEFAULT_BAND_WIDTH_HZ,
+    SignalStats,
+    band_label,
+    compute_signal_stats,
+)
+from rf_survey.storage_layout import StorageLayout, capture_stem
+from rf_survey.spectrum import (
+    SpectrumSummary,
+    WelchConfig,
+    summarize_spectrum,
+    welch_psd,
+)
+from rf_survey.sweep_spectrum import CompletedSweep, StepSpectrum, summarize_wideband
+from rf_survey.triage import CaptureTriage, TriageResult
+
+logger = logging.getLogger(__name__)
+
+# Spectrum bins per noise floor bin when the PSD stage does not run
+NOISE_FLOOR_FFT_OVERSAMPLING = 8
+# Segments averaged for that spectrum, it only needs the floor
+NOISE_FLOOR_MAX_SEGMENTS = 64
+
+
+@dataclass
+class ProcessedCapture:
+    """The records produced for one capture, either may be missing."""
+
+    # Only set when the raw IQ was stored
+    metadata: Optional[MetadataRecord] = None
+    product: Optional[CaptureProduct] = None
+    # The capture's PSD for the sweep spectrum, when the PSD stage ran
+    sweep_step: Optional[StepSpectrum] = None
+
+
+class CaptureProcessor:
+    """
+    Turns a captured buffer into stored files and the records describing them.
+    Runs on the I/O executor, several captures may be processed at once.
+    """
+
+    def __init__(
+        self,
+        app_info: ApplicationInfo,
+        metrics: IMetrics,
+        checksum_method: Optional[ChecksumMethod] = None,
+        spectrum_config: Optional[WelchConfig] = None,
+        store_iq: bool = True,
+        triage: Optional[CaptureTriage] = None,
+        signal_stats: bool = False,
+        stats_band_width_hz: int = DEFAULT_BAND_WIDTH_HZ,
+        noise_floor: Optional[NoiseFloorTracker] = None,
+        occupancy: Optional[OccupancyAccumulator] = None,
+        occupancy_config: OccupancyConfig = OccupancyConfig(),
+        capture_index: Optional[CaptureIndex] = None,
+        layout: Optional[StorageLayout] = None,
+        container: Optional[ContainerWriter] = None,
+        compression: Optional[CompressionConfig] = None,
+        pack_sc12: bool = False,
+    ):
+        self.app_info = app_info
+        self.metrics = metrics
+        self.checksum_method = checksum_method or ChecksumMethod()
+        # Subdirectories of the output path the files are stored in
+        self.layout = layout or StorageLayout(app_info.output_path)
+        # Packs the IQ of many captures into rolling segment files when set
+        self.container = container
+        # Stored captures are compressed when set
+        self.compression = compression
+        # 12-bit samples are stored packed in 3 bytes each when set
+        self.pack_sc12 = pack_sc12
+        # The PSD stage runs when set
+        self.spectrum_config = spectrum_config
+        # Without raw IQ only the derived products are kept
+        self.store_iq = store_iq
+        # Decides per capture how much of the IQ is worth storing
+        self.triage = triage
+        # Triage needs the statistics, so they are always computed with it
+        self.signal_stats = signal_stats or triage is not None
+        # Width of the bands the statistics metrics are grouped by
+        self.stats_band_width_hz = stats_band_width_hz
+        # Fed with the spectrum of every capture, reusing the PSD stage's if it ran
+        self.noise_floor = noise_floor
+        if noise_floor is not None:
+            self._noise_floor_welch = WelchConfig(
+                fft_size=noise_floor.config.bins_per_step
+                * NOISE_FLOOR_FFT_OVERSAMPLING,
+                max_segments=NOISE_FLOOR_MAX_SEGMENTS,
+            )
+        # Measured against the tracked noise floor when there is one
+        self.occupancy = occupancy
+        self.occupancy_config = occupancy_config
+        # Every stored capture gets a sidecar and an index entry
+        self.capture_index = capture_index
+        # Pulled from the receiver after it is initialized
+        self.serial: Optional[str] = None
+
+    def process(self, job: ProcessingJob) -> ProcessedCapture:
+        """
+        This function takes a complete ProcessingJob, runs the enabled
+        analysis stages while the samples are in memory, performs blocking
+        I/O (saving the files) and checksumming, and returns the records.
+        """
+        raw_capture = job.raw_capture
+        receiver_config = job.receiver_config_snapshot
+        sweep_config = job.sweep_config_snapshot
+
+        stem = capture_stem(
+            self.serial, self.app_info.hostname, raw_capture.capture_timestamp
+        )
+        directory = self.layout.directory(
+            raw_capture.capture_timestamp, raw_capture.center_freq_hz
+        )
+        file_path = directory / f"{stem}.sc16"
+
+        product = CaptureProduct(
+            hostname=self.app_info.hostname,
+            serial=self.serial,
+            frequency=raw_capture.center_freq_hz,
+            timestamp=raw_capture.capture_timestamp,
+            sampling_rate=receiver_config.bandwidth_hz,
+            length=receiver_config.duration_sec,
+        )
+
+        sweep_step = None
+        psd_db = None
+        try:
+            triage = None
+            if self.signal_stats:
+                product.signal_stats = self._compute_signal_stats(
+                    raw_capture, receiver_config
+                )
+            if self.triage is not None:
+                triage = self._run_triage(
+                    raw_capture, receiver_config, product.signal_stats
+                )
+                product.triage = triage
+
+            if self.spectrum_config is not None:
+                product.spectrum_path = directory / f"{stem}.psd.npy"
+                product.spectrum, psd_db = self._compute_spectrum(
+                    raw_capture, receiver_config.bandwidth_hz, product.spectrum_path
+                )
+                if job.sweep_position is not None:
+                    sweep_step = StepSpectrum(
+                        position=job.sweep_position,
+                        sweep_config=sweep_config,
+                        center_freq_hz=raw_capture.center_freq_hz,
+                        sample_rate_hz=receiver_config.bandwidth_hz,
+                        timestamp=raw_capture.capture_timestamp,
+                        psd_db=psd_db,
+                    )
+
+            if self.noise_floor is not None:
+                self._track_noise_floor(raw_capture, receiver_config, psd_db)
+            if self.occupancy is not None:
+                self._track_occupancy(raw_capture, receiver_config)
+
+            file_checksum = None
+            stored_length = receiver_config.duration_sec
+            stored_samples = 0
+            action = "full" if triage is None else triage.action
+            # Set when the IQ went into a container segment
+            location = None
+            # Whether a streamed capture's file was kept as the stored file
+            kept_capture_file = False
+            bit_depth = 16
+
+            if self.store_iq and action == "full":
+                if self.container is not None:
+                    location = self._store_in_container(
+                        raw_capture,
+                        receiver_config,
+                        directory,
+                        stem,
+                        raw_capture.iq_data,
+                    )
+                elif self.compression is not None:
+                    file_path = directory / f"{stem}{COMPRESSED_SUFFIX}"
+                    file_checksum = self._store_compressed(
+                        raw_capture.iq_data, file_path
+                    )
+                else:
+                    if self.pack_sc12:
+                        packed_path = directory / f"{stem}{PACKED_SUFFIX}"
+                        file_checksum = self._store_packed(
+                            raw_capture.iq_data, packed_path
+                        )
+                    if file_checksum is not None:
+                        file_path = packed_path
+                        bit_depth = 12
+                    else:
+                        file_checksum = self._store_iq(raw_capture, file_path)
+                        kept_capture_file = True
+                stored_samples = raw_capture.iq_data.size
+            elif self.store_iq and action == "excerpt":
+                excerpt = raw_capture.iq_data[: self.triage.config.excerpt_samples]
+                if self.container is not None:
+                    location = self._store_in_container(
+                        raw_capture, receiver_config, directory, stem, excerpt
+                    )
+                elif self.compression is not None:
+                    file_path = directory / f"{stem}.excerpt{COMPRESSED_SUFFIX}"
+                    file_checksum = self._store_compressed(excerpt, file_path)
+                else:
+                    if self.pack_sc12:
+                        packed_path = directory / f"{stem}.excerpt{PACKED_SUFFIX}"
+                        file_checksum = self._store_packed(excerpt, packed_path)
+                    if file_checksum is not None:
+                        file_path = packed_path
+                        bit_depth = 12
+                    else:
+                        file_path = directory / f"{stem}.excerpt.sc16"
+                        file_checksum = self._store_excerpt(excerpt, file_path)
+                stored_samples = len(excerpt)
+                stored_length = stored_samples / receiver_config.bandwidth_hz
+
+            if location is not None:
+                file_path = location.source_path
+                file_checksum = location.checksum
+
+            if file_checksum is not None:
+                logger.debug(f"Calculated checksum: {file_checksum}")
+                product.iq_path = file_path
+                product.iq_checksum = file_checksum
+
+            if raw_capture.capture_file is not None and not kept_capture_file:
+                # Streamed samples are already on disk but not wanted as they are
+                raw_capture.capture_file.discard()
+
+            if triage is not None:
+                if self.store_iq:
+                    triage.bytes_saved = (
+                        raw_capture.iq_data.size - stored_samples
+                    ) * raw_capture.iq_data.itemsize
+                self.metrics.observe_triage_decision(triage.action, triage.bytes_saved)
+
+        finally:
+            # The samples are on disk (or lost), hand the buffer back for the next capture
+            raw_capture.release()
+
+        metadata_record = None
+        if file_checksum is not None:
+            metadata_record = MetadataRecord(
+                # Static application info
+                hostname=self.app_info.hostname,
+                organization=self.app_info.organization,
+                gcs=self.app_info.coordinates,
+                group=self.app_info.group,
+                # this is pulled after initial initalize
+                serial=self.serial,
+                bit_depth=bit_depth,
+                # Configuration context from the snapshots
+                interval=sweep_config.interval_sec,
+                length=stored_length,
+                gain=receiver_config.gain_db,
+                sampling_rate=receiver_config.bandwidth_hz,
+                # Direct data from the capture itself
+                frequency=raw_capture.center_freq_hz,
+                timestamp=raw_capture.capture_timestamp,
+                # Data generated during this processing step
+                source_path=file_path,
+                checksum=file_checksum,
+            )
+            if self.capture_index is not None:
+                self._index_capture(metadata_record, file_path, location)
+
+        return ProcessedCapture(
+            metadata=metadata_record,
+            product=product if product.has_products else None,
+            sweep_step=sweep_step,
+        )
+
+    def process_sweep(self, sweep: CompletedSweep) -> SweepProduct:
+        """Stores a stitched sweep spectrum and returns the record describing it."""
+        wideband = sweep.spectrum
+        spectrum = wideband.spectrum()
+
+        stem = capture_stem(self.serial, self.app_info.hostname, sweep.start_timestamp)
+        directory = self.layout.directory(
+            sweep.start_timestamp, sweep.sweep_config.start_hz
+        )
+        spectrum_path = directory / f"{stem}.sweep.npy"
+        np.save(spectrum_path, spectrum)
+
+        sweep_config = sweep.sweep_config
+        return SweepProduct(
+            hostname=self.app_info.hostname,
+            serial=self.serial,
+            sweep_id=sweep.sweep_id,
+            start_timestamp=sweep.start_timestamp,
+            end_timestamp=sweep.end_timestamp,
+            start_hz=sweep_config.start_hz,
+            end_hz=sweep_config.end_hz,
+            step_hz=sweep_config.step_hz,
+            sampling_rate=wideband.sample_rate_hz,
+            captures_expected=sweep.captures_expected,
+            captures_received=sweep.captures_received,
+            complete=sweep.complete,
+            spectrum=summarize_wideband(
+                spectrum, wideband.start_freq_hz, wideband.bin_width_hz
+            ),
+            spectrum_path=spectrum_path,
+        )
+
+    def _index_capture(
+        self,
+        record: MetadataRecord,
+        file_path: Path,
+        location: Optional[ContainerLocation],
+    ) -> None:
+        start = time.monotonic()
+        record_json = record.model_dump_json()
+        try:
+            if location is not None:
+                self.container.add_record(location, record_json)
+            else:
+                write_sidecar(file_path, record_json)
+        except OSError as e:
+            # The record is still published, only a rebuild would miss it
+            logger.error(f"Failed to write the sidecar of {file_path}: {e}")
+        self.capture_index.add(IndexEntry.model_validate_json(record_json))
+        self.metrics.observe_stage_latency("index", time.monotonic() - start)
+
+    def _store_iq(self, raw_capture: RawCapture, file_path: Path) -> str:
+        """Writes the raw samples to `file_path` and returns their checksum."""
+        if raw_capture.capture_file is not None:
+            # Streamed captures are already on disk and checksummed
+            raw_capture.capture_file.move_to(file_path)
+            logger.debug(f"Streamed capture moved to {file_path}")
+            return raw_capture.capture_file.checksum
+
+        try:
+            # Each chunk is hashed as it is written, the buffer is read once
+            file_checksum, duration_sec = write_and_hash(
+                file_path, raw_capture.iq_data, self.checksum_method
+            )
+            logger.debug(f"File stored as {file_path}")
+        except IOError as e:
+            logger.error(f"Failed to write capture file to disk: {e}", exc_info=True)
+            raise
+
+        self.metrics.observe_stage_throughput(
+            "write_hash", raw_capture.iq_data.nbytes, duration_sec
+        )
+        return file_checksum
+
+    def _store_excerpt(self, excerpt: np.ndarray, file_path: Path) -> str:
+        """Writes the start of a capture to `file_path` and returns its checksum."""
+        file_checksum, _ = write_and_hash(file_path, excerpt, self.checksum_method)
+        logger.debug(f"Excerpt of {len(excerpt)} samples stored as {file_path}")
+        return file_checksum
+
+    def _store_compressed(self, samples: np.ndarray, file_path: Path) -> str:
+        """Compresses `samples` to `file_path` and returns the file's checksum."""
+        config = self.compression
+        result = write_compressed(file_path, samples, config, self.checksum_method)
+        self.metrics.observe_stage_throughput(
+            "compress", result.compressed_bytes, result.duration_sec
+        )
+        self.metrics.observe_compression(
+            config.codec,
+            result.raw_bytes,
+            result.compressed_bytes,
+            result.duration_sec,
+        )
+        logger.debug(
+            f"Capture compressed {result.ratio:.2f}x with {config.codec} "
+            f"in {result.duration_sec:.3f} s to {file_path}"
+        )
+        return result.checksum
+
+    def _store_packed(self, samples: np.ndarray, file_path: Path) -> Optional[str]:
+        """
+        Packs `samples` to 12 bits in `file_path` and returns its checksum,
+        or None if they use more bits and have to be stored as sc16.
+        """
+        try:
+            file_checksum, duration_sec = write_packed(
+                file_path, samples, self.checksum_method
+            )
+        except ValueError as e:
+            # Only the radio's sc12 wire format guarantees the low bits are clear
+            logger.warning(f"{e}, storing the capture as sc16.")
+            return None
+        self.metrics.observe_stage_throughput(
+            "pack", len(samples) * PACKED_SAMPLE_BYTES, duration_sec
+        )
+        logger.debug(f"Capture packed to 12 bits in {file_path}")
+        return file_checksum
+
+    def _store_in_container(
+        self,
+        raw_capture: RawCapture,
+        receiver_config: ReceiverConfig,
+        directory: Path,
+        stem: str,
+        samples: np.ndarray,
+    ) -> ContainerLocation:
+        """Appends `samples` of the capture to the open segment in `directory`."""
+        checksum = None
+        if raw_capture.capture_file is not None and len(samples) == len(
+            raw_capture.iq_data
+        ):
+            # Streamed and spooled captures were checksummed as they were written
+            checksum = raw_capture.capture_file.checksum
+
+        start = time.monotonic()
+        location = self.container.append(
+            directory,
+            stem,
+            samples,
+            raw_capture.capture_timestamp,
+            raw_capture.center_freq_hz,
+            receiver_config.bandwidth_hz,
+            checksum,
+        )
+        self.metrics.observe_stage_throughput(
+            "container_write", samples.nbytes, time.monotonic() - start
+        )
+        logger.debug(f"Capture stored at {location.source_path}")
+        return location
+
+    def _compute_signal_stats(
+        self, raw_capture: RawCapture, receiver_config: ReceiverConfig
+    ) -> SignalStats:
+        start = time.monotonic()
+        cpu_start = time.thread_time()
+        stats = compute_signal_stats(raw_capture.iq_data)
+        cpu_sec = time.thread_time() - cpu_start
+        self.metrics.observe_stage_latency("signal_stats", time.monotonic() - start)
+
+        # CPU time as a fraction of the capture length, must stay well below 1
+        self.metrics.observe_signal_stats(
+            band_label(raw_capture.center_freq_hz, self.stats_band_width_hz),
+            stats,
+            cpu_sec / receiver_config.duration_sec,
+        )
+        return stats
+
+    def _run_triage(
+        self,
+        raw_capture: RawCapture,
+        receiver_config: ReceiverConfig,
+        stats: SignalStats,
+    ) -> TriageResult:
+        start = time.monotonic()
+        # Power levels only compare across captures with the same settings
+        key = (
+            raw_capture.center_freq_hz,
+            receiver_config.bandwidth_hz,
+            receiver_config.gain_db,
+        )
+        triage = self.triage.evaluate(stats, key)
+        self.metrics.observe_stage_latency("triage", time.monotonic() - start)
+        logger.debug(
+            f"Triage kept {triage.action} IQ of capture at "
+            f"{raw_capture.center_freq_hz} Hz ({triage.reason})"
+        )
+        return triage
+
+    def _track_noise_floor(
+        self,
+        raw_capture: RawCapture,
+        receiver_config: ReceiverConfig,
+        psd_db: Optional[np.ndarray],
+    ) -> None:
+        start = time.monotonic()
+        if psd_db is None:
+            psd_db, _ = welch_psd(
+                raw_capture.iq_data,
+                receiver_config.bandwidth_hz,
+                self._noise_floor_welch,
+            )
+        key = self._noise_floor_key(raw_capture, receiver_config)
+        self.noise_floor.update(key, psd_db)
+        self.metrics.observe_stage_latency("noise_floor", time.monotonic() - start)
+
+    def _track_occupancy(
+        self, raw_capture: RawCapture, receiver_config: ReceiverConfig
+    ) -> None:
+        start = time.monotonic()
+        config = self.occupancy_config
+        sample_rate_hz = receiver_config.bandwidth_hz
+
+        floor_db = None
+        if self.noise_floor is not None:
+            estimate = self.noise_floor.estimate(
+                self._noise_floor_key(raw_capture, receiver_config)
+            )
+            if estimate is not None:
+                floor_db = np.array(estimate.p50_dbfs_hz)
+
+        occupied, total = measure_occupancy(
+            raw_capture.iq_data,
+            sample_rate_hz,
+            config.welch,
+            config.threshold_db,
+            floor_db,
+        )
+
+        offsets_hz = (
+            (np.arange(config.fft_size) - config.fft_size // 2)
+            * sample_rate_hz
+            / config.fft_size
+        )
+        usable = np.abs(offsets_hz) <= config.usable_fraction * sample_rate_hz / 2
+        self.occupancy.add(
+            raw_capture.capture_timestamp.timestamp(),
+            raw_capture.center_freq_hz + offsets_hz[usable],
+            occupied[usable],
+            total,
+        )
+        self.metrics.observe_stage_latency("occupancy", time.monotonic() - start)
+
+    @staticmethod
+    def _noise_floor_key(
+        raw_capture: RawCapture, receiver_config: ReceiverConfig
+    ) -> NoiseFloorKey:
+        return NoiseFloorKey(
+            center_freq_hz=raw_capture.center_freq_hz,
+            sample_rate_hz=receiver_config.bandwidth_hz,
+            gain_db=receiver_config.gain_db,
+        )
+
+    def _compute_spectrum(
+        self, raw_capture: RawCapture, sample_rate_hz: int, spectrum_path: Path
+    ) -> Tuple[SpectrumSummary, np.ndarray]:
+        start = time.monotonic()
+        psd_db, segments = welch_psd(
+            raw_capture.iq_data, sample_rate_hz, self.spectrum_config
+        )
+        np.save(spectrum_path, psd_db)
+        self.metrics.observe_stage_latency("spectrum", time.monotonic() - start)
+
+        summary = summarize_spectrum(
+            psd_db, segments, sample_rate_hz, self.spectrum_config
+        )
+        return summary, psd_db
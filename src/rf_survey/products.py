@@ -0,0 +1,78 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from pydantic import BaseModel
+
+from rf_survey.signal_stats import SignalStats
+from rf_survey.spectrum import SpectrumSummary
+from rf_survey.sweep_spectrum import WidebandSummary
+from rf_survey.triage import TriageResult
+
+
+class CaptureProduct(BaseModel):
+    """
+    Data derived from one capture, published on the products subject.
+
+    It is linked to the capture's MetadataRecord by hostname, frequency and
+    timestamp, and by checksum when the raw IQ was stored. Without stored IQ
+    no MetadataRecord is published and this is the only record of the capture.
+    """
+
+    kind: str = "capture"
+
+    hostname: str
+    serial: str
+    frequency: int
+    timestamp: datetime
+    sampling_rate: int
+    length: float
+
+    # Set when the raw IQ, or an excerpt of it, was stored
+    iq_path: Optional[Path] = None
+    iq_checksum: Optional[str] = None
+
+    # Welch PSD summary, the full float32 spectrum is stored at spectrum_path
+    spectrum: Optional[SpectrumSummary] = None
+    spectrum_path: Optional[Path] = None
+
+    signal_stats: Optional[SignalStats] = None
+    # How much of the IQ was kept
+    triage: Optional[TriageResult] = None
+
+    @property
+    def has_products(self) -> bool:
+        """Whether any analysis stage contributed to this record."""
+        return any(
+            stage is not None
+            for stage in (self.spectrum, self.signal_stats, self.triage)
+        )
+
+
+class SweepProduct(BaseModel):
+    """
+    The stitched spectrum of one sweep, published on the products subject
+    after its last capture. The full float32 spectrum is stored at
+    spectrum_path, one bin every bin_width_hz from start_freq_hz.
+    """
+
+    kind: str = "sweep"
+
+    hostname: str
+    serial: str
+    sweep_id: str
+    start_timestamp: datetime
+    end_timestamp: datetime
+
+    start_hz: int
+    end_hz: int
+    step_hz: int
+    sampling_rate: int
+
+    captures_expected: int
+    captures_received: int
+    # False when the sweep was cut short or captures were lost
+    complete: bool
+
+    spectrum: WidebandSummary
+    spectrum_path: Path
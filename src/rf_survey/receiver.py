@@ -4,22 +4,84 @@ import asyncio
 import time
 import threading
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import Executor
 from copy import deepcopy
-from typing import Optional
-
-from rf_survey.models import RawCapture, ReceiverConfig, CaptureResult
+from pathlib import Path
+from typing import List, Optional
+
+from rf_survey.buffer_pool import BufferPoolExhaustedError, CaptureBufferPool
+from rf_survey.capture_file import StreamedCaptureFile
+from rf_survey.hashing import ChecksumMethod
+from rf_survey.models import (
+    RawCapture,
+    ReceiverConfig,
+    CaptureResult,
+    CaptureAbortedError,
+)
+from rf_survey.tuning_cache import TuningCache
 
 logger = logging.getLogger(__name__)
 
+# How long a capture waits for a free buffer before it is dropped
+BUFFER_LEASE_TIMEOUT_SEC = 1.0
+
+# Samples handed to each recv() call, 4 MB of sc16
+DEFAULT_CHUNK_SAMPLES = 1 << 20
+
+# Fraction of the previously measured LO lock time to sleep before polling
+LO_SETTLE_SLEEP_FRACTION = 0.8
+LO_LOCK_POLL_INTERVAL_SEC = 0.0005
+
+# Longest a capture runs between checks for an abort request
+ABORT_POLL_INTERVAL_SEC = 0.1
+
+# Scratch space for discarding in-flight samples after a continuous stream stops
+DRAIN_BUFFER_SAMPLES = 1 << 14
+
 
 class Receiver:
     def __init__(
         self,
         receiver_config: ReceiverConfig,
+        buffer_pool_size: int = 3,
+        stream_dir: Optional[Path] = None,
+        chunk_samples: int = DEFAULT_CHUNK_SAMPLES,
+        tuning_cache: Optional[TuningCache] = None,
+        executor: Optional[Executor] = None,
+        checksum_method: Optional[ChecksumMethod] = None,
+        otw_format: str = "sc16",
     ):
+        """
+        If `stream_dir` is set, captures are streamed chunk by chunk into
+        files in that directory instead of pooled in-memory buffers, and
+        checksummed with `checksum_method` as they arrive. No buffers are
+        allocated then, `buffer_pool_size` is ignored.
+        All blocking hardware work runs on `executor`, ideally a single
+        dedicated thread, or the event loop's default executor if None.
+        `otw_format` is the sample format over the wire, with "sc12" the
+        host still receives sc16 but only the high 12 bits are used.
+        """
         self._hardware_lock = threading.Lock()
+        self._abort_event = threading.Event()
         self.config = receiver_config
+        self.executor = executor
+        self.usrp = None
+        self.rx_streamer = None
+        self.stream_dir = stream_dir
+        self.checksum_method = checksum_method or ChecksumMethod()
+        self._chunk_samples = chunk_samples
+        self.otw_format = otw_format
+        # Streamed captures never lease a buffer, and a capture larger than
+        # memory must not fail allocating them
+        self.buffer_pool = CaptureBufferPool(
+            num_samples=receiver_config.num_samples,
+            size=0 if stream_dir is not None else buffer_pool_size,
+        )
+        self._drain_buffer = np.empty(DRAIN_BUFFER_SAMPLES, dtype=np.int32)
+        # Frequency the LO is currently tuned and locked to
+        self._tuned_freq_hz: Optional[int] = None
+        self.tuning_cache = tuning_cache or TuningCache()
 
     def initialize(self) -> None:
         """Connects to and fully configures the USRP hardware and stream."""
@@ -36,10 +98,12 @@ class Receiver:
         """
         logger.info("Initializing USRP hardware and stream...")
 
+        self._tuned_freq_hz = None
+
         self.usrp = uhd.usrp.MultiUSRP("num_recv_frames=1024")
         self.usrp.set_rx_rate(self.config.bandwidth_hz, 0)
         self.usrp.set_rx_gain(self.config.gain_db, 0)
-        self.usrp.set_rx_antenna("RX2", 0)
+        self.usrp.set_rx_antenna(self.config.antenna, 0)
 
         self.serial = self.usrp.get_usrp_rx_info(0)["mboard_serial"]
 
@@ -51,38 +115,151 @@ class Receiver:
             logger.info("Setting clock to host time")
             self.usrp.set_time_now(uhd.types.TimeSpec(time.time()))
 
-        st_args = uhd.usrp.StreamArgs("sc16", "sc16")
+        st_args = uhd.usrp.StreamArgs("sc16", self.otw_format)
         st_args.channels = [0]
         self.rx_metadata = uhd.types.RXMetadata()
         self.rx_streamer = self.usrp.get_rx_stream(st_args)
 
         logger.info("USRP hardware initialization complete.")
 
-    async def reconfigure(self, new_config: ReceiverConfig) -> None:
+    async def reconfigure(self, new_config: ReceiverConfig) -> bool:
         """
         Asynchronously triggers a thread-safe, blocking reconfiguration of the hardware.
+        Only the settings that changed are applied to the live device.
+        Returns True if a full hardware re-initialization was needed.
         """
         loop = asyncio.get_running_loop()
         logger.info("Scheduling hardware reconfiguration...")
 
-        await loop.run_in_executor(
-            None,
+        full_reset = await loop.run_in_executor(
+            self.executor,
             self._reconfigure_blocking,
             new_config,
         )
 
         logger.info("Hardware reconfiguration has completed.")
+        return full_reset
+
+    async def reset(self) -> None:
+        """
+        Tears down and re-initializes the hardware with the current configuration.
+        Used to recover from hardware errors.
+        """
+        loop = asyncio.get_running_loop()
+        logger.info("Scheduling full hardware re-initialization...")
 
-    def _reconfigure_blocking(self, new_config: ReceiverConfig) -> None:
+        await loop.run_in_executor(self.executor, self._reset_blocking)
+
+        logger.info("Hardware re-initialization has completed.")
+
+    def _reconfigure_blocking(self, new_config: ReceiverConfig) -> bool:
         with self._hardware_lock:
             logger.info("Hardware lock acquired. Applying new configuration...")
 
+            old_config = self.config
             self.config = new_config
-            self.rx_streamer = None
+            self.buffer_pool.resize(new_config.num_samples)
 
-            self._initialize_hardware()
+            if self.usrp is None or self.rx_streamer is None:
+                logger.info("No live device to update, re-initializing hardware.")
+                self._reinitialize_hardware()
+                return True
+
+            try:
+                self._apply_config_delta(old_config, new_config)
+            except RuntimeError as e:
+                logger.warning(
+                    f"Applying configuration to the live device failed ({e}), re-initializing hardware."
+                )
+                self._reinitialize_hardware()
+                return True
 
             logger.info("Reconfiguration complete and lock released.")
+            return False
+
+    def _reset_blocking(self) -> None:
+        with self._hardware_lock:
+            logger.info("Hardware lock acquired. Re-initializing hardware...")
+            self._reinitialize_hardware()
+
+    def _reinitialize_hardware(self) -> None:
+        """Must be called with the hardware lock held."""
+        self.rx_streamer = None
+        self._initialize_hardware()
+
+    def _apply_config_delta(
+        self, old_config: ReceiverConfig, new_config: ReceiverConfig
+    ) -> None:
+        """
+        Calls only the setters for settings that differ between the two
+        configurations. Must be called with the hardware lock held.
+        """
+        if new_config.bandwidth_hz != old_config.bandwidth_hz:
+            self.usrp.set_rx_rate(new_config.bandwidth_hz, 0)
+            # The DSP part of the tune depends on the rate, so retune next capture
+            self._tuned_freq_hz = None
+            logger.info(f"Sample rate set to {self.usrp.get_rx_rate(0)} Hz.")
+
+        if new_config.gain_db != old_config.gain_db:
+            self.usrp.set_rx_gain(new_config.gain_db, 0)
+            logger.info(f"Gain set to {new_config.gain_db} dB.")
+
+        if new_config.antenna != old_config.antenna:
+            self.usrp.set_rx_antenna(new_config.antenna, 0)
+            logger.info(f"Antenna set to {new_config.antenna}.")
+
+    async def prepare_frequency(self, center_freq_hz: int) -> None:
+        """
+        Tunes the LO and waits for lock ahead of a capture, so a following
+        capture at the same frequency can start streaming immediately.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self.executor, self._prepare_frequency_blocking, center_freq_hz
+        )
+
+    def _prepare_frequency_blocking(self, center_freq_hz: int) -> None:
+        with self._hardware_lock:
+            if self._abort_event.is_set():
+                return
+            self._tune(center_freq_hz)
+
+    def abort_captures(self) -> None:
+        """
+        Stops any capture in flight and makes new ones fail with
+        CaptureAbortedError until clear_abort() is called. The hardware lock is
+        released within roughly ABORT_POLL_INTERVAL_SEC plus the stream drain.
+        Safe to call from any thread.
+        """
+        logger.info("Aborting in-flight and pending captures.")
+        self._abort_event.set()
+
+    def clear_abort(self) -> None:
+        """Allows captures to run again after abort_captures()."""
+        self._abort_event.clear()
+
+    def _tune(self, center_freq_hz: int) -> None:
+        """
+        Tunes to `center_freq_hz` and waits for the LO to lock, unless it is
+        already tuned there. Must be called with the hardware lock held.
+        """
+        if self._tuned_freq_hz == center_freq_hz:
+            logger.debug(f"LO already tuned to {center_freq_hz} Hz, skipping retune.")
+            return
+
+        self._tuned_freq_hz = None
+        tune_result = self.usrp.set_rx_freq(
+            uhd.libpyuhd.types.tune_request(center_freq_hz), 0
+        )
+        self.tuning_cache.record_tune(
+            center_freq_hz, tune_result.actual_rf_freq, tune_result.actual_dsp_freq
+        )
+
+        # Wait for lo to settle instead of over sampling and discarding a margin.
+        # Only a locked LO is remembered, so after a timeout the next capture
+        # here retunes instead of recording from an unlocked LO
+        if self._wait_for_settle_lo(center_freq_hz):
+            self._tuned_freq_hz = center_freq_hz
 
     async def receive_samples(self, center_freq_hz: int) -> CaptureResult:
         """
@@ -91,47 +268,181 @@ class Receiver:
         """
         loop = asyncio.get_running_loop()
         return await loop.run_in_executor(
-            None, self._receive_samples_blocking, center_freq_hz
+            self.executor, self._receive_samples_blocking, center_freq_hz
+        )
+
+    async def receive_records(
+        self, center_freq_hz: int, num_records: int
+    ) -> List[CaptureResult]:
+        """
+        Captures `num_records` back-to-back records at one frequency from a
+        single continuous stream, tuning and settling only once. Buffers are
+        leased as the stream runs, if the pool runs out the records captured
+        so far are returned.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self._receive_records_blocking, center_freq_hz, num_records
         )
 
     def _receive_samples_blocking(self, center_freq_hz: int) -> CaptureResult:
         """
         Receives samples from the SDR at a specified frequency.
         """
+        return self._receive_records_blocking(center_freq_hz, 1)[0]
+
+    def _receive_records_blocking(
+        self, center_freq_hz: int, num_records: int
+    ) -> List[CaptureResult]:
         assert self.rx_streamer is not None, "Streamer not properly initialized"
 
         with self._hardware_lock:
+            if self._abort_event.is_set():
+                raise CaptureAbortedError("Capture aborted before it started")
+
             config_at_capture = deepcopy(self.config)
 
-            # Set frequency for current loop step
-            self.usrp.set_rx_freq(uhd.libpyuhd.types.tune_request(center_freq_hz), 0)
+            # Set frequency for current loop step, a no-op if it was prepared
+            self._tune(center_freq_hz)
 
-            samples_to_collect = self.config.num_samples
-            capture_buffer = np.zeros(samples_to_collect, dtype=np.int32)
-            rx_metadata = uhd.types.RXMetadata()
+            samples_per_record = self.config.num_samples
+            # A single record is a finite burst, several are cut from one stream
+            continuous = num_records > 1
+
+            captures: List[RawCapture] = []
+            try:
+                # Waits for processing to return a buffer before the stream starts
+                captures.append(
+                    self._allocate_capture(
+                        center_freq_hz, samples_per_record, BUFFER_LEASE_TIMEOUT_SEC
+                    )
+                )
 
-            # Wait for lo to settle instead of over sampling and discarding a margin
-            self._wait_for_settle_lo()
+                if continuous:
+                    stream_cmd = uhd.types.StreamCMD(uhd.types.StreamMode.start_cont)
+                else:
+                    stream_cmd = uhd.types.StreamCMD(uhd.types.StreamMode.num_done)
+                    stream_cmd.num_samps = samples_per_record
+                stream_cmd.stream_now = True
+                self.rx_streamer.issue_stream_cmd(stream_cmd)
+
+                stream_start = datetime.now(timezone.utc)
+
+                completed = False
+                try:
+                    start_recv = time.monotonic()
+                    self._recv_into(captures[0])
+                    while len(captures) < num_records:
+                        # The stream cannot wait for a buffer, the records
+                        # would no longer be contiguous
+                        try:
+                            capture = self._allocate_capture(
+                                center_freq_hz, samples_per_record, timeout=0
+                            )
+                        except BufferPoolExhaustedError as e:
+                            logger.error(
+                                f"{e} Keeping {len(captures)} of {num_records} records."
+                            )
+                            break
+                        captures.append(capture)
+                        self._recv_into(capture)
+                    recv_duration = time.monotonic() - start_recv
+                    completed = True
+
+                    logger.info(
+                        f"recv() of {len(captures)} record(s) returned after {recv_duration:.3f} seconds."
+                    )
+
+                finally:
+                    # A completed burst ends by itself, anything else is still streaming
+                    if continuous or not completed:
+                        self._stop_stream()
+
+            except BaseException:
+                # The captures never reach processing, so free them here
+                for capture in captures:
+                    capture.discard()
+                raise
 
-            stream_cmd = uhd.types.StreamCMD(uhd.types.StreamMode.num_done)
-            stream_cmd.num_samps = samples_to_collect
-            stream_cmd.stream_now = True
-            self.rx_streamer.issue_stream_cmd(stream_cmd)
+            # This needs to be tested further, it seems it can drift
+            # stream_start = self._get_timestamp(rx_metadata)
+
+            # Records are contiguous in the stream, so each one starts exactly
+            # one record length of samples after the previous
+            record_duration_sec = samples_per_record / self.config.bandwidth_hz
+            results = []
+            for index, capture in enumerate(captures):
+                capture.capture_timestamp = stream_start + timedelta(
+                    seconds=index * record_duration_sec
+                )
+                results.append(
+                    CaptureResult(
+                        raw_capture=capture, receiver_config=config_at_capture
+                    )
+                )
 
-            try:
-                # Use a timeout slightly longer than the expected capture duration
-                timeout = self.config.duration_sec + 2.0
+            return results
 
-                capture_timestamp = datetime.now(timezone.utc)
+    def _allocate_capture(
+        self, center_freq_hz: int, num_samples: int, timeout: float
+    ) -> RawCapture:
+        """
+        Creates an empty capture backed by a streamed file or a pooled buffer,
+        waiting up to `timeout` seconds for a free buffer. The timestamp is
+        filled in once the stream has started.
+        """
+        if self.stream_dir is not None:
+            capture_file = StreamedCaptureFile(
+                self.stream_dir, num_samples, self.checksum_method.create()
+            )
+            return RawCapture(
+                iq_data=capture_file.samples,
+                center_freq_hz=center_freq_hz,
+                capture_timestamp=datetime.now(timezone.utc),
+                capture_file=capture_file,
+            )
 
-                start_recv = time.monotonic()
-                samples_received = self.rx_streamer.recv(
-                    capture_buffer, rx_metadata, timeout=timeout
+        # Raises BufferPoolExhaustedError if processing has fallen behind
+        lease = self.buffer_pool.acquire(timeout=timeout)
+        return RawCapture(
+            iq_data=lease.buffer[:num_samples],
+            center_freq_hz=center_freq_hz,
+            capture_timestamp=datetime.now(timezone.utc),
+            buffer_lease=lease,
+        )
+
+    def _recv_into(self, capture: RawCapture) -> None:
+        """
+        Fills the capture with samples from the running stream, one chunk per
+        recv() call. Must be called with the hardware lock held.
+        """
+        target = capture.iq_data
+        capture_file = capture.capture_file
+        samples_to_collect = len(target)
+        rx_metadata = uhd.types.RXMetadata()
+
+        # Keep chunks short enough in time that an abort is noticed promptly
+        chunk_samples = min(
+            self._chunk_samples,
+            max(1, int(self.config.bandwidth_hz * ABORT_POLL_INTERVAL_SEC)),
+        )
+
+        # Use a timeout slightly longer than the expected time to fill one chunk
+        timeout = chunk_samples / self.config.bandwidth_hz + 2.0
+
+        samples_received = 0
+        while samples_received < samples_to_collect:
+            if self._abort_event.is_set():
+                raise CaptureAbortedError(
+                    f"Capture aborted after {samples_received} of {samples_to_collect} samples"
                 )
-                recv_duration = time.monotonic() - start_recv
 
-                logger.info(f"recv() call returned after {recv_duration:.3f} seconds.")
+            chunk = target[samples_received : samples_received + chunk_samples]
 
+            try:
+                chunk_received = self.rx_streamer.recv(
+                    chunk, rx_metadata, timeout=timeout
+                )
             except RuntimeError as e:
                 logger.error(f"A UHD recv error occurred: {e}", exc_info=True)
                 raise
@@ -141,29 +452,42 @@ class Receiver:
                     f"UHD recv completed with error: {rx_metadata.strerror()}"
                 )
 
-            if samples_received < samples_to_collect:
-                raise RuntimeError(
-                    f"Capture truncated: expected {samples_to_collect}, received {samples_received}"
-                )
+            if chunk_received == 0:
+                break
 
-            # This needs to be tested further, it seems it can drift
-            # capture_timestamp = self._get_timestamp(rx_metadata)
+            if capture_file is not None:
+                capture_file.commit(samples_received, chunk_received)
+            samples_received += chunk_received
 
-            raw_capture = RawCapture(
-                iq_data_bytes=capture_buffer.tobytes(),
-                center_freq_hz=center_freq_hz,
-                capture_timestamp=capture_timestamp,
+        if samples_received < samples_to_collect:
+            raise RuntimeError(
+                f"Capture truncated: expected {samples_to_collect}, received {samples_received}"
             )
 
-            result = CaptureResult(
-                raw_capture=raw_capture, receiver_config=config_at_capture
+        if capture_file is not None:
+            capture_file.finalize()
+
+    def _stop_stream(self) -> None:
+        """
+        Stops a continuous stream and discards the samples that were already
+        in flight so the next capture starts from a clean streamer.
+        """
+        try:
+            self.rx_streamer.issue_stream_cmd(
+                uhd.types.StreamCMD(uhd.types.StreamMode.stop_cont)
             )
 
-            return result
+            rx_metadata = uhd.types.RXMetadata()
+            while self.rx_streamer.recv(self._drain_buffer, rx_metadata, timeout=0.1):
+                pass
+
+        except RuntimeError as e:
+            # Don't mask the error that got us here, recovery re-initializes anyway
+            logger.warning(f"Failed to stop and drain the stream: {e}")
 
     async def get_temperature(self) -> Optional[float]:
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._get_temperature_blocking)
+        return await loop.run_in_executor(self.executor, self._get_temperature_blocking)
 
     def _get_temperature_blocking(self) -> Optional[float]:
         with self._hardware_lock:
@@ -201,15 +525,31 @@ class Receiver:
 
         return precise_timestamp
 
-    def _wait_for_settle_lo(self):
+    def _wait_for_settle_lo(self, center_freq_hz: int) -> bool:
+        """Waits for the LO to lock, returns False if it timed out."""
         max_lock_wait_sec = 1.0
         start_wait = time.monotonic()
+
+        # Sleep through most of the lock time measured previously instead of
+        # spinning on the sensor for all of it
+        expected_lock_sec = self.tuning_cache.expected_lock_time(center_freq_hz)
+        if expected_lock_sec:
+            time.sleep(
+                min(expected_lock_sec * LO_SETTLE_SLEEP_FRACTION, max_lock_wait_sec)
+            )
+
+        locked = True
         while not self.usrp.get_rx_sensor("lo_locked", 0).to_bool():
             if time.monotonic() - start_wait > max_lock_wait_sec:
                 logger.error(
                     f"USRP failed to lock LO at target frequency within {max_lock_wait_sec}s."
                 )
+                locked = False
                 break
+            time.sleep(LO_LOCK_POLL_INTERVAL_SEC)
 
         lock_time = time.monotonic() - start_wait
-        logger.debug(f"LO locked in {lock_time * 1000:.2f} ms.")
+        self.tuning_cache.record_lock(center_freq_hz, lock_time, locked)
+        if locked:
+            logger.debug(f"LO locked in {lock_time * 1000:.2f} ms.")
+        return locked
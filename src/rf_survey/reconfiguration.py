@@ -0,0 +1,79 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from pydantic import ValidationError
+
+from rf_survey.models import ReceiverConfig, SweepConfig
+from rf_survey.validators import ZmsReconfigurationParams
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReconfigurationPlan:
+    """
+    The parts of the survey a ZMS reconfiguration actually changes.
+    A config is None when it is unchanged.
+    """
+
+    receiver_config: Optional[ReceiverConfig] = None
+    sweep_config: Optional[SweepConfig] = None
+
+    # The target status stops the survey
+    pause: bool = False
+
+    @property
+    def has_changes(self) -> bool:
+        return self.receiver_config is not None or self.sweep_config is not None
+
+
+def plan_reconfiguration(
+    current_receiver_config: ReceiverConfig,
+    current_sweep_config: SweepConfig,
+    params: Optional[Dict[str, Any]],
+    pause: bool,
+) -> ReconfigurationPlan:
+    """
+    Validates raw ZMS parameters and classifies them against the current
+    configuration. Raises ValueError on validation failure.
+    """
+    plan = ReconfigurationPlan(pause=pause)
+
+    if not params:
+        return plan
+
+    try:
+        validated_params = ZmsReconfigurationParams(**params)
+
+    except ValidationError as e:
+        error_details = e.errors()
+        logger.error(f"ZMS parameter validation failed: {error_details}")
+        raise ValueError(f"Invalid parameters from ZMS: {error_details}") from e
+
+    new_receiver_config = ReceiverConfig(
+        gain_db=validated_params.gain_db,
+        duration_sec=validated_params.duration_sec,
+        bandwidth_hz=validated_params.bandwidth_hz,
+        # Carry over values that are not set by ZMS
+        antenna=current_receiver_config.antenna,
+    )
+
+    new_sweep_config = SweepConfig(
+        start_hz=validated_params.start_freq_hz,
+        end_hz=validated_params.end_freq_hz,
+        step_hz=validated_params.bandwidth_hz,
+        interval_sec=validated_params.sample_interval,
+        # Carry over values that are not set by ZMS
+        cycles=current_sweep_config.cycles,
+        records_per_step=current_sweep_config.records_per_step,
+        max_jitter_sec=current_sweep_config.max_jitter_sec,
+        continuous_records=current_sweep_config.continuous_records,
+    )
+
+    if new_receiver_config != current_receiver_config:
+        plan.receiver_config = new_receiver_config
+
+    if new_sweep_config != current_sweep_config:
+        plan.sweep_config = new_sweep_config
+
+    return plan
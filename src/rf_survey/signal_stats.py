@@ -0,0 +1,109 @@
+import math
+
+import numpy as np
+from pydantic import BaseModel
+
+from rf_survey.spectrum import SC16_FULL_SCALE, sc16_as_iq
+
+# Samples converted per vectorized step, bounds the working memory
+STATS_CHUNK_SAMPLES = 1 << 18
+
+# A component at either ADC rail counts the sample as saturated. The
+# B200's 12-bit ADC fills the high bits of sc16, so its positive rail is
+# 2047 << 4, not 32767
+CLIP_LEVEL = 0x7FF0
+
+# Floor for the dB conversions, keeps an all-zero capture finite
+MIN_POWER = 1e-30
+
+DEFAULT_BAND_WIDTH_HZ = 100_000_000
+
+
+class SignalStats(BaseModel):
+    """Cheap quality statistics of a capture, relative to ADC full scale."""
+
+    rms_dbfs: float
+    peak_dbfs: float
+    # Peak-to-average power ratio
+    papr_db: float
+
+    # Mean of each component as a fraction of full scale
+    dc_offset_i: float
+    dc_offset_q: float
+    dc_offset_dbfs: float
+
+    # Power of I over power of Q and the phase error between them, DC removed
+    iq_gain_imbalance_db: float
+    iq_phase_imbalance_deg: float
+
+    saturated_samples: int
+    saturation_fraction: float
+
+
+def _db(power: float) -> float:
+    return 10 * math.log10(max(power, MIN_POWER))
+
+
+def compute_signal_stats(samples: np.ndarray) -> SignalStats:
+    """
+    Computes SignalStats of sc16 samples in one chunked pass, converting each
+    chunk to float32 once.
+    """
+    iq = sc16_as_iq(samples)
+    count = max(len(iq), 1)
+
+    sums = np.zeros(2, dtype=np.float64)
+    squares = np.zeros(2, dtype=np.float64)
+    cross = 0.0
+    peak_power = 0.0
+    saturated = 0
+
+    for start in range(0, len(iq), STATS_CHUNK_SAMPLES):
+        chunk = iq[start : start + STATS_CHUNK_SAMPLES]
+        # Contiguous components, so the reductions below run on BLAS/SIMD paths
+        i = chunk[:, 0].astype(np.float32)
+        q = chunk[:, 1].astype(np.float32)
+
+        sums += (float(i.sum()), float(q.sum()))
+        squares += (float(np.dot(i, i)), float(np.dot(q, q)))
+        cross += float(np.dot(i, q))
+
+        chunk_peak = float((i * i + q * q).max())
+        peak_power = max(peak_power, chunk_peak)
+        # Only a chunk reaching the rails can hold saturated samples
+        if chunk_peak >= CLIP_LEVEL**2:
+            rails = (chunk >= CLIP_LEVEL) | (chunk <= -CLIP_LEVEL)
+            saturated += int(np.count_nonzero(rails.any(axis=1)))
+
+    full_scale_power = SC16_FULL_SCALE**2
+    mean = sums / count
+    mean_power = float(squares.sum()) / count
+
+    # Second moments about the mean, so the DC offset does not skew the imbalance
+    var_i, var_q = squares / count - mean**2
+    covariance = cross / count - mean[0] * mean[1]
+    correlation = covariance / math.sqrt(max(var_i * var_q, MIN_POWER))
+
+    rms_dbfs = _db(mean_power / full_scale_power)
+    peak_dbfs = _db(peak_power / full_scale_power)
+
+    return SignalStats(
+        rms_dbfs=rms_dbfs,
+        peak_dbfs=peak_dbfs,
+        papr_db=peak_dbfs - rms_dbfs,
+        dc_offset_i=float(mean[0]) / SC16_FULL_SCALE,
+        dc_offset_q=float(mean[1]) / SC16_FULL_SCALE,
+        dc_offset_dbfs=_db(float(np.sum(mean**2)) / full_scale_power),
+        iq_gain_imbalance_db=_db(var_i) - _db(var_q),
+        iq_phase_imbalance_deg=math.degrees(
+            math.asin(min(1.0, max(-1.0, correlation)))
+        ),
+        saturated_samples=saturated,
+        saturation_fraction=saturated / count,
+    )
+
+
+def band_label(center_freq_hz: int, band_width_hz: int = DEFAULT_BAND_WIDTH_HZ) -> str:
+    """Names the fixed-width band a frequency falls in, e.g. '900-1000MHz'."""
+    low = center_freq_hz // band_width_hz * band_width_hz
+    return f"{low / 1e6:g}-{(low + band_width_hz) / 1e6:g}MHz"
@@ -0,0 +1,162 @@
+import base64
+from dataclasses import dataclass
+from typing import Iterator, Literal
+
+import numpy as np
+from pydantic import BaseModel
+
+# sc16 full scale, samples are normalized so a full scale tone is 0 dBFS
+SC16_FULL_SCALE = 32768.0
+
+# Segments transformed per vectorized step, bounds the working memory
+SEGMENTS_PER_CHUNK = 256
+
+WINDOWS = {
+    "hann": np.hanning,
+    "hamming": np.hamming,
+    "blackman": np.blackman,
+    "rectangular": np.ones,
+}
+
+
+@dataclass(frozen=True)
+class WelchConfig:
+    """Parameters of the Welch power spectral density estimate."""
+
+    fft_size: int = 1024
+    window: str = "hann"
+    # Fraction of each segment shared with the next one
+    overlap: float = 0.5
+    # How the segment periodograms are combined, max gives a peak hold
+    average: Literal["mean", "max"] = "mean"
+    # Segments averaged, spread evenly over the capture. 0 uses all of them.
+    max_segments: int = 0
+
+    def __post_init__(self):
+        if self.window not in WINDOWS:
+            raise ValueError(
+                f"Unknown window '{self.window}', expected one of {sorted(WINDOWS)}"
+            )
+        if not 0 <= self.overlap < 1:
+            raise ValueError("overlap must be in [0, 1)")
+        if self.fft_size < 2:
+            raise ValueError("fft_size must be at least 2")
+
+    @property
+    def step(self) -> int:
+        return max(1, int(self.fft_size * (1 - self.overlap)))
+
+
+def sc16_as_iq(samples: np.ndarray) -> np.ndarray:
+    """
+    Returns a zero-copy (N, 2) int16 view of sc16 samples stored one per
+    int32, with I in column 0 and Q in column 1.
+    """
+    return samples.view(np.int16).reshape(-1, 2)
+
+
+def iter_periodograms(
+    samples: np.ndarray, sample_rate_hz: float, config: WelchConfig
+) -> Iterator[np.ndarray]:
+    """
+    Yields the windowed periodograms of the segments of sc16 samples, a chunk
+    of segments at a time, as power densities of the normalized signal with
+    DC in bin 0. Segments are spread evenly over the capture when
+    `config.max_segments` limits them.
+    """
+    iq = sc16_as_iq(samples)
+    fft_size, step = config.fft_size, config.step
+
+    num_segments = 1 + (len(iq) - fft_size) // step if len(iq) >= fft_size else 0
+    if num_segments == 0:
+        raise ValueError(f"Capture is shorter than one {fft_size} point segment")
+
+    starts = np.arange(num_segments) * step
+    if 0 < config.max_segments < num_segments:
+        starts = starts[
+            np.linspace(0, num_segments - 1, config.max_segments).astype(int)
+        ]
+
+    window = WINDOWS[config.window](fft_size).astype(np.float32)
+    offsets = np.arange(fft_size)
+    # Scale to a density of the normalized complex signal
+    scale = SC16_FULL_SCALE**2 * sample_rate_hz * np.sum(window.astype(np.float64) ** 2)
+
+    for chunk_starts in np.array_split(
+        starts, max(1, len(starts) // SEGMENTS_PER_CHUNK)
+    ):
+        # Gather the segments of this chunk, converting only what is used
+        segment_iq = iq[chunk_starts[:, None] + offsets]
+        segments = np.empty(segment_iq.shape[:2], dtype=np.complex64)
+        segments.real = segment_iq[..., 0]
+        segments.imag = segment_iq[..., 1]
+        segments *= window
+
+        power = np.abs(np.fft.fft(segments, axis=1)) ** 2
+        yield power / scale
+
+
+def welch_psd(
+    samples: np.ndarray, sample_rate_hz: float, config: WelchConfig
+) -> tuple[np.ndarray, int]:
+    """
+    Estimates the power spectral density of sc16 samples in dBFS/Hz, with DC
+    in the centre bin. Returns the float32 spectrum and the number of
+    segments it combines.
+    """
+    combined = np.zeros(config.fft_size, dtype=np.float64)
+    num_segments = 0
+
+    for density in iter_periodograms(samples, sample_rate_hz, config):
+        num_segments += len(density)
+        if config.average == "max":
+            np.maximum(combined, density.max(axis=0), out=combined)
+        else:
+            combined += density.sum(axis=0)
+
+    if config.average == "mean":
+        combined /= num_segments
+
+    psd_db = 10 * np.log10(np.maximum(combined, 1e-30))
+    return np.fft.fftshift(psd_db).astype(np.float32), num_segments
+
+
+class SpectrumSummary(BaseModel):
+    """Compact spectral summary of a capture."""
+
+    fft_size: int
+    window: str
+    average: str
+    segments: int
+    bin_width_hz: float
+
+    # Median bin, robust against narrowband signals
+    noise_floor_dbfs_hz: float
+    peak_dbfs_hz: float
+    # Offset of the strongest bin from the center frequency
+    peak_offset_hz: float
+
+    # The float32 spectrum, little-endian, base64 encoded
+    spectrum_dbfs_hz: str
+
+    def spectrum(self) -> np.ndarray:
+        return np.frombuffer(base64.b64decode(self.spectrum_dbfs_hz), dtype="<f4")
+
+
+def summarize_spectrum(
+    psd_db: np.ndarray, segments: int, sample_rate_hz: float, config: WelchConfig
+) -> SpectrumSummary:
+    bin_width_hz = sample_rate_hz / config.fft_size
+    peak_bin = int(np.argmax(psd_db))
+
+    return SpectrumSummary(
+        fft_size=config.fft_size,
+        window=config.window,
+        average=config.average,
+        segments=segments,
+        bin_width_hz=bin_width_hz,
+        noise_floor_dbfs_hz=float(np.median(psd_db)),
+        peak_dbfs_hz=float(psd_db[peak_bin]),
+        peak_offset_hz=(peak_bin - config.fft_size // 2) * bin_width_hz,
+        spectrum_dbfs_hz=base64.b64encode(psd_db.astype("<f4").tobytes()).decode(),
+    )
@@ -0,0 +1,135 @@
+import logging
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from rf_survey.capture_file import SpooledCaptureFile
+from rf_survey.hashing import ChecksumMethod, write_and_hash
+from rf_survey.models import (
+    ProcessingJob,
+    RawCapture,
+    ReceiverConfig,
+    SweepConfig,
+    SweepPosition,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SpoolRecord(BaseModel):
+    """Everything needed to process a spilled capture, stored next to its samples."""
+
+    center_freq_hz: int
+    capture_timestamp: datetime
+    checksum: str
+    receiver_config: ReceiverConfig
+    sweep_config: SweepConfig
+    sweep_position: Optional[SweepPosition] = None
+
+
+class CaptureSpool:
+    """
+    A local directory holding captures that could not be kept in memory.
+
+    Each capture is stored as its sc16 samples plus a JSON sidecar. The
+    samples are checksummed while they are spilled, so processing a spooled
+    capture only has to move the file. The sidecar is written last and marks
+    the capture as complete, anything without one is a partial spill.
+    """
+
+    def __init__(self, directory: Path, checksum_method: ChecksumMethod):
+        self.directory = directory
+        self.checksum_method = checksum_method
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def spill(self, job: ProcessingJob) -> ProcessingJob:
+        """
+        Writes the job's capture to the spool and returns the same job backed
+        by the spool file. The in-memory capture is released.
+        """
+        raw_capture = job.raw_capture
+        timestamp_str = raw_capture.capture_timestamp.strftime("D%Y%m%dT%H%M%SM%f")
+        stem = f"{timestamp_str}-{uuid.uuid4().hex[:8]}"
+        data_path = self.directory / f"{stem}.sc16"
+        sidecar_path = self.directory / f"{stem}.json"
+
+        try:
+            if raw_capture.capture_file is not None:
+                # Already written and checksummed, only the location changes
+                raw_capture.capture_file.move_to(data_path)
+                checksum = raw_capture.capture_file.checksum
+            else:
+                checksum, _ = write_and_hash(
+                    data_path, raw_capture.iq_data, self.checksum_method
+                )
+            record = SpoolRecord(
+                center_freq_hz=raw_capture.center_freq_hz,
+                capture_timestamp=raw_capture.capture_timestamp,
+                checksum=checksum,
+                receiver_config=job.receiver_config_snapshot,
+                sweep_config=job.sweep_config_snapshot,
+                sweep_position=job.sweep_position,
+            )
+            tmp_path = sidecar_path.with_name(sidecar_path.name + ".tmp")
+            tmp_path.write_text(record.model_dump_json())
+            os.replace(tmp_path, sidecar_path)
+
+        except BaseException:
+            data_path.unlink(missing_ok=True)
+            raise
+
+        finally:
+            raw_capture.release()
+
+        return self._load(sidecar_path, record, job.sequence)
+
+    def recover(self, first_sequence: int) -> List[ProcessingJob]:
+        """
+        Loads the captures left in the spool by a previous run, oldest first,
+        numbered from `first_sequence`. Partial spills are deleted.
+        """
+        jobs = []
+        for sidecar_path in sorted(self.directory.glob("*.json")):
+            try:
+                record = SpoolRecord.model_validate_json(sidecar_path.read_text())
+            except (OSError, ValidationError) as e:
+                logger.warning(f"Ignoring unreadable spool entry {sidecar_path}: {e}")
+                continue
+
+            if not sidecar_path.with_suffix(".sc16").exists():
+                logger.warning(f"Spool entry {sidecar_path} has no samples, removing.")
+                sidecar_path.unlink(missing_ok=True)
+                continue
+
+            jobs.append(self._load(sidecar_path, record, first_sequence + len(jobs)))
+
+        for data_path in self.directory.glob("*.sc16"):
+            if not data_path.with_suffix(".json").exists():
+                logger.warning(f"Removing partially spilled capture {data_path}")
+                data_path.unlink(missing_ok=True)
+
+        return jobs
+
+    def _load(
+        self, sidecar_path: Path, record: SpoolRecord, sequence: int
+    ) -> ProcessingJob:
+        capture_file = SpooledCaptureFile(
+            sidecar_path.with_suffix(".sc16"), record.checksum, sidecar_path
+        )
+        raw_capture = RawCapture(
+            iq_data=capture_file.samples,
+            center_freq_hz=record.center_freq_hz,
+            capture_timestamp=record.capture_timestamp,
+            capture_file=capture_file,
+        )
+        return ProcessingJob(
+            raw_capture=raw_capture,
+            receiver_config_snapshot=record.receiver_config,
+            sweep_config_snapshot=record.sweep_config,
+            sequence=sequence,
+            sweep_position=record.sweep_position,
+        )
@@ -0,0 +1,227 @@
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from pydantic import BaseModel, ValidationError
+
+from rf_survey.capture_index import SIDECAR_SUFFIX
+from rf_survey.signal_stats import DEFAULT_BAND_WIDTH_HZ, band_label
+
+logger = logging.getLogger(__name__)
+
+# Everything written for a capture starts with this, followed by its suffixes
+TIMESTAMP_FORMAT = "D%Y%m%dT%H%M%SM%f"
+_CAPTURE_NAME = re.compile(r"^(?P<stem>.+-(?P<timestamp>D\d{8}T\d{6}M\d{6}))\.")
+
+LAYOUT_FIELDS = ("year", "month", "day", "hour", "band")
+
+# Directories remembered as existing, the cache is cleared beyond this
+MAX_CACHED_DIRECTORIES = 4096
+
+
+def capture_stem(serial: Optional[str], hostname: str, timestamp: datetime) -> str:
+    """The name every file of a capture starts with."""
+    return f"{serial}-{hostname}-{timestamp.strftime(TIMESTAMP_FORMAT)}"
+
+
+class StorageLayout:
+    """
+    Where captures are stored below the storage directory.
+
+    The layout is a template of subdirectories, e.g. "{year}/{month}/{day}/{hour}"
+    or "{year}{month}{day}/{hour}/{band}", filled in from each capture's
+    timestamp and center frequency. An empty template stores everything
+    flat in the storage directory. Directories are created when the first
+    capture goes into them, and the ones known to exist are cached so the
+    hot path does not touch the (possibly network) filesystem for them.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        template: str = "",
+        band_width_hz: int = DEFAULT_BAND_WIDTH_HZ,
+    ):
+        self.root = root
+        self.template = template.strip("/")
+        self.band_width_hz = band_width_hz
+        self._lock = threading.Lock()
+        self._existing: Set[Path] = set()
+
+        # Fails early on placeholders that cannot be filled in
+        try:
+            self.template.format(**{name: "x" for name in LAYOUT_FIELDS})
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(
+                f"Invalid storage layout '{template}', "
+                f"placeholders are {', '.join(LAYOUT_FIELDS)}"
+            ) from e
+
+    @property
+    def uses_band(self) -> bool:
+        return "{band}" in self.template
+
+    def relative_directory(
+        self, timestamp: datetime, center_freq_hz: Optional[int] = None
+    ) -> Path:
+        """The subdirectory of the root a capture belongs in."""
+        if not self.template:
+            return Path()
+        if self.uses_band and center_freq_hz is None:
+            raise ValueError("The storage layout needs the capture's frequency")
+
+        return Path(
+            self.template.format(
+                year=f"{timestamp.year:04d}",
+                month=f"{timestamp.month:02d}",
+                day=f"{timestamp.day:02d}",
+                hour=f"{timestamp.hour:02d}",
+                band=(
+                    band_label(center_freq_hz, self.band_width_hz)
+                    if center_freq_hz is not None
+                    else ""
+                ),
+            )
+        )
+
+    def directory(
+        self, timestamp: datetime, center_freq_hz: Optional[int] = None
+    ) -> Path:
+        """The directory a capture belongs in, created if it does not exist yet."""
+        directory = self.root / self.relative_directory(timestamp, center_freq_hz)
+        with self._lock:
+            if directory in self._existing:
+                return directory
+
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if len(self._existing) >= MAX_CACHED_DIRECTORIES:
+                self._existing.clear()
+            self._existing.add(directory)
+        return directory
+
+
+class _CaptureFrequency(BaseModel):
+    # The part of a capture's sidecar the band is derived from
+    frequency: int
+
+
+@dataclass
+class MigrationResult:
+    moved: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+
+def migrate_flat_archive(
+    layout: StorageLayout,
+    source_dir: Optional[Path] = None,
+    workers: int = 8,
+    dry_run: bool = False,
+) -> MigrationResult:
+    """
+    Moves the capture files lying flat in `source_dir` (the layout's root by
+    default) into the layout below its root.
+
+    All files of a capture (samples, sidecar, spectrum, ...) are moved
+    together by one worker, captures are spread over `workers` threads since
+    each rename is mostly filesystem round-trips. Files are renamed, so the
+    source must be on the same filesystem. A layout by band needs each
+    capture's sidecar for its frequency; captures without one, and files
+    whose destination already exists, are skipped. Running it again picks
+    up whatever an interrupted run left behind.
+    """
+    if not layout.template:
+        raise ValueError("Cannot migrate into a flat layout")
+
+    source_dir = source_dir or layout.root
+    captures: Dict[str, List[Path]] = {}
+    with os.scandir(source_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            if entry.name.endswith(".tmp"):
+                # Still being written
+                continue
+            match = _CAPTURE_NAME.match(entry.name)
+            if match is None:
+                continue
+            captures.setdefault(match["stem"], []).append(Path(entry.path))
+
+    logger.info(f"Migrating {len(captures)} captures from {source_dir}.")
+    result = MigrationResult()
+    lock = threading.Lock()
+
+    def migrate_capture(files: List[Path]) -> None:
+        outcome = _migrate_capture(layout, files, dry_run)
+        with lock:
+            result.moved += outcome.moved
+            result.skipped += outcome.skipped
+            result.failed += outcome.failed
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Consume the results so a worker's exception is raised here
+        list(executor.map(migrate_capture, captures.values()))
+
+    logger.info(
+        f"Moved {result.moved} files, skipped {result.skipped}, "
+        f"{result.failed} failed."
+    )
+    return result
+
+
+def _migrate_capture(
+    layout: StorageLayout, files: List[Path], dry_run: bool
+) -> MigrationResult:
+    result = MigrationResult()
+    match = _CAPTURE_NAME.match(files[0].name)
+    timestamp = datetime.strptime(match["timestamp"], TIMESTAMP_FORMAT)
+
+    center_freq_hz = None
+    if layout.uses_band:
+        center_freq_hz = _sidecar_frequency(files)
+        if center_freq_hz is None:
+            logger.warning(f"Skipping {match['stem']}, its frequency is unknown.")
+            result.skipped += len(files)
+            return result
+
+    if dry_run:
+        directory = layout.root / layout.relative_directory(timestamp, center_freq_hz)
+    else:
+        directory = layout.directory(timestamp, center_freq_hz)
+
+    # The sidecar goes last, a capture is only indexed once its samples are there
+    for path in sorted(files, key=lambda p: p.suffix == SIDECAR_SUFFIX):
+        destination = directory / path.name
+        if destination.exists():
+            logger.warning(f"Not moving {path}, {destination} already exists.")
+            result.skipped += 1
+            continue
+        if dry_run:
+            logger.info(f"Would move {path} to {destination}")
+            result.moved += 1
+            continue
+        try:
+            os.rename(path, destination)
+            result.moved += 1
+        except OSError as e:
+            logger.error(f"Failed to move {path} to {destination}: {e}")
+            result.failed += 1
+    return result
+
+
+def _sidecar_frequency(files: List[Path]) -> Optional[int]:
+    for path in files:
+        if path.suffix != SIDECAR_SUFFIX:
+            continue
+        try:
+            return _CaptureFrequency.model_validate_json(path.read_text()).frequency
+        except (OSError, ValidationError):
+            return None
+    return None
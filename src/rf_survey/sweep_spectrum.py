@@ -0,0 +1,241 @@
+import base64
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from rf_survey.models import SweepConfig, SweepPosition
+
+logger = logging.getLogger(__name__)
+
+# Central fraction of each step's bandwidth kept, the rest is filter roll-off
+DEFAULT_USABLE_FRACTION = 0.8
+
+# Bins in the published preview, the full spectrum is stored on disk
+PREVIEW_BINS = 2048
+
+
+@dataclass
+class StepSpectrum:
+    """The PSD of one capture, tagged with its place in the sweep."""
+
+    position: SweepPosition
+    sweep_config: SweepConfig
+    center_freq_hz: int
+    sample_rate_hz: int
+    timestamp: datetime
+    # fftshifted dBFS/Hz, as returned by welch_psd
+    psd_db: np.ndarray
+
+
+class WidebandSpectrum:
+    """
+    A spectrum covering a whole sweep, allocated up front and filled in as
+    the steps arrive.
+
+    Only the central `usable_fraction` of each step is used. Bins covered by
+    several steps or records are averaged in linear power; bins no step
+    covered are NaN.
+    """
+
+    def __init__(
+        self,
+        sweep_config: SweepConfig,
+        sample_rate_hz: int,
+        fft_size: int,
+        usable_fraction: float = DEFAULT_USABLE_FRACTION,
+    ):
+        if not 0 < usable_fraction <= 1:
+            raise ValueError("usable_fraction must be in (0, 1]")
+
+        self.sample_rate_hz = sample_rate_hz
+        self.fft_size = fft_size
+        self.bin_width_hz = sample_rate_hz / fft_size
+
+        # Bins kept either side of the centre bin
+        self._half_bins = int(usable_fraction * fft_size / 2)
+        # Range of each step's bins that is kept, DC sits at fft_size // 2
+        center_bin = fft_size // 2
+        self._keep = slice(
+            center_bin - self._half_bins,
+            min(fft_size, center_bin + self._half_bins + 1),
+        )
+
+        last_center_hz = (
+            sweep_config.start_hz + (sweep_config.num_steps - 1) * sweep_config.step_hz
+        )
+        self.start_freq_hz = sweep_config.start_hz - self._half_bins * self.bin_width_hz
+        span_bins = round((last_center_hz - sweep_config.start_hz) / self.bin_width_hz)
+        self.num_bins = span_bins + 2 * self._half_bins + 1
+
+        self._power = np.zeros(self.num_bins, dtype=np.float64)
+        self._counts = np.zeros(self.num_bins, dtype=np.uint32)
+
+    def add(self, center_freq_hz: int, psd_db: np.ndarray) -> None:
+        """Accumulates the usable part of one step's spectrum."""
+        if len(psd_db) != self.fft_size:
+            raise ValueError(
+                f"Expected a {self.fft_size} bin spectrum, got {len(psd_db)} bins"
+            )
+
+        lo, hi = self._keep.start, self._keep.stop
+        # Position of this step's first kept bin in the wideband array
+        first = (
+            round((center_freq_hz - self.start_freq_hz) / self.bin_width_hz)
+            - self._half_bins
+        )
+
+        # Steps off the expected grid are clipped to the array
+        clip_lo = max(0, -first)
+        clip_hi = max(0, first + (hi - lo) - self.num_bins)
+        if clip_lo + clip_hi >= hi - lo:
+            return
+
+        target = slice(first + clip_lo, first + (hi - lo) - clip_hi)
+        self._power[target] += 10 ** (psd_db[lo + clip_lo : hi - clip_hi] / 10.0)
+        self._counts[target] += 1
+
+    def spectrum(self) -> np.ndarray:
+        """The stitched spectrum in dBFS/Hz as float32."""
+        covered = self._counts > 0
+        spectrum = np.full(self.num_bins, np.nan, dtype=np.float32)
+        spectrum[covered] = 10 * np.log10(
+            np.maximum(self._power[covered] / self._counts[covered], 1e-30)
+        )
+        return spectrum
+
+
+@dataclass
+class CompletedSweep:
+    """A stitched sweep, complete or cut short."""
+
+    sweep_id: str
+    sweep_config: SweepConfig
+    start_timestamp: datetime
+    end_timestamp: datetime
+    captures_expected: int
+    captures_received: int
+    spectrum: WidebandSpectrum
+
+    @property
+    def complete(self) -> bool:
+        return self.captures_received == self.captures_expected
+
+
+class SweepStitcher:
+    """
+    Collects step spectra in capture order and stitches them per sweep.
+
+    A sweep is finished by its last capture, or by the first capture of the
+    next sweep when it was cut short or captures were lost. Only one sweep is
+    held at a time.
+    """
+
+    def __init__(self, usable_fraction: float = DEFAULT_USABLE_FRACTION):
+        self.usable_fraction = usable_fraction
+        self._current: Optional[CompletedSweep] = None
+
+    def add(self, step: StepSpectrum) -> List[CompletedSweep]:
+        """Adds a step and returns the sweeps it finished."""
+        finished = []
+        current = self._current
+        if current is not None and current.sweep_id != step.position.sweep_id:
+            finished.append(current)
+            current = None
+
+        if current is None:
+            config = step.sweep_config
+            current = CompletedSweep(
+                sweep_id=step.position.sweep_id,
+                sweep_config=config,
+                start_timestamp=step.timestamp,
+                end_timestamp=step.timestamp,
+                captures_expected=config.num_steps * config.records_per_step,
+                captures_received=0,
+                spectrum=WidebandSpectrum(
+                    config, step.sample_rate_hz, len(step.psd_db), self.usable_fraction
+                ),
+            )
+
+        if step.sample_rate_hz != current.spectrum.sample_rate_hz:
+            logger.warning(
+                f"Capture at {step.center_freq_hz} Hz has a different sample rate "
+                "than the rest of its sweep, leaving it out of the sweep spectrum."
+            )
+        else:
+            current.spectrum.add(step.center_freq_hz, step.psd_db)
+            current.captures_received += 1
+            current.end_timestamp = step.timestamp
+
+        if step.position.is_last:
+            finished.append(current)
+            current = None
+
+        self._current = current
+        return finished
+
+    def flush(self) -> Optional[CompletedSweep]:
+        """Returns the sweep in progress, if any. Used on shutdown."""
+        current, self._current = self._current, None
+        return current
+
+
+class WidebandSummary(BaseModel):
+    """Compact description of a stitched sweep spectrum."""
+
+    start_freq_hz: float
+    bin_width_hz: float
+    num_bins: int
+    # Fraction of the band covered by at least one step
+    coverage: float
+
+    # Unset when no step was stitched
+    noise_floor_dbfs_hz: Optional[float] = None
+    peak_dbfs_hz: Optional[float] = None
+    peak_freq_hz: Optional[float] = None
+
+    # Peak held down to at most PREVIEW_BINS bins, little-endian float32, base64
+    preview_bin_width_hz: float
+    preview_dbfs_hz: str
+
+    def preview(self) -> np.ndarray:
+        return np.frombuffer(base64.b64decode(self.preview_dbfs_hz), dtype="<f4")
+
+
+def summarize_wideband(
+    spectrum: np.ndarray,
+    start_freq_hz: float,
+    bin_width_hz: float,
+    preview_bins: int = PREVIEW_BINS,
+) -> WidebandSummary:
+    covered = ~np.isnan(spectrum)
+    noise_floor = peak = peak_freq = None
+    if covered.any():
+        peak_bin = int(np.nanargmax(spectrum))
+        noise_floor = float(np.nanmedian(spectrum))
+        peak = float(spectrum[peak_bin])
+        peak_freq = start_freq_hz + peak_bin * bin_width_hz
+
+    # Max over groups of bins, so narrowband signals survive the reduction
+    factor = max(1, -(-len(spectrum) // preview_bins))
+    padded = np.full(-(-len(spectrum) // factor) * factor, np.nan, dtype=np.float32)
+    padded[: len(spectrum)] = spectrum
+    groups = padded.reshape(-1, factor)
+    preview = np.full(len(groups), np.nan, dtype=np.float32)
+    has_data = ~np.isnan(groups).all(axis=1)
+    preview[has_data] = np.nanmax(groups[has_data], axis=1)
+
+    return WidebandSummary(
+        start_freq_hz=start_freq_hz,
+        bin_width_hz=bin_width_hz,
+        num_bins=len(spectrum),
+        coverage=float(np.count_nonzero(covered)) / len(spectrum),
+        noise_floor_dbfs_hz=noise_floor,
+        peak_dbfs_hz=peak,
+        peak_freq_hz=peak_freq,
+        preview_bin_width_hz=bin_width_hz * factor,
+        preview_dbfs_hz=base64.b64encode(preview.astype("<f4").tobytes()).decode(),
+    )
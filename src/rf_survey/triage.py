@@ -0,0 +1,130 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Hashable, Literal, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from rf_survey.signal_stats import SignalStats
+
+# Lower bound on the baseline spread, so a very steady baseline does not turn
+# every fraction of a dB into a change
+MIN_BASELINE_STD_DB = 0.25
+
+TriageAction = Literal["full", "excerpt", "metadata"]
+
+
+@dataclass(frozen=True)
+class TriageConfig:
+    """How captures are compared against their baseline and what is kept."""
+
+    # What is stored for a capture indistinguishable from its baseline
+    quiet_action: Literal["excerpt", "metadata"] = "excerpt"
+    # Samples kept from the start of a quiet capture
+    excerpt_samples: int = 65536
+    # Deviation from the baseline, in standard deviations, that is a change
+    change_threshold: float = 4.0
+    # More clipped samples than this always keeps the capture
+    max_clipped_samples: int = 0
+    # Captures at a frequency before its baseline is trusted
+    warmup_captures: int = 10
+    # Weight of each new capture in the running baseline
+    baseline_alpha: float = 0.05
+
+    def __post_init__(self):
+        if not 0 < self.baseline_alpha <= 1:
+            raise ValueError("baseline_alpha must be in (0, 1]")
+        if self.change_threshold <= 0:
+            raise ValueError("change_threshold must be positive")
+        if self.excerpt_samples < 1:
+            raise ValueError("excerpt_samples must be at least 1")
+
+
+class TriageResult(BaseModel):
+    """What triage decided to keep of a capture, and why."""
+
+    action: TriageAction
+    # warmup, clipping, power_change, papr_change or quiet
+    reason: str
+
+    # Deviation from the baseline in standard deviations, unset during warmup
+    power_zscore: Optional[float] = None
+    papr_zscore: Optional[float] = None
+    baseline_captures: int
+
+    # IQ bytes not stored, filled in once the capture is stored
+    bytes_saved: int = 0
+
+
+class _Baseline:
+    """Exponentially weighted mean and variance of the triage statistics."""
+
+    def __init__(self, values: np.ndarray):
+        self.count = 1
+        self.mean = values.copy()
+        self.var = np.zeros_like(values)
+
+    def zscores(self, values: np.ndarray) -> np.ndarray:
+        std = np.sqrt(np.maximum(self.var, MIN_BASELINE_STD_DB**2))
+        return np.abs(values - self.mean) / std
+
+    def update(self, values: np.ndarray, alpha: float) -> None:
+        self.count += 1
+        # Plain average until the weighting takes over
+        alpha = max(alpha, 1.0 / self.count)
+        diff = values - self.mean
+        self.mean += alpha * diff
+        self.var = (1 - alpha) * (self.var + alpha * diff**2)
+
+
+class CaptureTriage:
+    """
+    Decides whether a capture is worth storing in full by comparing its mean
+    power and peak-to-average ratio against the running baseline for the
+    same frequency and receiver settings.
+
+    Safe to call from several processing workers at once.
+    """
+
+    def __init__(self, config: TriageConfig):
+        self.config = config
+        self._baselines: Dict[Hashable, _Baseline] = {}
+        self._lock = threading.Lock()
+
+    def evaluate(self, stats: SignalStats, key: Hashable) -> TriageResult:
+        """
+        Decides what to keep of a capture from its statistics. `key`
+        identifies its baseline, e.g. frequency, sample rate and gain.
+        """
+        values = np.array([stats.rms_dbfs, stats.papr_db])
+
+        with self._lock:
+            baseline = self._baselines.get(key)
+            if baseline is None:
+                self._baselines[key] = _Baseline(values)
+                baseline_captures = 0
+                zscores = None
+            else:
+                baseline_captures = baseline.count
+                zscores = baseline.zscores(values)
+                # Every capture updates it, so a lasting change becomes the new baseline
+                baseline.update(values, self.config.baseline_alpha)
+
+        if stats.saturated_samples > self.config.max_clipped_samples:
+            action, reason = "full", "clipping"
+        elif baseline_captures < self.config.warmup_captures:
+            action, reason = "full", "warmup"
+        elif zscores[0] > self.config.change_threshold:
+            action, reason = "full", "power_change"
+        elif zscores[1] > self.config.change_threshold:
+            action, reason = "full", "papr_change"
+        else:
+            action, reason = self.config.quiet_action, "quiet"
+
+        return TriageResult(
+            action=action,
+            reason=reason,
+            power_zscore=None if zscores is None else float(zscores[0]),
+            papr_zscore=None if zscores is None else float(zscores[1]),
+            baseline_captures=baseline_captures,
+        )
@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TuningRecord:
+    """
+    What we have learned about tuning to one center frequency.
+    """
+
+    # Frequencies the USRP actually tuned to for the last request
+    actual_rf_freq_hz: float
+    actual_dsp_freq_hz: float
+
+    # Smoothed LO lock time, only updated by successful locks
+    lock_time_sec: Optional[float] = None
+
+    lock_count: int = 0
+    failure_count: int = 0
+
+
+class TuningCache:
+    """
+    Per-frequency tuning history used to predict LO settle times.
+
+    Records are keyed by the requested center frequency and can be persisted
+    to a JSON file so repeated sweeps start from the measured settle times.
+    """
+
+    def __init__(self, path: Optional[Path] = None, smoothing: float = 0.25):
+        self.path = path
+        self._smoothing = smoothing
+        self._records: Dict[int, TuningRecord] = {}
+        self._lock = threading.Lock()
+
+    def get(self, center_freq_hz: int) -> Optional[TuningRecord]:
+        with self._lock:
+            return self._records.get(center_freq_hz)
+
+    def expected_lock_time(self, center_freq_hz: int) -> Optional[float]:
+        """Returns the smoothed lock time for the frequency, if one was measured."""
+        record = self.get(center_freq_hz)
+        return record.lock_time_sec if record else None
+
+    def record_tune(
+        self, center_freq_hz: int, actual_rf_freq_hz: float, actual_dsp_freq_hz: float
+    ) -> None:
+        with self._lock:
+            record = self._records.get(center_freq_hz)
+            if record is None:
+                self._records[center_freq_hz] = TuningRecord(
+                    actual_rf_freq_hz=actual_rf_freq_hz,
+                    actual_dsp_freq_hz=actual_dsp_freq_hz,
+                )
+            else:
+                record.actual_rf_freq_hz = actual_rf_freq_hz
+                record.actual_dsp_freq_hz = actual_dsp_freq_hz
+
+    def record_lock(
+        self, center_freq_hz: int, lock_time_sec: float, locked: bool
+    ) -> None:
+        """
+        Records the outcome of waiting for LO lock. record_tune() must have been
+        called for the frequency first.
+        """
+        with self._lock:
+            record = self._records[center_freq_hz]
+
+            if not locked:
+                record.failure_count += 1
+                return
+
+            record.lock_count += 1
+            if record.lock_time_sec is None:
+                record.lock_time_sec = lock_time_sec
+            else:
+                record.lock_time_sec += self._smoothing * (
+                    lock_time_sec - record.lock_time_sec
+                )
+
+    def load(self) -> None:
+        """
+        Loads persisted records. A missing or unreadable file leaves the cache empty.
+        """
+        if self.path is None or not self.path.exists():
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+            records = {int(freq): TuningRecord(**data) for freq, data in raw.items()}
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable tuning cache {self.path}: {e}")
+            return
+
+        with self._lock:
+            self._records = records
+        logger.info(f"Loaded tuning history for {len(records)} frequencies.")
+
+    def save(self) -> None:
+        """Atomically writes the records to the cache file, if one is configured."""
+        if self.path is None:
+            return
+
+        with self._lock:
+            raw = {str(freq): asdict(record) for freq, record in self._records.items()}
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(raw, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save tuning cache to {self.path}: {e}")
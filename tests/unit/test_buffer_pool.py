@@ -0,0 +1,110 @@
+import threading
+import pytest
+
+from rf_survey.buffer_pool import (
+    CaptureBufferPool,
+    BufferPoolExhaustedError,
+    required_pool_size,
+)
+from rf_survey.models import SweepConfig
+
+
+def test_buffers_are_reused_after_release():
+    """
+    A released buffer should be handed out again instead of allocating a new one.
+    """
+    pool = CaptureBufferPool(num_samples=16, size=1)
+
+    lease = pool.acquire(timeout=0)
+    first_buffer = lease.buffer
+    lease.release()
+
+    assert pool.acquire(timeout=0).buffer is first_buffer
+
+
+def test_occupancy_is_tracked():
+    pool = CaptureBufferPool(num_samples=16, size=2)
+    assert (pool.in_use, pool.capacity) == (0, 2)
+
+    lease = pool.acquire(timeout=0)
+    assert pool.in_use == 1
+
+    # Double release must not corrupt the count
+    lease.release()
+    lease.release()
+    assert pool.in_use == 0
+
+
+def test_acquire_times_out_when_exhausted():
+    pool = CaptureBufferPool(num_samples=16, size=1)
+    pool.acquire(timeout=0)
+
+    with pytest.raises(BufferPoolExhaustedError):
+        pool.acquire(timeout=0.05)
+
+
+def test_acquire_unblocks_when_a_buffer_is_returned():
+    """
+    A capture waiting on an exhausted pool should proceed as soon as
+    processing returns a buffer.
+    """
+    pool = CaptureBufferPool(num_samples=16, size=1)
+    lease = pool.acquire(timeout=0)
+
+    timer = threading.Timer(0.05, lease.release)
+    timer.start()
+
+    second = pool.acquire(timeout=1.0)
+    assert second.buffer is lease.buffer
+    timer.join()
+
+
+def test_resize_replaces_buffers_including_those_on_lease():
+    pool = CaptureBufferPool(num_samples=16, size=2)
+    outstanding = pool.acquire(timeout=0)
+
+    pool.resize(32)
+    assert pool.acquire(timeout=0).buffer.shape == (32,)
+
+    # A buffer leased before the resize comes back with the new length
+    outstanding.release()
+    assert pool.acquire(timeout=0).buffer.shape == (32,)
+    assert pool.in_use == 2
+
+
+def test_pool_sized_for_records_beyond_the_configured_size():
+    """
+    A continuous dwell of more records than the default pool holds gets a
+    buffer for each of them, with the workers still holding theirs.
+    """
+    sweep_config = SweepConfig(
+        start_hz=915_000_000,
+        end_hz=915_000_000,
+        step_hz=20_000_000,
+        cycles=1,
+        records_per_step=5,
+        interval_sec=10,
+        max_jitter_sec=0.0,
+        continuous_records=True,
+    )
+    workers = 2
+    size = max(3, required_pool_size(sweep_config.records_per_capture, workers))
+    pool = CaptureBufferPool(num_samples=16, size=size)
+
+    held_by_workers = [pool.acquire(timeout=0) for _ in range(workers)]
+    records = [pool.acquire(timeout=0) for _ in range(sweep_config.records_per_step)]
+
+    assert len(held_by_workers) + len(records) == pool.capacity == 7
+
+
+def test_empty_pool_allocates_no_buffers():
+    """
+    Streamed captures use a pool of size 0, which must hold no memory even
+    after the capture length changes.
+    """
+    pool = CaptureBufferPool(num_samples=1 << 40, size=0)
+    pool.resize(1 << 41)
+
+    assert (pool.in_use, pool.capacity) == (0, 0)
+    with pytest.raises(BufferPoolExhaustedError):
+        pool.acquire(timeout=1.0)
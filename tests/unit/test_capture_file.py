@@ -0,0 +1,58 @@
+import hashlib
+import numpy as np
+import pytest
+
+from rf_survey.capture_file import StreamedCaptureFile, remove_partial_files
+
+
+def test_chunked_capture_matches_in_memory_capture(tmp_path):
+    """
+    Streaming a capture chunk by chunk should produce the same file contents
+    and checksum as writing the whole buffer at once.
+    """
+    samples = np.arange(10_000, dtype=np.int32)
+    capture_file = StreamedCaptureFile(tmp_path, len(samples))
+
+    for start in range(0, len(samples), 3_000):
+        count = min(3_000, len(samples) - start)
+        capture_file.chunk(start, count)[:] = samples[start : start + count]
+        capture_file.commit(start, count)
+
+    checksum = capture_file.finalize()
+    destination = tmp_path / "capture.sc16"
+    capture_file.move_to(destination)
+    capture_file.release()
+
+    assert checksum == hashlib.sha256(samples.tobytes()).hexdigest()
+    assert destination.read_bytes() == samples.tobytes()
+
+
+def test_incomplete_capture_cannot_be_finalized(tmp_path):
+    capture_file = StreamedCaptureFile(tmp_path, 100)
+    capture_file.commit(0, 50)
+
+    with pytest.raises(RuntimeError):
+        capture_file.finalize()
+
+    with pytest.raises(ValueError):
+        capture_file.commit(0, 50)
+
+
+def test_discard_removes_partial_file(tmp_path):
+    capture_file = StreamedCaptureFile(tmp_path, 100)
+    capture_file.discard()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_stale_partial_files_are_removed(tmp_path):
+    """
+    A run that crashed mid-capture leaves its partial file behind, the next
+    run removes it and leaves finished captures alone.
+    """
+    StreamedCaptureFile(tmp_path, 100).release()
+    finished = tmp_path / "capture.sc16"
+    finished.write_bytes(b"")
+
+    assert remove_partial_files(tmp_path) == 1
+    assert list(tmp_path.iterdir()) == [finished]
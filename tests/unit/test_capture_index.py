@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+from rf_survey.capture_index import (
+    CaptureIndex,
+    IndexEntry,
+    sidecar_path,
+    write_sidecar,
+)
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_entry(path, frequency=915_000_000, minutes=0, checksum="abc") -> IndexEntry:
+    return IndexEntry(
+        source_path=path,
+        frequency=frequency,
+        timestamp=START + timedelta(minutes=minutes),
+        checksum=checksum,
+        hostname="node1",
+        serial="3123ABC",
+        sampling_rate=20_000_000,
+        gain=35,
+        length=1.0,
+    )
+
+
+def test_queries_select_by_frequency_and_time(tmp_path):
+    index = CaptureIndex(tmp_path / "captures.db", batch_size=100)
+    for minute in range(60):
+        for frequency in (900_000_000, 915_000_000, 930_000_000):
+            index.add(
+                make_entry(tmp_path / f"{frequency}-{minute}.sc16", frequency, minute)
+            )
+
+    entries = index.query(
+        min_freq_hz=910_000_000,
+        max_freq_hz=920_000_000,
+        start=START + timedelta(minutes=10),
+        end=START + timedelta(minutes=20),
+    )
+
+    assert [e.frequency for e in entries] == [915_000_000] * 10
+    assert entries[0].timestamp == START + timedelta(minutes=10)
+    assert entries[0].source_path == tmp_path / "915000000-10.sc16"
+    assert index.count() == 180
+
+
+def test_entries_are_inserted_in_batches(tmp_path):
+    path = tmp_path / "captures.db"
+    index = CaptureIndex(path, batch_size=3)
+    reader = CaptureIndex(path)
+
+    index.add(make_entry(tmp_path / "a.sc16"))
+    index.add(make_entry(tmp_path / "b.sc16"))
+    assert reader.count() == 0
+
+    index.add(make_entry(tmp_path / "c.sc16"))
+    assert reader.count() == 3
+
+    index.add(make_entry(tmp_path / "d.sc16", checksum="def"))
+    index.close()
+    assert [e.source_path.name for e in reader.query(checksum="def")] == ["d.sc16"]
+
+
+def test_rebuild_reads_the_sidecars_where_the_files_are_now(tmp_path):
+    storage = tmp_path / "storage"
+    (storage / "2025" / "01").mkdir(parents=True)
+    (storage / ".spool").mkdir()
+
+    for name, minute in (("2025/01/a.sc16", 1), ("2025/01/b.excerpt.sc16", 2)):
+        data_path = storage / name
+        data_path.write_bytes(b"")
+        # Recorded at the flat path it was first stored at
+        entry = make_entry(storage / data_path.name, minutes=minute)
+        write_sidecar(data_path, entry.model_dump_json())
+
+    # A sidecar without its capture, one that is not a capture and a spooled capture
+    write_sidecar(
+        storage / "gone.sc16", make_entry(storage / "gone.sc16").model_dump_json()
+    )
+    (storage / "2025" / "01" / "broken.sc16").write_bytes(b"")
+    sidecar_path(storage / "2025" / "01" / "broken.sc16").write_text("{}")
+    (storage / ".spool" / "x.sc16").write_bytes(b"")
+    write_sidecar(
+        storage / ".spool" / "x.sc16", make_entry(storage / "x").model_dump_json()
+    )
+
+    index = CaptureIndex(tmp_path / "captures.db")
+    index.add(make_entry(storage / "stale.sc16"))
+
+    assert index.rebuild(storage) == 2
+    assert [e.source_path for e in index.query()] == [
+        storage / "2025" / "01" / "a.sc16",
+        storage / "2025" / "01" / "b.excerpt.sc16",
+    ]
+
+
+def test_query_params_parse_the_request(tmp_path):
+    index = CaptureIndex(tmp_path / "captures.db")
+    index.add(make_entry(tmp_path / "a.sc16", minutes=5))
+
+    (result,) = index.query_params(
+        {"min_freq": "915e6", "start": "2025-01-01T00:05:00"}
+    )
+    assert result["source_path"] == str(tmp_path / "a.sc16")
+    assert index.query_params({"end": "2025-01-01T00:05:00+00:00"}) == []
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from rf_survey.buffer_pool import CaptureBufferPool
+from rf_survey.capture_queue import ByteBudgetQueue
+
+
+def test_budget_counts_bytes_not_items():
+    queue = ByteBudgetQueue(max_bytes=100, size_of=len)
+    queue.put_nowait(b"x" * 60)
+
+    assert queue.has_room(40)
+    assert not queue.has_room(41)
+    # Items that hold no memory always fit
+    assert queue.has_room(0)
+
+
+def test_oversized_item_is_accepted_into_an_empty_queue():
+    """
+    An item larger than the whole budget must not block forever.
+    """
+    queue = ByteBudgetQueue(max_bytes=10, size_of=len)
+    assert queue.has_room(1000)
+
+
+def test_pop_oldest_sized_skips_items_without_memory():
+    queue = ByteBudgetQueue(max_bytes=100, size_of=len)
+    for item in (b"", b"aa", b"bbb"):
+        queue.put_nowait(item)
+
+    assert queue.pop_oldest_sized() == b"aa"
+    assert queue.nbytes == 3
+    assert [queue.get_nowait(), queue.get_nowait()] == [b"", b"bbb"]
+    assert queue.pop_oldest_sized() is None
+
+
+@pytest.mark.asyncio
+async def test_put_waits_for_room():
+    queue = ByteBudgetQueue(max_bytes=10, size_of=len)
+    queue.put_nowait(b"x" * 8)
+
+    put = asyncio.create_task(queue.put(b"y" * 5))
+    await asyncio.sleep(0)
+    assert not put.done()
+
+    assert await queue.get() == b"x" * 8
+    await asyncio.wait_for(put, timeout=1.0)
+    assert queue.nbytes == 5
+
+
+def test_buffer_pool_runs_out_before_the_byte_budget():
+    """
+    Queued captures hold their pooled buffers, so the queue is full once the
+    next capture could not get one, however much of the budget is left.
+    """
+    pool = CaptureBufferPool(num_samples=16, size=3)
+    queue = ByteBudgetQueue(
+        max_bytes=1024**3,
+        size_of=len,
+        buffers_available=lambda: pool.capacity - pool.in_use >= 1,
+    )
+
+    leases = []
+    for _ in range(2):
+        leases.append(pool.acquire(timeout=0))
+        assert queue.has_room(64)
+        queue.put_nowait(b"x" * 64)
+
+    leases.append(pool.acquire(timeout=0))
+    assert queue.has_byte_room(64)
+    assert not queue.has_room(64)
+    # Captures without a pooled buffer, e.g. spilled ones, still fit
+    assert queue.has_room(0)
+
+    leases[0].release()
+    assert queue.has_room(64)
+
+
+@pytest.mark.asyncio
+async def test_put_waits_for_a_buffer_to_be_returned():
+    pool = CaptureBufferPool(num_samples=16, size=1)
+    queue = ByteBudgetQueue(
+        max_bytes=1024,
+        size_of=len,
+        buffers_available=lambda: pool.in_use < pool.capacity,
+    )
+    lease = pool.acquire(timeout=0)
+
+    put = asyncio.create_task(queue.put(b"x" * 8))
+    await asyncio.sleep(0)
+    assert not put.done()
+
+    lease.release()
+    queue.capacity_changed()
+    await asyncio.wait_for(put, timeout=1.0)
+    assert queue.qsize() == 1
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from rf_survey.compression import (
+    FILE_HEADER,
+    CompressedReader,
+    CompressionConfig,
+    write_compressed,
+)
+from rf_survey.hashing import ChecksumMethod
+
+
+def noise_samples(count: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    iq = np.round(rng.normal(0, 100, (count, 2)))
+    # Full scale values check that the delta filter wraps around losslessly
+    iq[::97] = (32767, -32768)
+    return iq.astype(np.int16).view(np.int32).ravel()
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        CompressionConfig(block_samples=1000),
+        CompressionConfig(codec="lzma", delta=False, block_samples=1000),
+        CompressionConfig(shuffle=False, block_samples=1000),
+    ],
+)
+def test_samples_round_trip_losslessly(tmp_path, config):
+    samples = noise_samples(10_000)
+    path = tmp_path / "capture.sc16z"
+
+    result = write_compressed(path, samples, config, ChecksumMethod())
+
+    assert result.compressed_bytes == path.stat().st_size
+    assert result.ratio > 1.2
+    checksummer = ChecksumMethod().create()
+    checksummer.update(path.read_bytes())
+    assert result.checksum == checksummer.hexdigest()
+
+    with CompressedReader(path) as reader:
+        assert reader.num_samples == 10_000
+        np.testing.assert_array_equal(reader.read(), samples)
+
+
+def test_ranges_decode_only_their_blocks(tmp_path):
+    samples = noise_samples(10_000)
+    path = tmp_path / "capture.sc16z"
+    write_compressed(
+        path, samples, CompressionConfig(block_samples=1000), ChecksumMethod()
+    )
+
+    with CompressedReader(path) as reader:
+        reader._blocks[0] = (0, 0)  # The first block can no longer be decoded
+        np.testing.assert_array_equal(reader.read(2500, 1000), samples[2500:3500])
+        np.testing.assert_array_equal(reader.read(9990), samples[9990:])
+        assert len(reader.read(20_000)) == 0
+
+
+def test_unknown_codecs_fail_early():
+    with pytest.raises(ValueError):
+        CompressionConfig(codec="brotli")
+
+
+def test_blocks_read_back_one_by_one(tmp_path):
+    samples = noise_samples(10_500)
+    path = tmp_path / "capture.sc16z"
+    write_compressed(
+        path, samples, CompressionConfig(block_samples=1000), ChecksumMethod()
+    )
+
+    with CompressedReader(path) as reader:
+        # The blocks follow the header back to back, the index comes after them
+        offsets = [offset for offset, _ in reader._blocks]
+        assert offsets[0] == FILE_HEADER.size
+        assert all(
+            offset + length == following
+            for (offset, length), following in zip(reader._blocks, offsets[1:])
+        )
+        for index in range(len(reader._blocks)):
+            np.testing.assert_array_equal(
+                reader._read_block(index), samples[index * 1000 : (index + 1) * 1000]
+            )
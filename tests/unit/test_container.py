@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rf_survey.capture_index import CaptureIndex, IndexEntry
+from rf_survey.container import (
+    ContainerReader,
+    ContainerWriter,
+    segment_location,
+    split_location,
+)
+from rf_survey.hashing import ChecksumMethod
+
+TIMESTAMP = datetime(2025, 3, 7, 14, 30, 5, 123456, tzinfo=timezone.utc)
+
+
+def append(writer, directory, index, size=1000):
+    samples = np.arange(index, index + size, dtype=np.int32)
+    location = writer.append(
+        directory,
+        f"stem{index}",
+        samples,
+        TIMESTAMP + timedelta(seconds=index),
+        900_000_000 + index,
+        20_000_000,
+    )
+    return samples, location
+
+
+def test_captures_are_read_back_at_their_offsets(tmp_path):
+    writer = ContainerWriter()
+    written = [append(writer, tmp_path, i) for i in range(3)]
+
+    # Readable while the segment is still open
+    with ContainerReader(written[0][1].segment_path) as reader:
+        assert [e.center_freq_hz for e in reader.entries] == [
+            900_000_000,
+            900_000_001,
+            900_000_002,
+        ]
+        assert reader.entries[1].timestamp == TIMESTAMP + timedelta(seconds=1)
+        for samples, location in written:
+            np.testing.assert_array_equal(reader.samples(location.offset), samples)
+            assert location.offset % 4096 == 0
+
+    checksummer = ChecksumMethod().create()
+    checksummer.update(written[2][0])
+    assert written[2][1].checksum == checksummer.hexdigest()
+    writer.close()
+
+
+def test_segments_roll_over_by_size_and_count(tmp_path):
+    # One page of index, then 16 KiB per capture
+    writer = ContainerWriter(segment_bytes=40 * 1024, capacity=3)
+    locations = [append(writer, tmp_path, i, size=4096)[1] for i in range(5)]
+    writer.close()
+
+    assert [location.segment_path.name for location in locations] == [
+        "stem0.seg",
+        "stem0.seg",
+        "stem2.seg",
+        "stem2.seg",
+        "stem4.seg",
+    ]
+
+    writer = ContainerWriter(capacity=2)
+    locations = [append(writer, tmp_path, i + 10)[1] for i in range(3)]
+    writer.close()
+
+    assert [location.segment_path.name for location in locations] == [
+        "stem10.seg",
+        "stem10.seg",
+        "stem12.seg",
+    ]
+
+
+def test_index_is_rebuilt_from_the_segment_manifests(tmp_path):
+    writer = ContainerWriter()
+    for i in range(2):
+        _, location = append(writer, tmp_path, i)
+        record = IndexEntry(
+            source_path=location.source_path,
+            frequency=900_000_000 + i,
+            timestamp=TIMESTAMP,
+            checksum=location.checksum,
+            hostname="node1",
+            sampling_rate=20_000_000,
+            gain=35,
+            length=1.0,
+        )
+        writer.add_record(location, record.model_dump_json())
+    writer.close()
+
+    # The archive is moved somewhere else
+    moved = tmp_path / "moved"
+    moved.mkdir()
+    for path in tmp_path.glob("stem0.seg*"):
+        path.rename(moved / path.name)
+
+    index = CaptureIndex(tmp_path / ".captures.db")
+    assert index.rebuild(moved) == 2
+    segment, offset = split_location(index.query()[1].source_path)
+    assert segment == moved / "stem0.seg"
+    with ContainerReader(segment) as reader:
+        assert reader.samples(offset)[0] == 1
+
+
+def test_locations_only_split_for_segments():
+    location = segment_location(Path("/data/a.seg"), 4096)
+    assert location == Path("/data/a.seg@4096")
+    assert split_location(location) == (Path("/data/a.seg"), 4096)
+    assert split_location(Path("/data/user@host.sc16")) == (
+        Path("/data/user@host.sc16"),
+        None,
+    )
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / "x.seg"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        ContainerReader(path)
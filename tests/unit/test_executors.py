@@ -0,0 +1,52 @@
+import threading
+
+from rf_survey.executors import InstrumentedThreadPoolExecutor
+
+
+def test_queue_depth_and_active_threads_are_tracked():
+    """
+    With one busy thread, further submissions should be counted as queued.
+    """
+    executor = InstrumentedThreadPoolExecutor("test", max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        started.set()
+        release.wait()
+
+    running = executor.submit(block)
+    started.wait(timeout=1.0)
+    waiting = executor.submit(lambda: None)
+
+    assert executor.active_threads == 1
+    assert executor.queue_depth == 1
+
+    release.set()
+    running.result(timeout=1.0)
+    waiting.result(timeout=1.0)
+    executor.shutdown(wait=True)
+
+    assert (executor.queue_depth, executor.active_threads) == (0, 0)
+
+
+def test_cancelled_work_leaves_the_queue():
+    executor = InstrumentedThreadPoolExecutor("test", max_workers=1)
+    release = threading.Event()
+
+    executor.submit(release.wait)
+    pending = executor.submit(lambda: None)
+
+    assert pending.cancel()
+    assert executor.queue_depth == 0
+
+    release.set()
+    executor.shutdown(wait=True)
+
+
+def test_threads_are_named_after_the_executor():
+    executor = InstrumentedThreadPoolExecutor("hardware", max_workers=1)
+    name = executor.submit(lambda: threading.current_thread().name).result()
+    executor.shutdown(wait=True)
+
+    assert name.startswith("hardware")
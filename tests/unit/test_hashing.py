@@ -0,0 +1,73 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from rf_survey.hashing import (
+    Checksummer,
+    ChecksumMethod,
+    write_and_hash,
+    write_hashed,
+)
+
+
+def test_default_checksum_is_plain_sha256(tmp_path):
+    """
+    The fused write must produce the same file and checksum as writing
+    and hashing in two passes.
+    """
+    data = np.arange(300_000, dtype=np.int32)
+    path = tmp_path / "capture.sc16"
+
+    checksum, _ = write_and_hash(path, data, ChecksumMethod(), chunk_bytes=4096)
+
+    assert path.read_bytes() == data.tobytes()
+    assert checksum == hashlib.sha256(data.tobytes()).hexdigest()
+
+
+def test_other_algorithms_are_prefixed():
+    checksummer = Checksummer("blake2b")
+    checksummer.update(b"abc")
+
+    assert checksummer.hexdigest() == "blake2b:" + hashlib.blake2b(b"abc").hexdigest()
+
+
+def test_unknown_algorithm_is_rejected():
+    with pytest.raises(ValueError):
+        ChecksumMethod(algorithm="md4")
+
+
+def test_tree_hash_does_not_depend_on_chunking():
+    """
+    Chunks that split leaves must give the same tree hash as whole leaves
+    hashed in parallel.
+    """
+    data = np.random.default_rng(0).bytes(10_000)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        whole = Checksummer("sha256", executor, leaf_bytes=1024)
+        whole.update(data)
+
+        chunked = Checksummer("sha256", executor, leaf_bytes=1024)
+        for offset in range(0, len(data), 700):
+            chunked.update(data[offset : offset + 700])
+
+        assert whole.hexdigest() == chunked.hexdigest()
+        assert whole.hexdigest().startswith("sha256-tree:")
+
+
+def test_write_hashed_appends_at_the_file_position(tmp_path):
+    """
+    Writing into an open file, e.g. a segment, hashes only what is written.
+    """
+    data = np.arange(50_000, dtype=np.int32)
+    path = tmp_path / "segment.seg"
+
+    checksummer = ChecksumMethod().create()
+    with open(path, "wb") as f:
+        f.write(b"header")
+        write_hashed(f, data, checksummer, chunk_bytes=4096)
+
+    assert path.read_bytes() == b"header" + data.tobytes()
+    assert checksummer.hexdigest() == hashlib.sha256(data.tobytes()).hexdigest()
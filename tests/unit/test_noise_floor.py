@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from rf_survey.noise_floor import (
+    NoiseFloorConfig,
+    NoiseFloorKey,
+    NoiseFloorTracker,
+    pool_spectrum,
+)
+
+KEY = NoiseFloorKey(915_000_000, 1_000_000, 30)
+
+
+def test_quantiles_follow_the_captured_floors():
+    """
+    Floors spread evenly from -130 to -110 dBFS/Hz give the matching
+    percentiles, and a narrowband signal does not lift the pooled floor.
+    """
+    tracker = NoiseFloorTracker(NoiseFloorConfig(bins_per_step=4))
+    for level in np.linspace(-130, -110, 201):
+        psd_db = np.full(64, level)
+        psd_db[5] = -20.0
+        tracker.update(KEY, psd_db)
+
+    estimate = tracker.estimate(KEY)
+    assert estimate.captures == 201
+    assert estimate.bin_width_hz == 250_000
+    assert estimate.p10_dbfs_hz == pytest.approx([-128.0] * 4, abs=0.5)
+    assert estimate.p50_dbfs_hz == pytest.approx([-120.0] * 4, abs=0.5)
+    assert estimate.p90_dbfs_hz == pytest.approx([-112.0] * 4, abs=0.5)
+    # The moving average leans towards the latest captures
+    assert -115 < estimate.ema_dbfs_hz[0] < -110
+
+
+def test_snapshot_survives_a_restart(tmp_path):
+    path = tmp_path / "noise_floor.npz"
+    config = NoiseFloorConfig(bins_per_step=8)
+    tracker = NoiseFloorTracker(config, path)
+    tracker.update(KEY, np.full(64, -120.0))
+    tracker.save()
+
+    restored = NoiseFloorTracker(config, path)
+    restored.load()
+
+    assert restored.estimate(KEY) == tracker.estimate(KEY)
+    assert restored.query({"frequency": "915000000"})[0]["p50_dbfs_hz"][0] == -119.75
+    assert restored.query({"frequency": "1"}) == []
+
+
+def test_memory_is_bounded_by_evicting_the_stalest_frequency():
+    tracker = NoiseFloorTracker(NoiseFloorConfig(bins_per_step=2, max_frequencies=2))
+    for freq in (1, 2, 3):
+        tracker.update(NoiseFloorKey(freq, 1_000_000, 0), np.full(8, -100.0))
+
+    assert [e.center_freq_hz for e in tracker.estimates()] == [2, 3]
+
+
+def test_pool_spectrum_trims_leftover_bins_at_both_edges():
+    pooled = pool_spectrum(np.arange(10, dtype=np.float32), 4)
+    np.testing.assert_array_equal(pooled, [1.5, 3.5, 5.5, 7.5])
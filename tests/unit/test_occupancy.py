@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+import pytest
+
+from rf_survey.occupancy import (
+    NO_DATA,
+    OccupancyAccumulator,
+    RollupLevel,
+    measure_occupancy,
+)
+from rf_survey.spectrum import WelchConfig
+
+LEVELS = (RollupLevel(60, 3), RollupLevel(3600, 2))
+
+
+def make_accumulator(**kwargs) -> OccupancyAccumulator:
+    return OccupancyAccumulator(0, 1_000, 100, levels=LEVELS, **kwargs)
+
+
+def test_bursty_tone_occupies_its_bin_for_part_of_the_time():
+    """
+    A strong tone switched on for the second half of a noisy capture
+    occupies about half the segments of its bin and no others.
+    """
+    rng = np.random.default_rng(0)
+    fft_size, segments = 64, 200
+    noise = rng.normal(0, 100, (fft_size * segments, 2))
+    n = np.arange(len(noise))
+    tone = 5000 * np.exp(2j * np.pi * 16 * n / fft_size) * (n >= len(noise) // 2)
+    iq = np.stack([noise[:, 0] + tone.real, noise[:, 1] + tone.imag], axis=1)
+    samples = np.round(iq).astype(np.int16).view(np.int32).ravel()
+
+    config = WelchConfig(fft_size=fft_size, window="rectangular", overlap=0.0)
+    occupied, total = measure_occupancy(samples, 1_000_000, config, 10.0)
+
+    assert total == segments
+    tone_bin = fft_size // 2 + 16
+    assert occupied[tone_bin] == pytest.approx(segments / 2, abs=2)
+    assert np.delete(occupied, tone_bin).max() <= 2
+
+
+def test_buckets_roll_over_and_coarse_levels_keep_the_history():
+    acc = make_accumulator()
+    freqs = np.array([50.0, 150.0])
+
+    for minute in range(5):
+        acc.add(minute * 60 + 1, freqs, np.array([minute, 0]), 4)
+
+    times, fraction = acc.occupancy(0)
+    # Only the last three minutes fit in the fine level
+    assert list(times) == [120, 180, 240]
+    assert list(fraction[:, 0]) == [0.5, 0.75, 1.0]
+    assert np.isnan(fraction[0, 5])
+
+    times, fraction = acc.occupancy(1)
+    assert list(times) == [0]
+    assert fraction[0, 0] == pytest.approx(10 / 20)
+    assert fraction[0, 1] == 0
+
+
+def test_dump_writes_compact_arrays(tmp_path):
+    acc = make_accumulator()
+    acc.add(30, np.array([50.0]), np.array([1]), 2)
+
+    acc.dump(tmp_path)
+
+    header = json.loads((tmp_path / "occupancy.json").read_text())
+    assert header["num_bins"] == 10
+    assert header["levels"][0] == dict(
+        bucket_sec=60, rows=3, name="occupancy_60s", filled=1
+    )
+    cells = np.fromfile(tmp_path / "occupancy_60s.u8", dtype=np.uint8)
+    assert list(cells) == [127] + [NO_DATA] * 9
+    times = np.fromfile(tmp_path / "occupancy_60s.times", dtype="<i8")
+    assert list(times) == [0]
+
+
+def test_state_survives_a_restart(tmp_path):
+    path = tmp_path / "occupancy.npz"
+    acc = make_accumulator(path=path)
+    acc.add(30, np.array([50.0]), np.array([3]), 4)
+    acc.save()
+
+    restored = make_accumulator(path=path)
+    restored.load()
+
+    np.testing.assert_array_equal(restored.occupancy(0)[1], acc.occupancy(0)[1])
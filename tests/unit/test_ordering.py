@@ -0,0 +1,50 @@
+import pytest
+
+from rf_survey.ordering import ReorderBuffer
+
+
+def test_results_are_released_in_sequence_order():
+    """
+    A result that finishes early should be held until all earlier ones are done.
+    """
+    buffer = ReorderBuffer()
+
+    assert buffer.complete(1, "b") == []
+    assert buffer.complete(2, "c") == []
+    assert buffer.pending == 2
+
+    assert buffer.complete(0, "a") == ["a", "b", "c"]
+    assert buffer.pending == 0
+    assert buffer.next_sequence == 3
+
+
+def test_missing_results_do_not_block_later_ones():
+    buffer = ReorderBuffer()
+
+    assert buffer.complete(1, "b") == []
+    assert buffer.complete(0, None) == ["b"]
+
+
+def test_completing_a_sequence_twice_is_rejected():
+    buffer = ReorderBuffer()
+    buffer.complete(0, "a")
+    buffer.complete(2, "c")
+
+    with pytest.raises(ValueError):
+        buffer.complete(0, "a")
+    with pytest.raises(ValueError):
+        buffer.complete(2, "c")
+
+
+def test_drain_gives_up_on_missing_results():
+    """
+    On shutdown the results held back by a capture that never finished
+    should still come out, in order.
+    """
+    buffer = ReorderBuffer()
+    buffer.complete(2, "c")
+    buffer.complete(1, "b")
+
+    assert buffer.drain() == ["b", "c"]
+    assert buffer.pending == 0
+    assert buffer.complete(3, "d") == ["d"]
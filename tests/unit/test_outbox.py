@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from rf_survey.metrics import NullMetrics
+from rf_survey.outbox import OutboxPublisher, SegmentOutbox
+
+
+def test_unacknowledged_messages_survive_a_restart(tmp_path):
+    outbox = SegmentOutbox(tmp_path, fsync=False)
+    for i in range(3):
+        outbox.append(f"msg-{i}".encode())
+
+    outbox.ack(outbox.read_batch(1)[0][0])
+    outbox.close()
+
+    reopened = SegmentOutbox(tmp_path, fsync=False)
+    assert reopened.lag == 2
+    assert [payload for _, payload in reopened.read_batch(10)] == [b"msg-1", b"msg-2"]
+    assert reopened.append(b"msg-3") == 3
+
+
+def test_rewind_resends_from_the_first_unacknowledged_message(tmp_path):
+    outbox = SegmentOutbox(tmp_path, fsync=False)
+    for i in range(4):
+        outbox.append(bytes([i]))
+
+    outbox.read_batch(3)
+    outbox.ack(0)
+    outbox.rewind()
+
+    assert [offset for offset, _ in outbox.read_batch(10)] == [1, 2, 3]
+
+
+def test_segments_roll_over_and_are_deleted_once_acknowledged(tmp_path):
+    """
+    Messages spread over several segments should read back in order, and
+    delivered segments should not pile up on disk.
+    """
+    outbox = SegmentOutbox(tmp_path, segment_bytes=32, fsync=False)
+    for i in range(10):
+        outbox.append(b"x" * 20 + bytes([i]))
+
+    assert len(list(tmp_path.glob("*.log"))) > 1
+
+    batch = outbox.read_batch(10)
+    assert [payload[-1] for _, payload in batch] == list(range(10))
+
+    outbox.ack(batch[-1][0])
+    assert len(list(tmp_path.glob("*.log"))) == 1
+    assert outbox.lag == 0
+
+
+def test_torn_record_is_truncated_on_open(tmp_path):
+    outbox = SegmentOutbox(tmp_path, fsync=False)
+    outbox.append(b"complete")
+    outbox.close()
+
+    # Simulate a crash in the middle of writing the next record
+    segment = next(tmp_path.glob("*.log"))
+    with open(segment, "ab") as f:
+        f.write(b"\x10\x00\x00\x00partial")
+
+    reopened = SegmentOutbox(tmp_path, fsync=False)
+    assert reopened.read_batch(10) == [(0, b"complete")]
+    assert reopened.append(b"next") == 1
+
+
+class StandInNats:
+    """An in-process stand-in for the NATS server that can be taken down."""
+
+    def __init__(self):
+        self.received = []
+        self.available = True
+
+    async def publish(self, payload: bytes) -> None:
+        if not self.available:
+            raise ConnectionError("NATS unavailable")
+        self.received.append(payload)
+
+
+@pytest.mark.asyncio
+async def test_publisher_replays_the_backlog_after_an_outage(tmp_path):
+    nats = StandInNats()
+    nats.available = False
+    publisher = OutboxPublisher(
+        SegmentOutbox(tmp_path, fsync=False),
+        nats.publish,
+        NullMetrics(),
+        batch_size=2,
+        max_rate=1000.0,
+    )
+
+    for i in range(5):
+        await publisher.append(bytes([i]))
+
+    task = asyncio.create_task(publisher.run())
+    await asyncio.sleep(0.1)
+    assert nats.received == []
+
+    nats.available = True
+    for _ in range(100):
+        if publisher.outbox.lag == 0:
+            break
+        await asyncio.sleep(0.05)
+
+    task.cancel()
+    await task
+
+    assert nats.received == [bytes([i]) for i in range(5)]
+    assert publisher.outbox.lag == 0
+
+
+@pytest.mark.asyncio
+async def test_publisher_keeps_several_publishes_in_flight(tmp_path):
+    in_flight = 0
+    peak = 0
+    received = []
+
+    async def slow_publish(payload: bytes) -> None:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        received.append(payload)
+
+    publisher = OutboxPublisher(
+        SegmentOutbox(tmp_path, fsync=False),
+        slow_publish,
+        NullMetrics(),
+        batch_size=8,
+        max_rate=1000.0,
+        max_in_flight=4,
+    )
+    for i in range(8):
+        await publisher.append(bytes([i]))
+
+    task = asyncio.create_task(publisher.run())
+    for _ in range(100):
+        if publisher.outbox.lag == 0:
+            break
+        await asyncio.sleep(0.01)
+    task.cancel()
+    await task
+
+    assert peak == 4
+    assert received == [bytes([i]) for i in range(8)]
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from rf_survey.hashing import ChecksumMethod
+from rf_survey.packing import (
+    PackedReader,
+    is_12bit,
+    pack_sc12,
+    unpack_sc12,
+    write_packed,
+)
+
+
+def make_samples(n, seed=0):
+    # 12-bit values in the high bits of each component, like the sc12 wire format
+    rng = np.random.default_rng(seed)
+    iq = rng.integers(-2048, 2048, size=(n, 2)).astype(np.int16) << 4
+    return iq.view(np.int32).ravel()
+
+
+def test_round_trip_is_exact():
+    samples = make_samples(1001)
+    # The extremes and the sign boundary of both components
+    extremes = np.array([[-2048, 2047], [-1, 0], [0, -1], [2047, -2048]], np.int16)
+    samples[:4] = (extremes << 4).view(np.int32).ravel()
+
+    packed = pack_sc12(samples)
+
+    assert packed.shape == (1001, 3)
+    np.testing.assert_array_equal(unpack_sc12(packed), samples)
+
+
+def test_rejects_samples_using_low_bits():
+    samples = make_samples(16)
+    samples[5] += 1
+
+    assert not is_12bit(samples)
+    with pytest.raises(ValueError):
+        pack_sc12(samples)
+
+
+def test_write_packed_checks_every_chunk(tmp_path):
+    samples = make_samples(10_000)
+    # Only the last chunk uses the low bits
+    samples[-1] += 1
+    path = tmp_path / "capture.sc12"
+
+    with pytest.raises(ValueError):
+        write_packed(path, samples, ChecksumMethod(), chunk_samples=3000)
+    assert not path.exists()
+    assert not is_12bit(samples, chunk_samples=3000)
+
+
+def test_write_packed_is_three_quarters_of_sc16(tmp_path):
+    samples = make_samples(10_000)
+    path = tmp_path / "capture.sc12"
+
+    checksum, _ = write_packed(path, samples, ChecksumMethod(), chunk_samples=3000)
+
+    assert path.stat().st_size == samples.nbytes * 3 // 4
+    checksummer = ChecksumMethod().create()
+    checksummer.update(path.read_bytes())
+    assert checksum == checksummer.hexdigest()
+
+
+def test_reader_unpacks_a_range(tmp_path):
+    samples = make_samples(5000)
+    path = tmp_path / "capture.sc12"
+    write_packed(path, samples, ChecksumMethod())
+
+    with PackedReader(path) as reader:
+        assert reader.num_samples == 5000
+        np.testing.assert_array_equal(reader.read(), samples)
+        np.testing.assert_array_equal(reader.read(1234, 100), samples[1234:1334])
+        assert len(reader.read(4990, 100)) == 10
+        assert len(reader.read(6000)) == 0
@@ -0,0 +1,16 @@
+import pytest
+
+pytest.importorskip("uhd")
+
+from rf_survey.models import ReceiverConfig
+from rf_survey.receiver import Receiver
+
+
+def test_streaming_mode_allocates_no_sample_buffers(tmp_path):
+    # Far more than fits in memory, streaming to disk is meant for exactly this
+    config = ReceiverConfig(gain_db=35, bandwidth_hz=56_000_000, duration_sec=3600.0)
+
+    receiver = Receiver(config, buffer_pool_size=3, stream_dir=tmp_path)
+    receiver.buffer_pool.resize(config.num_samples * 2)
+
+    assert receiver.buffer_pool.capacity == 0
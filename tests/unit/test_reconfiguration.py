@@ -0,0 +1,75 @@
+import pytest
+
+from rf_survey.models import ReceiverConfig, SweepConfig
+from rf_survey.reconfiguration import plan_reconfiguration
+
+RECEIVER_CONFIG = ReceiverConfig(gain_db=35, bandwidth_hz=20_000_000, duration_sec=1.0)
+
+SWEEP_CONFIG = SweepConfig(
+    start_hz=915_000_000,
+    end_hz=915_000_000,
+    step_hz=20_000_000,
+    cycles=0,
+    records_per_step=1,
+    interval_sec=10,
+    max_jitter_sec=0.0,
+)
+
+# ZMS parameters matching the configs above
+CURRENT_PARAMS = {
+    "gain_db": 35,
+    "duration_sec": 1.0,
+    "bandwidth_hz": 20_000_000,
+    "start_freq_hz": 915_000_000,
+    "end_freq_hz": 915_000_000,
+    "sample_interval": 10,
+}
+
+
+def plan(params, pause=False):
+    return plan_reconfiguration(RECEIVER_CONFIG, SWEEP_CONFIG, params, pause=pause)
+
+
+def test_identical_parameters_change_nothing():
+    result = plan(CURRENT_PARAMS)
+
+    assert not result.has_changes
+    assert not result.pause
+
+
+@pytest.mark.parametrize(
+    "update",
+    [{"sample_interval": 5}, {"start_freq_hz": 900_000_000}],
+)
+def test_sweep_only_changes_leave_the_receiver_alone(update):
+    result = plan({**CURRENT_PARAMS, **update})
+
+    assert result.receiver_config is None
+    assert result.sweep_config is not None
+
+
+@pytest.mark.parametrize("update", [{"gain_db": 40}, {"duration_sec": 2.0}])
+def test_receiver_only_changes_leave_the_sweep_alone(update):
+    result = plan({**CURRENT_PARAMS, **update})
+
+    assert result.receiver_config is not None
+    assert result.sweep_config is None
+
+
+def test_bandwidth_changes_both_receiver_rate_and_sweep_step():
+    result = plan({**CURRENT_PARAMS, "bandwidth_hz": 10_000_000})
+
+    assert result.receiver_config.bandwidth_hz == 10_000_000
+    assert result.sweep_config.step_hz == 10_000_000
+
+
+def test_status_only_transition_carries_no_changes():
+    result = plan(None, pause=True)
+
+    assert result.pause
+    assert not result.has_changes
+
+
+def test_invalid_parameters_raise_value_error():
+    with pytest.raises(ValueError):
+        plan({**CURRENT_PARAMS, "gain_db": 100})
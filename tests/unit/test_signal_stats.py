@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from rf_survey.signal_stats import band_label, compute_signal_stats
+
+
+def pack(i: np.ndarray, q: np.ndarray) -> np.ndarray:
+    iq = np.stack([np.round(i), np.round(q)], axis=1).astype(np.int16)
+    return iq.view(np.int32).ravel()
+
+
+def test_constant_signal_levels_and_saturation():
+    i = np.full(1000, 16384.0)
+    q = np.zeros(1000)
+    i[10], q[10] = 32767, -32768
+
+    stats = compute_signal_stats(pack(i, q))
+
+    assert stats.rms_dbfs == pytest.approx(-6.0, abs=0.1)
+    assert stats.peak_dbfs == pytest.approx(3.0, abs=0.1)
+    assert stats.papr_db == pytest.approx(stats.peak_dbfs - stats.rms_dbfs)
+    assert stats.dc_offset_i == pytest.approx(0.5, abs=0.01)
+    assert stats.saturated_samples == 1
+    assert stats.saturation_fraction == pytest.approx(0.001)
+
+
+def test_12bit_positive_rail_counts_as_saturated():
+    # The largest sample a 12-bit ADC delivers in sc16
+    i = np.full(100, 1000.0)
+    q = np.zeros(100)
+    i[:3] = 2047 << 4
+    q[3] = -(2048 << 4)
+
+    assert compute_signal_stats(pack(i, q)).saturated_samples == 4
+
+
+def test_iq_imbalance_of_a_skewed_tone():
+    """
+    A tone with Q 1 dB weaker and 5 degrees out of quadrature, on top of a
+    DC offset that must not affect the imbalance estimate.
+    """
+    n = np.arange(100_000)
+    phase = 2 * np.pi * 0.01234 * n
+    gain = 10 ** (-1 / 20)
+    i = 10_000 * np.cos(phase) + 500
+    q = gain * 10_000 * np.sin(phase + np.radians(5)) - 300
+
+    stats = compute_signal_stats(pack(i, q))
+
+    assert stats.iq_gain_imbalance_db == pytest.approx(1.0, abs=0.02)
+    assert stats.iq_phase_imbalance_deg == pytest.approx(5.0, abs=0.1)
+    assert stats.dc_offset_i == pytest.approx(500 / 32768, abs=1e-4)
+    assert stats.dc_offset_q == pytest.approx(-300 / 32768, abs=1e-4)
+
+
+def test_band_label():
+    assert band_label(915_000_000) == "900-1000MHz"
+    assert band_label(2_450_000_000, 50_000_000) == "2450-2500MHz"
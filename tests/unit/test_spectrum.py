@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from rf_survey.spectrum import WelchConfig, summarize_spectrum, welch_psd
+
+
+def make_sc16(iq: np.ndarray) -> np.ndarray:
+    """Packs complex samples into sc16 stored one per int32, as captured."""
+    packed = np.empty((len(iq), 2), dtype=np.int16)
+    packed[:, 0] = np.round(iq.real)
+    packed[:, 1] = np.round(iq.imag)
+    return packed.view(np.int32).ravel()
+
+
+def test_tone_power_and_frequency_are_recovered():
+    """
+    A half scale tone should show up at its offset with -6 dBFS of power.
+    """
+    sample_rate = 1_000_000
+    t = np.arange(200_000)
+    samples = make_sc16(16384 * np.exp(2j * np.pi * 125_000 * t / sample_rate))
+    config = WelchConfig(fft_size=1024, window="rectangular")
+
+    psd_db, segments = welch_psd(samples, sample_rate, config)
+    summary = summarize_spectrum(psd_db, segments, sample_rate, config)
+
+    assert psd_db.shape == (1024,) and psd_db.dtype == np.float32
+    assert summary.peak_offset_hz == pytest.approx(125_000)
+    tone_power_db = summary.peak_dbfs_hz + 10 * np.log10(summary.bin_width_hz)
+    assert tone_power_db == pytest.approx(-6.02, abs=0.1)
+    np.testing.assert_array_equal(summary.spectrum(), psd_db)
+
+
+def test_white_noise_floor_matches_its_power():
+    rng = np.random.default_rng(0)
+    sample_rate = 2_000_000
+    # Complex noise at -20 dBFS spread evenly over the sampled band
+    noise = (
+        0.1
+        * 32768
+        / np.sqrt(2)
+        * (rng.standard_normal(100_000) + 1j * rng.standard_normal(100_000))
+    )
+
+    psd_db, segments = welch_psd(make_sc16(noise), sample_rate, WelchConfig())
+    summary = summarize_spectrum(psd_db, segments, sample_rate, WelchConfig())
+
+    expected = -20 - 10 * np.log10(sample_rate)
+    assert summary.noise_floor_dbfs_hz == pytest.approx(expected, abs=0.5)
+
+
+def test_max_segments_limits_the_work():
+    samples = make_sc16(np.ones(100_000, dtype=complex))
+    _, segments = welch_psd(samples, 1e6, WelchConfig(max_segments=10))
+    assert segments == 10
+
+
+def test_too_short_capture_is_rejected():
+    with pytest.raises(ValueError):
+        welch_psd(make_sc16(np.ones(100, dtype=complex)), 1e6, WelchConfig())
@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from rf_survey.hashing import ChecksumMethod
+from rf_survey.models import ProcessingJob, RawCapture, ReceiverConfig, SweepConfig
+from rf_survey.spool import CaptureSpool
+
+
+def make_job(sequence: int) -> ProcessingJob:
+    return ProcessingJob(
+        raw_capture=RawCapture(
+            iq_data=np.arange(1024, dtype=np.int32),
+            center_freq_hz=915_000_000,
+            capture_timestamp=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        ),
+        receiver_config_snapshot=ReceiverConfig(
+            gain_db=30, bandwidth_hz=1_000_000, duration_sec=0.001024
+        ),
+        sweep_config_snapshot=SweepConfig(
+            start_hz=915_000_000,
+            end_hz=915_000_000,
+            step_hz=1_000_000,
+            cycles=1,
+            records_per_step=1,
+            interval_sec=10,
+            max_jitter_sec=0.0,
+        ),
+        sequence=sequence,
+    )
+
+
+def test_spilled_captures_are_recovered_after_a_restart(tmp_path):
+    spool = CaptureSpool(tmp_path, ChecksumMethod())
+    spilled = spool.spill(make_job(sequence=5))
+    assert spilled.raw_capture.resident_bytes == 0
+
+    recovered = CaptureSpool(tmp_path, ChecksumMethod()).recover(first_sequence=0)
+
+    assert len(recovered) == 1
+    job = recovered[0]
+    assert job.sequence == 0
+    assert job.raw_capture.center_freq_hz == 915_000_000
+    assert job.receiver_config_snapshot.gain_db == 30
+    np.testing.assert_array_equal(job.raw_capture.iq_data, np.arange(1024))
+
+
+def test_moving_a_spooled_capture_removes_it_from_the_spool(tmp_path):
+    spool = CaptureSpool(tmp_path / "spool", ChecksumMethod())
+    job = spool.spill(make_job(sequence=0))
+
+    job.raw_capture.capture_file.move_to(tmp_path / "capture.sc16")
+    job.raw_capture.release()
+
+    assert list((tmp_path / "spool").iterdir()) == []
+    assert spool.recover(first_sequence=0) == []
+
+
+def test_partial_spills_are_removed(tmp_path):
+    (tmp_path / "orphan.sc16").write_bytes(b"\0" * 16)
+
+    assert CaptureSpool(tmp_path, ChecksumMethod()).recover(first_sequence=0) == []
+    assert not (tmp_path / "orphan.sc16").exists()
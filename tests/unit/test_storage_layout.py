@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from rf_survey.capture_index import write_sidecar
+from rf_survey.storage_layout import (
+    StorageLayout,
+    capture_stem,
+    migrate_flat_archive,
+)
+
+TIMESTAMP = datetime(2025, 3, 7, 14, 30, 5, 123456, tzinfo=timezone.utc)
+
+
+def test_directories_follow_the_template_and_are_created_once(tmp_path):
+    layout = StorageLayout(tmp_path, "{year}/{month}/{day}/{hour}/{band}")
+
+    directory = layout.directory(TIMESTAMP, 915_000_000)
+
+    assert directory == tmp_path / "2025" / "03" / "07" / "14" / "900-1000MHz"
+    assert directory.is_dir()
+    # Cached, a directory removed behind the layout's back is not recreated
+    directory.rmdir()
+    assert layout.directory(TIMESTAMP, 915_000_000) == directory
+    assert not directory.exists()
+
+
+def test_empty_template_is_flat_and_bad_placeholders_fail_early(tmp_path):
+    assert StorageLayout(tmp_path).directory(TIMESTAMP) == tmp_path
+    with pytest.raises(ValueError):
+        StorageLayout(tmp_path, "{year}/{minute}")
+
+
+def test_migration_moves_every_file_of_a_capture(tmp_path):
+    stem = capture_stem("3123ABC", "node1", TIMESTAMP)
+    data_path = tmp_path / f"{stem}.sc16"
+    data_path.write_bytes(b"iq")
+    (tmp_path / f"{stem}.psd.npy").write_bytes(b"psd")
+    write_sidecar(data_path, '{"frequency": 2450000000}')
+    # Without a sidecar the band is unknown
+    orphan = tmp_path / f"{capture_stem('3123ABC', 'node1', datetime(2025, 1, 1))}.sc16"
+    orphan.write_bytes(b"iq")
+    (tmp_path / ".captures.db").write_bytes(b"")
+    (tmp_path / "notes.txt").write_bytes(b"")
+
+    layout = StorageLayout(tmp_path, "{year}{month}{day}/{hour}/{band}")
+    result = migrate_flat_archive(layout, workers=2)
+
+    directory = tmp_path / "20250307" / "14" / "2400-2500MHz"
+    assert sorted(p.name for p in directory.iterdir()) == [
+        f"{stem}.json",
+        f"{stem}.psd.npy",
+        f"{stem}.sc16",
+    ]
+    assert (result.moved, result.skipped, result.failed) == (3, 1, 0)
+    assert orphan.exists()
+    assert (tmp_path / ".captures.db").exists()
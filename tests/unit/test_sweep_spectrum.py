@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from rf_survey.models import SweepConfig, SweepPosition
+from rf_survey.sweep_spectrum import StepSpectrum, SweepStitcher, summarize_wideband
+
+SAMPLE_RATE = 1_000_000
+FFT_SIZE = 100
+
+
+def make_sweep_config(**overrides) -> SweepConfig:
+    values = dict(
+        start_hz=10_000_000,
+        end_hz=12_000_000,
+        step_hz=1_000_000,
+        cycles=0,
+        records_per_step=1,
+        interval_sec=1,
+        max_jitter_sec=0.0,
+    )
+    values.update(overrides)
+    return SweepConfig(**values)
+
+
+def make_step(
+    config: SweepConfig, step_index: int, level_db: float, sweep_id: str = "a"
+) -> StepSpectrum:
+    psd_db = np.full(FFT_SIZE, level_db, dtype=np.float32)
+    # Roll-off that must be trimmed
+    psd_db[:5] = psd_db[-5:] = -200.0
+    return StepSpectrum(
+        position=SweepPosition(
+            sweep_id=sweep_id,
+            step_index=step_index,
+            step_count=config.num_steps,
+            record_index=0,
+            records_per_step=1,
+        ),
+        sweep_config=config,
+        center_freq_hz=config.start_hz + step_index * config.step_hz,
+        sample_rate_hz=SAMPLE_RATE,
+        timestamp=datetime(2024, 1, 1, 0, 0, step_index, tzinfo=timezone.utc),
+        psd_db=psd_db,
+    )
+
+
+def test_steps_are_trimmed_and_stitched_in_place():
+    """
+    Each step contributes only its usable centre, at its own frequencies,
+    and the sweep is finished by its last capture.
+    """
+    config = make_sweep_config()
+    stitcher = SweepStitcher(usable_fraction=0.8)
+
+    assert stitcher.add(make_step(config, 0, -100.0)) == []
+    assert stitcher.add(make_step(config, 1, -90.0)) == []
+    (sweep,) = stitcher.add(make_step(config, 2, -80.0))
+
+    wideband = sweep.spectrum
+    spectrum = wideband.spectrum()
+    assert sweep.complete and sweep.captures_received == 3
+    assert wideband.bin_width_hz == 10_000
+    # 40 bins either side of each centre, the roll-off never makes it in
+    assert wideband.start_freq_hz == 10_000_000 - 40 * 10_000
+    assert np.nanmin(spectrum) > -101
+
+    def level_at(freq_hz: float) -> float:
+        return spectrum[round((freq_hz - wideband.start_freq_hz) / 10_000)]
+
+    assert level_at(10_000_000) == pytest.approx(-100.0)
+    assert level_at(11_000_000) == pytest.approx(-90.0)
+    assert level_at(12_300_000) == pytest.approx(-80.0)
+    # 80% of each 1 MHz step leaves a gap between the steps
+    assert np.isnan(level_at(10_450_000))
+    assert stitcher.flush() is None
+
+
+def test_overlapping_steps_average_in_linear_power():
+    config = make_sweep_config(step_hz=500_000, end_hz=10_500_000)
+    stitcher = SweepStitcher(usable_fraction=1.0)
+
+    stitcher.add(make_step(config, 0, -100.0))
+    (sweep,) = stitcher.add(make_step(config, 1, -90.0))
+
+    spectrum = sweep.spectrum.spectrum()
+    overlap = spectrum[round((10_250_000 - sweep.spectrum.start_freq_hz) / 10_000)]
+    expected = 10 * np.log10((10**-10 + 10**-9) / 2)
+    assert overlap == pytest.approx(expected, abs=1e-3)
+
+
+def test_interrupted_sweep_is_finished_by_the_next_one():
+    config = make_sweep_config()
+    stitcher = SweepStitcher()
+
+    stitcher.add(make_step(config, 0, -100.0, sweep_id="a"))
+    (cut_short,) = stitcher.add(make_step(config, 0, -100.0, sweep_id="b"))
+
+    assert cut_short.sweep_id == "a"
+    assert not cut_short.complete
+    assert stitcher.flush().sweep_id == "b"
+
+
+def test_summary_preview_keeps_narrowband_peaks():
+    spectrum = np.full(10_000, -120.0, dtype=np.float32)
+    spectrum[:100] = np.nan
+    spectrum[7_777] = -40.0
+
+    summary = summarize_wideband(spectrum, 1e9, 1_000.0, preview_bins=1_000)
+
+    assert summary.coverage == pytest.approx(0.99)
+    assert summary.noise_floor_dbfs_hz == pytest.approx(-120.0)
+    assert summary.peak_freq_hz == pytest.approx(1e9 + 7_777_000)
+    preview = summary.preview()
+    assert len(preview) == 1_000 and summary.preview_bin_width_hz == 10_000
+    assert np.isnan(preview[0]) and np.nanmax(preview) == -40.0
@@ -0,0 +1,46 @@
+import numpy as np
+
+from rf_survey.signal_stats import compute_signal_stats
+from rf_survey.triage import CaptureTriage, TriageConfig
+
+
+def make_noise(rng: np.random.Generator, rms: float, size: int = 50_000) -> np.ndarray:
+    """Complex Gaussian noise as sc16 stored one per int32."""
+    iq = np.clip(rng.normal(0, rms / np.sqrt(2), (size, 2)), -32768, 32767)
+    return np.round(iq).astype(np.int16).view(np.int32).ravel()
+
+
+def evaluate(triage: CaptureTriage, samples: np.ndarray, key):
+    return triage.evaluate(compute_signal_stats(samples), key)
+
+
+def test_quiet_captures_are_reduced_after_warmup():
+    """
+    Captures like the baseline are only kept in full until the baseline is
+    trusted, a jump in power is kept in full again.
+    """
+    rng = np.random.default_rng(1)
+    triage = CaptureTriage(TriageConfig(warmup_captures=3, quiet_action="metadata"))
+    key = (915_000_000, 1_000_000, 30)
+
+    results = [evaluate(triage, make_noise(rng, 100), key) for _ in range(6)]
+    assert [r.reason for r in results[:3]] == ["warmup"] * 3
+    assert [r.action for r in results[3:]] == ["metadata"] * 3
+    assert results[-1].baseline_captures == 5
+
+    burst = evaluate(triage, make_noise(rng, 1000), key)
+    assert (burst.action, burst.reason) == ("full", "power_change")
+    assert burst.power_zscore > 4
+
+    # Another frequency has its own baseline
+    other_key = (916_000_000, 1_000_000, 30)
+    assert evaluate(triage, make_noise(rng, 100), other_key).reason == "warmup"
+
+
+def test_clipping_always_keeps_the_capture():
+    rng = np.random.default_rng(2)
+    triage = CaptureTriage(TriageConfig(warmup_captures=0))
+
+    result = evaluate(triage, make_noise(rng, 40_000), "key")
+
+    assert (result.action, result.reason) == ("full", "clipping")
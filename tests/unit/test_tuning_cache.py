@@ -0,0 +1,50 @@
+import pytest
+
+from rf_survey.tuning_cache import TuningCache
+
+
+def test_lock_time_is_smoothed_across_tunes():
+    cache = TuningCache(smoothing=0.5)
+    cache.record_tune(915_000_000, 915_000_000.0, 0.0)
+
+    assert cache.expected_lock_time(915_000_000) is None
+
+    cache.record_lock(915_000_000, 0.010, locked=True)
+    cache.record_lock(915_000_000, 0.020, locked=True)
+
+    assert cache.expected_lock_time(915_000_000) == pytest.approx(0.015)
+
+
+def test_failed_locks_are_counted_but_do_not_skew_lock_time():
+    cache = TuningCache()
+    cache.record_tune(915_000_000, 915_000_000.0, 0.0)
+    cache.record_lock(915_000_000, 0.010, locked=True)
+    cache.record_lock(915_000_000, 1.0, locked=False)
+
+    record = cache.get(915_000_000)
+    assert record.lock_count == 1
+    assert record.failure_count == 1
+    assert record.lock_time_sec == pytest.approx(0.010)
+
+
+def test_cache_survives_a_restart(tmp_path):
+    path = tmp_path / "tuning.json"
+    cache = TuningCache(path=path)
+    cache.record_tune(2_400_000_000, 2_400_000_000.0, -1.5)
+    cache.record_lock(2_400_000_000, 0.004, locked=True)
+    cache.save()
+
+    restored = TuningCache(path=path)
+    restored.load()
+
+    assert restored.get(2_400_000_000) == cache.get(2_400_000_000)
+
+
+def test_unreadable_cache_file_is_ignored(tmp_path):
+    path = tmp_path / "tuning.json"
+    path.write_text("not json")
+
+    cache = TuningCache(path=path)
+    cache.load()
+
+    assert cache.get(915_000_000) is None